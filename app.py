@@ -3,14 +3,20 @@ Web interface for the Hotel Demand Simulator.
 Allows viewing and managing simulation runs with multi-hotel support.
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 import json
+import queue
 import os
 import logging
 from pathlib import Path
 from simulator import HotelDemandSimulator
 from datetime import datetime
 from utils.models import SimulationConfig
+from parameter_sweep import ParameterSweep, check_combinations, grid, random_sample
+from supplier_run import run_supplier_config
+from utils.job_manager import JobManager
+from utils.result_cache import ResultCache
+from utils.run_catalogue import RunCatalogue, sidecar_path
 
 # Configure logging to write to files
 def setup_logging():
@@ -47,6 +53,12 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'simulations'
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_MAX_QUEUED'] = int(os.environ.get('JOB_MAX_QUEUED', 32))
+app.config['JOB_RESULT_TTL'] = float(os.environ.get('JOB_RESULT_TTL', 3600))
+app.config['SWEEP_WORKERS'] = int(os.environ.get('SWEEP_WORKERS', 2))  # processes per sweep job
+app.config['RESULT_CACHE_SIZE'] = int(os.environ.get('RESULT_CACHE_SIZE', 256))
+app.config['RESULT_CACHE_DIR'] = os.environ.get('RESULT_CACHE_DIR')  # memory only if unset
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 logger.info("Flask app initialized")
@@ -56,27 +68,30 @@ logger.info(f"Logging to file: {log_file_path}")
 # Global simulator instance
 simulator = HotelDemandSimulator()
 
+# Background runs for the supplier page
+SSE_KEEPALIVE_SECONDS = 15
+job_manager = JobManager(
+    max_workers=app.config['JOB_WORKERS'],
+    max_queued=app.config['JOB_MAX_QUEUED'],
+    result_ttl=app.config['JOB_RESULT_TTL']
+)
+
+# Saved runs in the simulations folder, listed from their sidecars
+run_catalogue = RunCatalogue(app.config['UPLOAD_FOLDER'])
+
+# Supplier run results by demand file digest and configuration hash
+result_cache = ResultCache(
+    max_entries=app.config['RESULT_CACHE_SIZE'],
+    cache_dir=app.config['RESULT_CACHE_DIR']
+)
+
 
 @app.route('/')
 def index():
     """Main page showing available simulations."""
     logger.debug("API: Loading index page")
 
-    simulations = []
-
-    if os.path.exists(app.config['UPLOAD_FOLDER']):
-        for filename in os.listdir(app.config['UPLOAD_FOLDER']):
-            if filename.endswith('.json'):
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file_stat = os.stat(filepath)
-                simulations.append({
-                    'name': filename,
-                    'path': filepath,
-                    'size': file_stat.st_size,
-                    'modified': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                })
-
-    simulations.sort(key=lambda x: x['modified'], reverse=True)
+    simulations = run_catalogue.list()
     logger.debug(f"API: Found {len(simulations)} simulations")
     return render_template('index.html', simulations=simulations)
 
@@ -165,7 +180,7 @@ def load_simulation(filename):
         total_users = len(simulator.users)
         total_itineraries = sum(len(itineraries) for itineraries in simulator.users.values())
         total_demands = sum(
-            len(itinerary.demands)
+            itinerary.num_demands
             for itineraries in simulator.users.values()
             for itinerary in itineraries
         )
@@ -203,28 +218,18 @@ def get_simulation_details(filename):
             logger.warning(f"API: File not found for details: {filename}")
             return jsonify({'success': False, 'error': 'File not found'}), 404
 
-        # Load the simulation
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-
-        # Calculate statistics
-        casual_users = sum(1 for user_id in data['users'].keys() if user_id.startswith('casual'))
-        business_users = sum(1 for user_id in data['users'].keys() if user_id.startswith('business'))
-        
-        total_demands = sum(
-            len(itinerary['demands'])
-            for user_data in data['users'].values()
-            for itinerary in user_data
-        )
+        # Summary from the sidecar, written on save (or now, for older files)
+        meta = run_catalogue.details(filename)
+        stats = meta['stats']
 
         return jsonify({
             'success': True,
-            'parameters': data['simulation_parameters'],
+            'parameters': meta['simulation_parameters'],
             'stats': {
-                'casual_users': casual_users,
-                'business_users': business_users,
-                'total_users': casual_users + business_users,
-                'total_demands': total_demands
+                'casual_users': stats['casual_users'],
+                'business_users': stats['business_users'],
+                'total_users': stats['total_users'],
+                'total_demands': stats['total_demands']
             }
         })
     except Exception as e:
@@ -271,6 +276,8 @@ def delete_simulation(filename):
 
         if os.path.exists(filepath):
             os.remove(filepath)
+            if os.path.exists(sidecar_path(filepath)):
+                os.remove(sidecar_path(filepath))
             logger.info(f"API: Simulation {filename} deleted successfully")
         else:
             logger.warning(f"API: File not found for deletion: {filename}")
@@ -286,18 +293,10 @@ def supplier():
     """Supplier strategy tester page."""
     logger.debug("API: Loading supplier page")
     
-    simulations = []
-    if os.path.exists(app.config['UPLOAD_FOLDER']):
-        for filename in os.listdir(app.config['UPLOAD_FOLDER']):
-            if filename.endswith('.json'):
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file_stat = os.stat(filepath)
-                simulations.append({
-                    'name': filename,
-                    'modified': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                })
-    
-    simulations.sort(key=lambda x: x['modified'], reverse=True)
+    simulations = [
+        {'name': entry['name'], 'modified': entry['modified']}
+        for entry in run_catalogue.list()
+    ]
     
     # Get default configuration
     config = SimulationConfig()
@@ -344,67 +343,227 @@ def get_config():
         return jsonify({'success': False, 'error': str(e)}), 400
 
 
+def _supplier_config(config_data):
+    """Build the SimulationConfig a supplier run applies."""
+    config = SimulationConfig()
+    
+    # Apply custom configuration
+    if 'hotels' in config_data:
+        for i, hotel_data in enumerate(config_data['hotels']):
+            if i < len(config.hotels):
+                if 'base_price' in hotel_data:
+                    config.hotels[i].base_price = float(hotel_data['base_price'])
+                if 'dynamic_pricing_config' in hotel_data:
+                    config.hotels[i].dynamic_pricing_config = hotel_data['dynamic_pricing_config']
+    
+    if 'travel_agents' in config_data:
+        for i, agent_data in enumerate(config_data['travel_agents']):
+            if i < len(config.travel_agents):
+                if 'operating_cost_per_room' in agent_data:
+                    config.travel_agents[i].operating_cost_per_room = float(agent_data['operating_cost_per_room'])
+                if 'profit_margin' in agent_data:
+                    config.travel_agents[i].profit_margin = float(agent_data['profit_margin'])
+    
+    if 'allocation_rules' in config_data:
+        config.allocation_rules = config_data['allocation_rules']
+    
+    return config
+
+
+def _run_supplier_simulation(filepath, config, cache_key, progress, instrument=False):
+    """Run a supplier configuration against a demand file in its own simulation ID, reporting progress per day, and cache the result."""
+    stats = run_supplier_config(filepath, config, progress=progress, instrument=instrument)
+    
+    logger.info(f"API: Simulation complete - {stats['total_bookings']} bookings, "
+               f"${stats['total_revenue']:.2f} revenue")
+    
+    # The instrumentation report describes this run, not the result
+    result_cache.put(cache_key, {k: v for k, v in stats.items() if k != 'instrumentation'})
+    return stats
+
+
 @app.route('/api/supplier/run', methods=['POST'])
 def run_supplier_simulation():
-    """Run a simulation with the refactored multi-supplier system."""
+    """Queue a simulation with the multi-supplier system as a background job, unless its result is cached."""
     try:
         data = request.json
         simulation_filename = data.get('simulation_filename')
         config_data = data.get('config', {})
+        instrument = bool(data.get('instrument', False))
         
         if not simulation_filename:
             return jsonify({'success': False, 'error': 'No simulation file specified'}), 400
         
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], simulation_filename)
         
+        if not os.path.abspath(filepath).startswith(os.path.abspath(app.config['UPLOAD_FOLDER'])):
+            return jsonify({'success': False, 'error': 'Invalid file path'}), 400
+        
         if not os.path.exists(filepath):
             return jsonify({'success': False, 'error': 'Simulation file not found'}), 404
         
-        logger.info(f"API: Running supplier simulation with {simulation_filename}")
+        config = _supplier_config(config_data)
+        cache_key = result_cache.make_key(filepath, config)
+        # An instrumented run is wanted for its timings, so it always runs
+        cached = None if instrument else result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"API: Returning cached supplier simulation for {simulation_filename}")
+            return jsonify({
+                'success': True,
+                'cached': True,
+                'metrics': cached
+            })
         
-        # Create new simulator instance
-        sim = HotelDemandSimulator()
+        logger.info(f"API: Queueing supplier simulation with {simulation_filename}")
         
-        # Apply custom configuration
-        if 'hotels' in config_data:
-            for i, hotel_data in enumerate(config_data['hotels']):
-                if i < len(sim.config.hotels):
-                    if 'base_price' in hotel_data:
-                        sim.config.hotels[i].base_price = float(hotel_data['base_price'])
-                    if 'dynamic_pricing_config' in hotel_data:
-                        sim.config.hotels[i].dynamic_pricing_config = hotel_data['dynamic_pricing_config']
+        try:
+            job = job_manager.submit(
+                lambda progress: _run_supplier_simulation(filepath, config, cache_key, progress, instrument),
+                description=f"Supplier simulation with {simulation_filename}"
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 429
         
-        if 'travel_agents' in config_data:
-            for i, agent_data in enumerate(config_data['travel_agents']):
-                if i < len(sim.config.travel_agents):
-                    if 'operating_cost_per_room' in agent_data:
-                        sim.config.travel_agents[i].operating_cost_per_room = float(agent_data['operating_cost_per_room'])
-                    if 'profit_margin' in agent_data:
-                        sim.config.travel_agents[i].profit_margin = float(agent_data['profit_margin'])
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id,
+            'status': job.status.value
+        }), 202
         
-        if 'allocation_rules' in config_data:
-            sim.config.allocation_rules = config_data['allocation_rules']
+    except Exception as e:
+        logger.error(f"API: Error queueing supplier simulation: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get the status and progress of a background job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found or expired'}), 404
+    
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Stream a background job's per-day progress as Server-Sent Events."""
+    events = job_manager.subscribe(job_id)
+    if events is None:
+        return jsonify({'success': False, 'error': 'Job not found or expired'}), 404
+    
+    def generate():
+        try:
+            while True:
+                try:
+                    event, data = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    # Comment line so proxies keep the connection open
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                if event == 'done':
+                    break
+        finally:
+            job_manager.unsubscribe(job_id, events)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Get the metrics of a finished background job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found or expired'}), 404
+    
+    if not job.is_finished:
+        return jsonify({'success': False, 'error': 'Job has not finished', 'job': job.to_dict()}), 409
+    
+    if job.error is not None:
+        return jsonify({'success': False, 'error': job.error, 'job': job.to_dict()}), 400
+    
+    return jsonify({'success': True, 'job': job.to_dict(), 'metrics': job.result})
+
+
+@app.route('/api/jobs/<job_id>/instrumentation', methods=['GET'])
+def get_job_instrumentation(job_id):
+    """Get the per-phase and per-day timing report of a finished instrumented job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found or expired'}), 404
+    
+    if not job.is_finished:
+        return jsonify({'success': False, 'error': 'Job has not finished', 'job': job.to_dict()}), 409
+    
+    if job.error is not None:
+        return jsonify({'success': False, 'error': job.error, 'job': job.to_dict()}), 400
+    
+    report = job.result.get('instrumentation')
+    if report is None:
+        return jsonify({'success': False, 'error': 'Job was not run with instrument enabled'}), 404
+    
+    return jsonify({'success': True, 'job': job.to_dict(), 'instrumentation': report})
+
+
+def _run_supplier_sweep(filepath, combinations, rank_by, progress):
+    """Run a sweep against a demand file, reporting progress per finished combination."""
+    results = ParameterSweep(filepath, max_workers=app.config['SWEEP_WORKERS']).run(
+        combinations, rank_by=rank_by, progress=progress
+    )
+    return {'rank_by': rank_by, 'results': results}
+
+
+@app.route('/api/supplier/sweep', methods=['POST'])
+def run_supplier_sweep():
+    """Queue a grid or random sample of supplier configurations against one demand file as a background job."""
+    try:
+        data = request.json
+        simulation_filename = data.get('simulation_filename')
+        rank_by = data.get('rank_by', 'total_revenue')
+        
+        if not simulation_filename:
+            return jsonify({'success': False, 'error': 'No simulation file specified'}), 400
+        
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], simulation_filename)
         
-        # Load the demand data
-        sim.load_run(filepath)
+        if not os.path.abspath(filepath).startswith(os.path.abspath(app.config['UPLOAD_FOLDER'])):
+            return jsonify({'success': False, 'error': 'Invalid file path'}), 400
+        
+        if not os.path.exists(filepath):
+            return jsonify({'success': False, 'error': 'Simulation file not found'}), 404
+        
+        if 'grid' in data:
+            combinations = grid(data['grid'])
+        elif 'sample' in data:
+            sample = data['sample']
+            combinations = random_sample(sample['space'], int(sample['num_samples']), sample.get('seed'))
+        else:
+            return jsonify({'success': False, 'error': 'Specify a grid or a sample'}), 400
         
-        # Re-initialize supply with potentially updated configuration
-        sim.supply_manager.cleanup_simulation(sim.simulation_id)
-        sim.supply_manager.initialize_simulation(sim.simulation_id, sim.config)
+        # Reject bad input now rather than in the job
+        check_combinations(SimulationConfig(), combinations, rank_by)
         
-        # Run the full simulation
-        stats = sim.run_full_simulation()
+        logger.info(f"API: Queueing sweep of {len(combinations)} combinations with {simulation_filename}")
         
-        logger.info(f"API: Simulation complete - {stats['total_bookings']} bookings, "
-                   f"${stats['total_revenue']:.2f} revenue")
+        try:
+            job = job_manager.submit(
+                lambda progress: _run_supplier_sweep(filepath, combinations, rank_by, progress),
+                description=f"Sweep of {len(combinations)} combinations with {simulation_filename}"
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 429
         
         return jsonify({
             'success': True,
-            'metrics': stats
-        })
+            'job_id': job.job_id,
+            'status': job.status.value
+        }), 202
         
     except Exception as e:
-        logger.error(f"API: Error running supplier simulation: {str(e)}", exc_info=True)
+        logger.error(f"API: Error queueing supplier sweep: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 400
 
 
@@ -0,0 +1,237 @@
+"""
+Simulation Benchmarks
+
+Times each phase of a fixed-seed simulation against the in-memory supply store and
+compares the timings with a stored baseline.
+
+Usage:
+    python -m benchmarks.bench_simulation --output results.json
+    python -m benchmarks.bench_simulation --scenarios large --repeat 1
+    python -m benchmarks.bench_simulation --compare baseline.json --threshold 0.2
+
+Exits with status 1 when --compare flags a regression.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+
+from simulator import HotelDemandSimulator
+from utils.demand_table import DemandTable
+
+logger = logging.getLogger(__name__)
+
+RESULTS_VERSION = 1
+
+# Fixed-seed scenarios; the large one uses the vectorized generator and the
+# columnar format, since the per-user path is impractical at that size
+SCENARIOS = {
+    "small": {"total_users": 100, "proportion_casual": 0.8, "seed": 1, "vectorized": False, "format": ".json"},
+    "medium": {"total_users": 10_000, "proportion_casual": 0.8, "seed": 1, "vectorized": False, "format": ".json"},
+    "large": {"total_users": 1_000_000, "proportion_casual": 0.8, "seed": 1, "vectorized": True,
+              "format": DemandTable.FILE_EXTENSION},
+}
+DEFAULT_SCENARIOS = ("small", "medium")
+
+# Phases compared against a baseline, in run order
+PHASES = ("generate_demand", "save_run", "load_run", "initialize_simulation",
+          "process_daily_shopping", "get_simulation_statistics")
+
+
+def _timed(fn, *args, **kwargs) -> float:
+    """Seconds taken by one call"""
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def run_scenario(name: str, work_dir: str) -> Dict:
+    """
+    Time every phase of one scenario once
+
+    Args:
+        name: Key of SCENARIOS
+        work_dir: Directory for the saved run
+
+    Returns:
+        Phase -> seconds, with process_daily_shopping broken down per day,
+        plus the run's booking count as a sanity check
+    """
+    scenario = SCENARIOS[name]
+    path = os.path.join(work_dir, f"{name}{scenario['format']}")
+
+    simulator = HotelDemandSimulator(supply_backend="memory")
+    timings = {"generate_demand": _timed(
+        simulator.generate_demand,
+        total_users=scenario["total_users"],
+        proportion_casual=scenario["proportion_casual"],
+        simulation_id=f"bench_{name}",
+        vectorized=scenario["vectorized"],
+        seed=scenario["seed"]
+    )}
+    timings["save_run"] = _timed(simulator.save_run, path)
+
+    simulator = HotelDemandSimulator(supply_backend="memory")
+    timings["load_run"] = _timed(simulator.load_run, path, mmap=scenario["vectorized"])
+    timings["initialize_simulation"] = _timed(
+        simulator.supply_manager.initialize_simulation, simulator.simulation_id, simulator.config
+    )
+
+    per_day = []
+    for day in range(simulator.config.simulation_start_day, simulator.config.simulation_end_day + 1):
+        per_day.append(_timed(simulator.process_daily_shopping, day))
+    timings["process_daily_shopping"] = sum(per_day)
+    timings["process_daily_shopping_per_day"] = per_day
+
+    start = time.perf_counter()
+    stats = simulator.supply_manager.get_simulation_statistics(simulator.simulation_id, simulator.config)
+    timings["get_simulation_statistics"] = time.perf_counter() - start
+    timings["total_bookings"] = stats["total_bookings"]
+
+    return timings
+
+
+def run_benchmarks(scenarios: List[str], repeat: int = 3) -> Dict:
+    """
+    Run scenarios, keeping each phase's fastest time over the repeats
+
+    Args:
+        scenarios: Scenario names
+        repeat: Runs per scenario
+
+    Returns:
+        Results document: environment metadata and per-scenario timings
+    """
+    results = {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "scenarios": {}
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="hotel_bench_")
+    try:
+        for name in scenarios:
+            runs = []
+            for i in range(repeat):
+                logger.info(f"Benchmark {name}: run {i + 1} of {repeat}")
+                runs.append(run_scenario(name, work_dir))
+
+            best = {phase: min(run[phase] for run in runs) for phase in PHASES}
+            per_day = np.min([run["process_daily_shopping_per_day"] for run in runs], axis=0)
+            best["process_daily_shopping_per_day"] = {
+                "mean": float(per_day.mean()),
+                "p50": float(np.percentile(per_day, 50)),
+                "p95": float(np.percentile(per_day, 95)),
+                "max": float(per_day.max()),
+                "days": per_day.tolist()
+            }
+            best["total_bookings"] = runs[0]["total_bookings"]
+            results["scenarios"][name] = {**SCENARIOS[name], "repeat": repeat, "timings": best}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return results
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = 0.2,
+                    min_seconds: float = 0.05) -> List[Dict]:
+    """
+    Compare timings against a baseline
+
+    Args:
+        current: Results from run_benchmarks
+        baseline: Stored results to compare with
+        threshold: Relative slowdown flagged as a regression, e.g. 0.2 for 20%
+        min_seconds: Phases faster than this in both runs are too noisy to flag
+
+    Returns:
+        One row per phase present in both, with baseline and current seconds,
+        the ratio and whether it regressed
+    """
+    rows = []
+    for name, scenario in current["scenarios"].items():
+        if name not in baseline.get("scenarios", {}):
+            continue
+        base_timings = baseline["scenarios"][name]["timings"]
+        for phase in PHASES:
+            if phase not in base_timings or phase not in scenario["timings"]:
+                continue
+            before = base_timings[phase]
+            after = scenario["timings"][phase]
+            ratio = after / before if before > 0 else float("inf")
+            rows.append({
+                "scenario": name,
+                "phase": phase,
+                "baseline": before,
+                "current": after,
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold and max(before, after) >= min_seconds
+            })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point; returns 1 if a regression was flagged"""
+    parser = argparse.ArgumentParser(description="Benchmark the simulation hot paths")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(DEFAULT_SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; the fastest is kept")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown flagged as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Phases faster than this in both runs are never flagged")
+    args = parser.parse_args(argv)
+
+    # Per-day simulator logging would dominate the timings
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger(__name__).setLevel(logging.INFO)
+
+    results = run_benchmarks(args.scenarios, repeat=args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Results written to {args.output}")
+
+    for name, scenario in results["scenarios"].items():
+        timings = scenario["timings"]
+        print(f"{name} ({scenario['total_users']} users, {timings['total_bookings']} bookings)")
+        for phase in PHASES:
+            print(f"  {phase:<28}{timings[phase]:>10.4f}s")
+        per_day = timings["process_daily_shopping_per_day"]
+        print(f"  {'per day p50 / p95 / max':<28}{per_day['p50']:>10.4f}s {per_day['p95']:.4f}s {per_day['max']:.4f}s")
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+
+    rows = compare_results(results, baseline, threshold=args.threshold, min_seconds=args.min_seconds)
+    regressions = [row for row in rows if row["regression"]]
+    print(f"\nCompared with {args.compare} (threshold {args.threshold:.0%})")
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"  {row['scenario']:<8}{row['phase']:<28}{row['baseline']:>10.4f}s -> "
+              f"{row['current']:.4f}s  x{row['ratio']:.2f}  {flag}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Monte Carlo Runner
+
+Runs the same simulation over many demand seeds in parallel and aggregates the statistics.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+
+from simulator import HotelDemandSimulator
+from utils.models import SimulationConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def run_seed(config: SimulationConfig, total_users: int, proportion_casual: float, seed: int,
+             lazy_pricing: bool = False, vectorized: bool = False) -> Dict:
+    """
+    Generate demand for one seed and run it against an isolated in-memory supply store
+
+    Args:
+        config: Simulation configuration
+        total_users: Total number of users to simulate
+        proportion_casual: Proportion of casual travellers (0.0 to 1.0)
+        seed: Demand seed
+        lazy_pricing: Use lazy hotel pricing
+        vectorized: Use the vectorized demand generator
+
+    Returns:
+        get_simulation_statistics fields for the run, plus the seed
+    """
+    simulator = HotelDemandSimulator(supply_backend="memory", lazy_pricing=lazy_pricing, config=config)
+    simulator.generate_demand(
+        total_users=total_users,
+        proportion_casual=proportion_casual,
+        simulation_id=f"mc_seed_{seed}",
+        vectorized=vectorized,
+        seed=seed
+    )
+    stats = simulator.run_full_simulation()
+    stats["seed"] = seed
+    return stats
+
+
+def summarize_runs(runs: List[Dict], percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Dict[str, float]]:
+    """
+    Aggregate per-run statistics into distributions
+
+    Args:
+        runs: Statistics of each run
+        percentiles: Percentiles to report for every field
+
+    Returns:
+        Dictionary of field -> {mean, std, min, max, p<percentile>...} over
+        every numeric field except the seed
+    """
+    if not runs:
+        return {}
+
+    summary = {}
+    for field, value in runs[0].items():
+        if field == "seed" or isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+
+        values = np.array([run[field] for run in runs], dtype=np.float64)
+        field_summary = {
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+        }
+        for p, value in zip(percentiles, np.percentile(values, percentiles)):
+            field_summary[f"p{p:g}"] = float(value)
+        summary[field] = field_summary
+
+    return summary
+
+
+class MonteCarloRunner:
+    """Fans independent simulation runs over seeds out across a process pool."""
+
+    def __init__(self, config: SimulationConfig, total_users: int, proportion_casual: float,
+                 seeds: Union[int, Sequence[int]], max_workers: Optional[int] = None,
+                 lazy_pricing: bool = False, vectorized: bool = False,
+                 percentiles: Sequence[float] = DEFAULT_PERCENTILES):
+        """
+        Args:
+            config: Simulation configuration shared by every run
+            total_users: Total number of users to simulate per run
+            proportion_casual: Proportion of casual travellers (0.0 to 1.0)
+            seeds: Number of runs (seeds 0..N-1) or an explicit list of seeds
+            max_workers: Worker processes (defaults to the CPU count); 1 runs
+                every seed in this process
+            lazy_pricing: Use lazy hotel pricing in every run
+            vectorized: Use the vectorized demand generator in every run
+            percentiles: Percentiles reported by the summary
+        """
+        if total_users <= 0:
+            raise ValueError("total_users must be positive")
+        if not 0.0 <= proportion_casual <= 1.0:
+            raise ValueError("proportion_casual must be between 0.0 and 1.0")
+
+        self.config = config
+        self.total_users = total_users
+        self.proportion_casual = proportion_casual
+        self.seeds = list(range(seeds)) if isinstance(seeds, int) else list(seeds)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.lazy_pricing = lazy_pricing
+        self.vectorized = vectorized
+        self.percentiles = percentiles
+
+        if not self.seeds:
+            raise ValueError("At least one seed is required")
+
+    def run(self) -> Dict:
+        """
+        Run every seed and aggregate the results
+
+        Returns:
+            Dictionary with the per-seed "runs" (in seed order) and the "summary"
+            distributions of each statistic
+        """
+        logger.info(f"Monte Carlo: {len(self.seeds)} seeds, {self.total_users} users, "
+                    f"{self.max_workers} workers")
+
+        args = [
+            (self.config, self.total_users, self.proportion_casual, seed, self.lazy_pricing, self.vectorized)
+            for seed in self.seeds
+        ]
+
+        if self.max_workers == 1:
+            runs = [run_seed(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(args))) as executor:
+                runs = list(executor.map(run_seed, *zip(*args)))
+
+        summary = summarize_runs(runs, self.percentiles)
+
+        if "total_revenue" in summary:
+            logger.info(f"Monte Carlo complete: mean revenue ${summary['total_revenue']['mean']:.2f} "
+                        f"over {len(runs)} runs")
+
+        return {"runs": runs, "summary": summary}
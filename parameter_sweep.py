@@ -0,0 +1,244 @@
+"""
+Parameter Sweep
+
+Runs many pricing and allocation configurations against one demand file in parallel and ranks them.
+"""
+
+import copy
+import itertools
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from simulator import HotelDemandSimulator
+from utils.demand_table import DemandTable
+from utils.models import SimulationConfig
+
+logger = logging.getLogger(__name__)
+
+LEAD_TIME_KEYS = ("lead_time_0_7", "lead_time_8_14", "lead_time_15_30", "lead_time_31_plus")
+AGENT_FIELDS = ("profit_margin", "operating_cost_per_room")
+RANK_METRICS = ("total_revenue", "occupancy_rate", "avg_price_per_night")
+MAX_COMBINATIONS = 1000
+
+# Demand shared read-only by every run in a worker process: (table, simulation_parameters)
+_shared_demand: Optional[Tuple[DemandTable, Dict]] = None
+
+
+def apply_overrides(config: SimulationConfig, overrides: Dict[str, Any]) -> SimulationConfig:
+    """
+    Copy a configuration with parameters overridden by path
+
+    Paths are "hotels.<hotel_id>.base_price", "hotels.<hotel_id>.<lead time key>",
+    "travel_agents.<agent_id>.profit_margin", "travel_agents.<agent_id>.operating_cost_per_room"
+    and "allocation_rules.<agent_id>.<hotel_id>".
+
+    Args:
+        config: Base configuration, left unchanged
+        overrides: Parameter path -> value
+
+    Returns:
+        New SimulationConfig with the overrides applied
+    """
+    config = copy.deepcopy(config)
+
+    for path, value in overrides.items():
+        parts = path.split(".")
+        if len(parts) != 3:
+            raise ValueError(f"Invalid sweep parameter '{path}'")
+        section, target_id, name = parts
+
+        if section == "hotels":
+            hotel = config.get_hotel_by_id(target_id)
+            if hotel is None:
+                raise ValueError(f"Unknown hotel '{target_id}' in '{path}'")
+            if name == "base_price":
+                hotel.base_price = float(value)
+            elif name in LEAD_TIME_KEYS:
+                hotel.dynamic_pricing_config = {**hotel.dynamic_pricing_config, name: float(value)}
+            else:
+                raise ValueError(f"Unknown hotel parameter '{name}' in '{path}'")
+
+        elif section == "travel_agents":
+            agent = config.get_travel_agent_by_id(target_id)
+            if agent is None:
+                raise ValueError(f"Unknown travel agent '{target_id}' in '{path}'")
+            if name not in AGENT_FIELDS:
+                raise ValueError(f"Unknown travel agent parameter '{name}' in '{path}'")
+            setattr(agent, name, float(value))
+
+        elif section == "allocation_rules":
+            if config.get_travel_agent_by_id(target_id) is None or config.get_hotel_by_id(name) is None:
+                raise ValueError(f"Unknown allocation rule '{path}'")
+            config.allocation_rules.setdefault(target_id, {})[name] = int(value)
+
+        else:
+            raise ValueError(f"Unknown sweep section '{section}' in '{path}'")
+
+    return config
+
+
+def grid(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Every combination of the given parameter values
+
+    Args:
+        space: Parameter path -> list of values
+
+    Returns:
+        List of override dictionaries
+    """
+    paths = list(space)
+    return [dict(zip(paths, values)) for values in itertools.product(*(space[p] for p in paths))]
+
+
+def random_sample(space: Dict[str, Any], num_samples: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Random combinations of parameter values
+
+    Args:
+        space: Parameter path -> list of values to choose from, or
+            {"min": low, "max": high} to draw uniformly
+        num_samples: Number of combinations to draw
+        seed: Optional seed for reproducible samples
+
+    Returns:
+        List of override dictionaries
+    """
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(num_samples):
+        overrides = {}
+        for path, values in space.items():
+            if isinstance(values, dict):
+                overrides[path] = rng.uniform(values["min"], values["max"])
+            else:
+                overrides[path] = rng.choice(values)
+        samples.append(overrides)
+    return samples
+
+
+def check_combinations(base_config: SimulationConfig, combinations: List[Dict[str, Any]],
+                       rank_by: str = "total_revenue"):
+    """
+    Reject a sweep before starting any work
+
+    Args:
+        base_config: Configuration the overrides apply to
+        combinations: Override dictionaries
+        rank_by: Metric to rank by
+
+    Raises:
+        ValueError: If the metric, the number of combinations or any parameter path is invalid
+    """
+    if rank_by not in RANK_METRICS:
+        raise ValueError(f"Unknown rank metric '{rank_by}', expected one of {RANK_METRICS}")
+    if len(combinations) > MAX_COMBINATIONS:
+        raise ValueError(f"Sweep of {len(combinations)} combinations exceeds the limit of {MAX_COMBINATIONS}")
+
+    for overrides in combinations:
+        apply_overrides(base_config, overrides)
+
+
+def _init_worker(demand_path: str, table: Optional[DemandTable], simulation_parameters: Optional[Dict]):
+    """Give a worker process the shared demand, memory-mapping columnar files"""
+    global _shared_demand
+    if table is None:
+        table, simulation_parameters = DemandTable.load(demand_path, mmap=True)
+    _shared_demand = (table.by_shopping_day(), simulation_parameters)
+
+
+def _run_combination(base_config: SimulationConfig, overrides: Dict[str, Any]) -> Dict:
+    """Run one configuration against the worker's shared demand"""
+    table, simulation_parameters = _shared_demand
+
+    simulator = HotelDemandSimulator(supply_backend="memory", config=apply_overrides(base_config, overrides))
+    simulator.set_demand_table(table.shallow_copy(), simulation_parameters)
+    if not simulator.simulation_id:
+        simulator.simulation_id = "sweep"
+
+    simulator.supply_manager.initialize_simulation(simulator.simulation_id, simulator.config)
+    return simulator.run_full_simulation()
+
+
+class ParameterSweep:
+    """Runs configurations against one demand file in a process pool and ranks the results."""
+
+    def __init__(self, demand_path: str, base_config: Optional[SimulationConfig] = None,
+                 max_workers: Optional[int] = None):
+        """
+        Parse the demand file once
+
+        Args:
+            demand_path: Saved run (JSON or columnar) every configuration is tested against
+            base_config: Configuration the overrides apply to (defaults to SimulationConfig())
+            max_workers: Worker processes (defaults to the CPU count); 1 runs
+                every combination in this process
+        """
+        self.demand_path = demand_path
+        self.base_config = base_config if base_config is not None else SimulationConfig()
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        if demand_path.endswith(DemandTable.FILE_EXTENSION):
+            # Workers map the file themselves; the page cache shares it between them
+            DemandTable.read_header(demand_path)
+            self._table = None
+            self._simulation_parameters = None
+        else:
+            simulator = HotelDemandSimulator(supply_backend="memory")
+            simulator.load_run(demand_path)
+            self._table = simulator.get_demand_table().by_shopping_day()
+            self._simulation_parameters = simulator.simulation_parameters
+
+    def run(self, combinations: List[Dict[str, Any]], rank_by: str = "total_revenue",
+            progress: Optional[Callable[..., None]] = None) -> List[Dict]:
+        """
+        Run every combination and rank the results
+
+        Args:
+            combinations: Override dictionaries, e.g. from grid() or random_sample()
+            rank_by: Metric to rank by, highest first - one of RANK_METRICS
+            progress: Called with completed and total combinations as each one finishes
+
+        Returns:
+            One row per combination, best first, with its rank, overrides and statistics
+        """
+        check_combinations(self.base_config, combinations, rank_by)
+
+        logger.info(f"Parameter sweep: {len(combinations)} combinations against {self.demand_path}, "
+                    f"{self.max_workers} workers")
+
+        total = len(combinations)
+        if progress is not None:
+            progress(completed=0, total=total)
+
+        initargs = (self.demand_path, self._table, self._simulation_parameters)
+        results = [None] * total
+        if self.max_workers == 1 or total <= 1:
+            _init_worker(*initargs)
+            for i, overrides in enumerate(combinations):
+                results[i] = _run_combination(self.base_config, overrides)
+                if progress is not None:
+                    progress(completed=i + 1, total=total)
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, total),
+                                     initializer=_init_worker, initargs=initargs) as executor:
+                futures = {executor.submit(_run_combination, self.base_config, overrides): i
+                           for i, overrides in enumerate(combinations)}
+                for completed, future in enumerate(as_completed(futures), start=1):
+                    results[futures[future]] = future.result()
+                    if progress is not None:
+                        progress(completed=completed, total=total)
+
+        rows = [{"overrides": overrides, **stats} for overrides, stats in zip(combinations, results)]
+        rows.sort(key=lambda row: row[rank_by], reverse=True)
+        for rank, row in enumerate(rows, start=1):
+            row["rank"] = rank
+
+        if rows:
+            logger.info(f"Parameter sweep complete: best {rank_by} {rows[0][rank_by]:.2f} "
+                        f"with {rows[0]['overrides']}")
+
+        return rows
@@ -25,7 +25,7 @@ def check_dependencies():
     """Check if required Python modules are installed"""
     print("Checking dependencies...")
     
-    required_modules = ['flask', 'pymongo']
+    required_modules = ['flask', 'pymongo', 'numpy']
     missing_modules = []
     
     for module in required_modules:
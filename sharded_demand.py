@@ -0,0 +1,221 @@
+"""
+Sharded Demand Generation
+
+Generates very large demand sets in user-range shards across a process pool, merged into one columnar file.
+"""
+
+import logging
+import math
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+
+from simulator import HotelDemandSimulator
+from utils.demand_generator import generate_demand_table
+from utils.demand_table import DemandTable
+from utils.models import SimulationConfig
+from utils.run_catalogue import write_sidecar
+
+logger = logging.getLogger(__name__)
+
+# Users per shard unless more shards are needed to keep every worker busy
+SHARD_USERS = 250_000
+
+
+def _generate_shard(part_path: str, num_casual: int, num_business: int, seed: int,
+                    user_start: int, user_stop: int) -> Dict:
+    """
+    Generate one user range and write it as a columnar part file
+
+    Returns:
+        Size and day layout of the part, for planning the merge
+    """
+    table = generate_demand_table(num_casual, num_business, seed, user_start=user_start, user_stop=user_stop)
+    table.save(part_path, {})
+    table = table.by_shopping_day()
+    return {
+        "num_rows": table.num_rows,
+        "num_itineraries": table.num_itineraries,
+        "first_shopping_day": table.first_shopping_day,
+        "day_offsets": np.asarray(table.day_offsets).tolist(),
+    }
+
+
+def _merge_shard(filepath: str, part_path: str, data_start: int, columns: List[Dict], num_rows: int,
+                 day_starts: List[int], user_offset: int, itinerary_offset: int):
+    """
+    Copy a part file's rows into their place in the merged file
+
+    Args:
+        filepath: Merged file, already sized and with its header written
+        part_path: Part file written by _generate_shard
+        data_start: Byte offset of the merged file's column data
+        columns: Column layout of the merged file
+        num_rows: Rows in the merged file
+        day_starts: Merged row where this part's rows start for each of its
+            shopping days
+        user_offset: Index of the part's first user
+        itinerary_offset: Index of the part's first itinerary
+    """
+    part, _ = DemandTable.load(part_path, mmap=True)
+    if not part.num_rows:
+        return
+
+    offsets = part.day_offsets
+    shift = {"user": user_offset, "itinerary": itinerary_offset}
+
+    for column in columns:
+        name = column["name"]
+        source = getattr(part, name)
+        target = np.memmap(filepath, dtype=column["dtype"], mode="r+",
+                           offset=data_start + column["offset"], shape=(num_rows,))
+        for day, start in enumerate(day_starts):
+            lo, hi = offsets[day], offsets[day + 1]
+            target[start:start + hi - lo] = source[lo:hi] + shift.get(name, 0)
+        target.flush()
+        del target
+
+
+class ShardedDemandGenerator:
+    """Generates demand for user-range shards in worker processes and merges them into one file."""
+
+    def __init__(self, config: SimulationConfig, total_users: int, proportion_casual: float,
+                 seed: Optional[int] = None, num_shards: Optional[int] = None,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            config: Simulation configuration recorded in the file's parameters
+            total_users: Total number of users to generate
+            proportion_casual: Proportion of casual travellers (0.0 to 1.0)
+            seed: Master seed (fresh entropy if not provided); the output does
+                not depend on the number of shards or workers
+            num_shards: User ranges to split generation into (defaults to
+                SHARD_USERS users per shard, at least one per worker)
+            max_workers: Worker processes (defaults to the CPU count); 1
+                generates every shard in this process
+        """
+        if total_users <= 0:
+            raise ValueError("total_users must be positive")
+        if not 0.0 <= proportion_casual <= 1.0:
+            raise ValueError("proportion_casual must be between 0.0 and 1.0")
+
+        self.config = config
+        self.total_users = total_users
+        self.proportion_casual = proportion_casual
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.num_shards = min(total_users, num_shards or max(self.max_workers, math.ceil(total_users / SHARD_USERS)))
+
+    def generate(self, filepath: str, simulation_id: Optional[str] = None) -> Dict:
+        """
+        Generate every shard and merge them into one columnar file
+
+        Workers write their shards to part files beside filepath and copy
+        them into the merged file themselves, so no demand passes through
+        this process.
+
+        Args:
+            filepath: Destination .sim file
+            simulation_id: Optional simulation ID (generated if not provided)
+
+        Returns:
+            simulation_parameters stored in the file
+        """
+        if not filepath.endswith(DemandTable.FILE_EXTENSION):
+            raise ValueError(f"Sharded demand is written as a {DemandTable.FILE_EXTENSION} file")
+        if simulation_id is None:
+            simulation_id = f"sim_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        num_casual = int(self.total_users * self.proportion_casual)
+        num_business = self.total_users - num_casual
+        simulation_parameters = HotelDemandSimulator(supply_backend="memory", config=self.config) \
+            .build_simulation_parameters(simulation_id, self.total_users, self.proportion_casual, self.seed)
+
+        bounds = np.linspace(0, self.total_users, self.num_shards + 1).astype(np.int64).tolist()
+        parts_dir = f"{filepath}.parts"
+        os.makedirs(parts_dir, exist_ok=True)
+        part_paths = [os.path.join(parts_dir, f"part-{i:05d}{DemandTable.FILE_EXTENSION}")
+                      for i in range(self.num_shards)]
+
+        logger.info(f"Sharded generation: {self.total_users} users in {self.num_shards} shards, "
+                    f"{self.max_workers} workers")
+
+        temp_path = f"{filepath}.tmp"
+        executor = None
+        try:
+            if self.max_workers > 1 and self.num_shards > 1:
+                executor = ProcessPoolExecutor(max_workers=min(self.max_workers, self.num_shards))
+
+            def run(fn, *args):
+                return list((executor.map if executor is not None else map)(fn, *args))
+
+            n = self.num_shards
+            parts = run(_generate_shard, part_paths, [num_casual] * n, [num_business] * n,
+                        [self.seed] * n, bounds[:-1], bounds[1:])
+
+            # Lay out the merged file: each shopping day holds every shard's
+            # rows for that day, in shard order
+            num_rows = sum(p["num_rows"] for p in parts)
+            populated = [p for p in parts if p["num_rows"]]
+            first_day = min((p["first_shopping_day"] for p in populated), default=0)
+            last_day = max((p["first_shopping_day"] + len(p["day_offsets"]) - 2 for p in populated), default=0)
+            day_counts = np.zeros((len(parts), last_day - first_day + 1), dtype=np.int64)
+            for i, p in enumerate(parts):
+                if p["num_rows"]:
+                    start = p["first_shopping_day"] - first_day
+                    counts = np.diff(p["day_offsets"])
+                    day_counts[i, start:start + len(counts)] = counts
+
+            day_offsets = np.concatenate(([0], np.cumsum(day_counts.sum(axis=0))))
+            shard_day_starts = day_offsets[:-1] + np.cumsum(day_counts, axis=0) - day_counts
+
+            user_offsets = bounds[:-1]
+            itinerary_offsets = np.concatenate(([0], np.cumsum([p["num_itineraries"] for p in parts])))
+
+            columns, data_size = DemandTable.column_layout(num_rows)
+            user_ids = [f"casual-{i + 1:03d}" for i in range(num_casual)] + \
+                       [f"business-{i + 1:03d}" for i in range(num_business)]
+            header = {
+                "version": DemandTable.FORMAT_VERSION,
+                "simulation_parameters": simulation_parameters,
+                "num_rows": num_rows,
+                "first_shopping_day": first_day,
+                "day_offsets": day_offsets.tolist(),
+                "user_ids": user_ids,
+                "bookings": {},
+                "columns": columns,
+            }
+            with open(temp_path, "wb") as f:
+                data_start = DemandTable.write_header(f, header)
+                f.truncate(data_start + data_size)
+
+            day_starts = []
+            for i, p in enumerate(parts):
+                start = p["first_shopping_day"] - first_day
+                days = len(p["day_offsets"]) - 1 if p["num_rows"] else 0
+                day_starts.append(shard_day_starts[i, start:start + days].tolist())
+
+            run(_merge_shard, [temp_path] * n, part_paths, [data_start] * n, [columns] * n, [num_rows] * n,
+                day_starts, user_offsets, itinerary_offsets[:-1].tolist())
+            os.replace(temp_path, filepath)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            shutil.rmtree(parts_dir, ignore_errors=True)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        write_sidecar(filepath, simulation_parameters, {
+            "total_users": self.total_users,
+            "casual_users": num_casual,
+            "business_users": num_business,
+            "total_itineraries": int(itinerary_offsets[-1]),
+            "total_demands": num_rows,
+            "booked_itineraries": 0
+        })
+
+        logger.info(f"Sharded generation complete: {num_rows} demands written to {filepath}")
+        return simulation_parameters
@@ -5,79 +5,253 @@ Generates realistic customer demand for hotel bookings to test pricing strategie
 Now includes multi-hotel support, travel agent integration, and MongoDB-backed supply management.
 """
 
+import copy
 import json
 import random
 import logging
-from dataclasses import dataclass, asdict
-from typing import Dict, List, Optional
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 import os
+import numpy as np
 
-from utils.models import SimulationConfig, SupplierType
-from utils.supply_manager import SupplyManager
+from utils.models import SimulationConfig, SupplierType, RejectionReason, Demand, Itinerary
+from utils.supply_manager import BaseSupplyManager, SupplyManager
+from utils.memory_supply_manager import InMemorySupplyManager
 from utils.pricing_engine import PricingEngine
+from utils.instrumentation import Instrumentation
+from utils.demand_table import DemandTable
+from utils.demand_generator import generate_demand_table, user_random
+from utils.run_catalogue import summarize_table, summarize_users, write_sidecar
+from utils.json_stream import iter_run
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class Demand:
-    """Represents a single user shopping for a hotel on a specific day."""
-    shopping_date: int
-    stay_start_date: int
-    stay_end_date: int
-    max_price_per_night: float
-
-@dataclass
-class Itinerary:
-    """Represents a collection of Demand objects for one trip."""
-    user_id: str
-    trip_id: int
-    demands: List[Demand]
-    is_booked: bool = False
-    booked_price_per_night: Optional[float] = None
-    booked_supplier_id: Optional[str] = None
-    booked_supplier_type: Optional[str] = None
-    booked_hotel_id: Optional[str] = None
+class ShoppingIndex:
+    """Maps each shopping day to the unbooked itineraries that are shopping on it."""
+    
+    def __init__(self, users: Dict[str, List[Itinerary]]):
+        """
+        Build the index in one pass over all shopping days.
+        
+        Args:
+            users: user_id -> list of itineraries
+        """
+        # shopping day -> (user_id, trip_id) -> (user_id, itinerary)
+        self.buckets: Dict[int, Dict[Tuple[str, int], Tuple[str, Itinerary]]] = {}
+        
+        for user_id, itineraries in users.items():
+            for itinerary in itineraries:
+                if itinerary.is_booked:
+                    continue
+                key = (user_id, itinerary.trip_id)
+                for shopping_day in itinerary.shopping_days():
+                    bucket = self.buckets.setdefault(shopping_day, {})
+                    if key not in bucket:
+                        bucket[key] = (user_id, itinerary)
+    
+    def shoppers(self, shopping_day: int):
+        """Get the (user_id, itinerary, demand) entries live on a shopping day."""
+        # demand_on keeps the first demand for a shopping date, as the full scan did
+        return (
+            (user_id, itinerary, itinerary.demand_on(shopping_day))
+            for user_id, itinerary in self.buckets.get(shopping_day, {}).values()
+        )
+    
+    def remove(self, user_id: str, itinerary: Itinerary, after_day: int):
+        """Drop a booked itinerary from every bucket after the day it was booked."""
+        key = (user_id, itinerary.trip_id)
+        for shopping_day in itinerary.shopping_days():
+            if shopping_day > after_day:
+                bucket = self.buckets.get(shopping_day)
+                if bucket:
+                    bucket.pop(key, None)
+
+
+class TableShoppingIndex:
+    """
+    Walks a DemandTable by shopping day, tracking bookings in a per-itinerary
+    array so memory-mapped columns are never copied onto the heap as objects.
+    """
+    
+    def __init__(self, table: DemandTable):
+        """
+        Locate each shopping day's rows.
+        
+        Args:
+            table: Demand table, possibly memory-mapped
+        """
+        self.table = table
+        self.order, self.first_shopping_day, self.day_offsets = table.day_index()
+        
+        self.booked = np.zeros(table.num_itineraries, dtype=bool)
+        if table.bookings:
+            self.booked[list(table.bookings)] = True
+        
+        # (user_id, trip_id) -> itinerary index of the current day's shoppers
+        self._live: Dict[Tuple[str, int], int] = {}
+    
+    def shoppers(self, shopping_day: int) -> List[Tuple[str, Itinerary, Demand]]:
+        """Get (user_id, itinerary, demand) entries for the unbooked itineraries shopping on a day."""
+        self._live = {}
+        day = shopping_day - self.first_shopping_day
+        if day < 0 or day >= len(self.day_offsets) - 1:
+            return []
+        
+        rows = slice(int(self.day_offsets[day]), int(self.day_offsets[day + 1]))
+        if self.order is not None:
+            rows = self.order[rows]
+        
+        # Keep the first demand per itinerary, as ShoppingIndex does
+        itinerary = np.asarray(self.table.itinerary[rows])
+        _, first = np.unique(itinerary, return_index=True)
+        first = first[~self.booked[itinerary[first]]]
+        
+        table = self.table
+        columns = zip(
+            itinerary[first].tolist(),
+            np.asarray(table.user[rows])[first].tolist(),
+            np.asarray(table.trip[rows])[first].tolist(),
+            np.asarray(table.stay_start[rows])[first].tolist(),
+            np.asarray(table.stay_end[rows])[first].tolist(),
+            np.asarray(table.max_price[rows])[first].tolist()
+        )
+        
+        entries = []
+        for index, user, trip_id, stay_start, stay_end, max_price in columns:
+            user_id = table.user_ids[user]
+            demand = Demand(
+                shopping_date=shopping_day,
+                stay_start_date=stay_start,
+                stay_end_date=stay_end,
+                max_price_per_night=max_price
+            )
+            itinerary_view = Itinerary(user_id=user_id, trip_id=trip_id, demands=[demand])
+            self._live[(user_id, trip_id)] = index
+            entries.append((user_id, itinerary_view, demand))
+        return entries
+    
+    def fork(self, table: DemandTable) -> "TableShoppingIndex":
+        """Branch the index onto a shallow copy of its table, with its own booked flags."""
+        child = copy.copy(self)
+        child.table = table
+        child.booked = self.booked.copy()
+        child._live = {}
+        return child
+    
+    def remove(self, user_id: str, itinerary: Itinerary, after_day: int):
+        """Mark a booked itinerary in the table so it no longer shops."""
+        index = self._live.pop((user_id, itinerary.trip_id))
+        self.booked[index] = True
+        self.table.bookings[index] = {
+            "booked_price_per_night": itinerary.booked_price_per_night,
+            "booked_supplier_id": itinerary.booked_supplier_id,
+            "booked_supplier_type": itinerary.booked_supplier_type,
+            "booked_hotel_id": itinerary.booked_hotel_id
+        }
 
 
 class HotelDemandSimulator:
     """Main simulator class for generating and processing hotel demand with supply management."""
     
-    def __init__(self, mongodb_uri: str = "mongodb://localhost:27017/"):
+    SUPPLY_BACKENDS = ("mongodb", "memory")
+    
+    def __init__(self, mongodb_uri: str = "mongodb://localhost:27017/",
+                 supply_backend: str = "mongodb", lazy_pricing: bool = False,
+                 flush_policy: str = "immediate", config: Optional[SimulationConfig] = None,
+                 instrument: bool = False, supply_manager: Optional[BaseSupplyManager] = None):
+        """
+        Args:
+            mongodb_uri: MongoDB connection string (used by the "mongodb" backend)
+            supply_backend: Where supply state is kept - "mongodb" or "memory"
+            lazy_pricing: Derive hotel prices on demand instead of rewriting every
+                future day's stored price at the start of each simulated day
+            flush_policy: When the "mongodb" backend writes buffered changes - see
+                SupplyManager.FLUSH_POLICIES
+            config: Hotels, travel agents and allocation rules to simulate
+                (defaults to SimulationConfig())
+            instrument: Record wall time, call counts and storage round trips
+                per phase and per day, reported by run_full_simulation
+            supply_manager: Existing supply store to share, e.g. between
+                concurrent runs under different simulation IDs (overrides
+                supply_backend)
+        """
+        if supply_backend not in self.SUPPLY_BACKENDS:
+            raise ValueError(f"Unknown supply backend '{supply_backend}', "
+                             f"expected one of {self.SUPPLY_BACKENDS}")
+        
         self.simulation_parameters = {}
+        self.demand_table: Optional[DemandTable] = None  # columnar demand from vectorized generation
         self.users = {}  # user_id -> list of itineraries
         self.bookings = []  # list of all bookings made
+        self.supplier_rejections: Dict[str, Dict[str, int]] = {}  # supplier_id -> reason -> count
         
         # Simulation configuration
-        self.config = SimulationConfig()
+        self.config = config if config is not None else SimulationConfig()
         
         # Supply management
-        self.supply_manager = SupplyManager(mongodb_uri)
+        if supply_manager is not None:
+            self.supply_manager = supply_manager
+        elif supply_backend == "memory":
+            self.supply_manager = InMemorySupplyManager()
+        else:
+            self.supply_manager = SupplyManager(mongodb_uri, flush_policy=flush_policy)
         
         # Pricing engine
-        self.pricing_engine = PricingEngine(self.config)
+        self.pricing_engine = PricingEngine(self.config, lazy_pricing=lazy_pricing)
         
         # Current simulation ID
         self.simulation_id = None
-
-    def _generate_travellers(self, num_casual: int, num_business: int):
-        """Generate casual and business travellers"""
         
+        # Shopping day -> live itineraries, built after generate_demand/load_run
+        self.shopping_index: Optional[ShoppingIndex] = None
+
+        # Called with each day's counters at the end of process_daily_shopping;
+        # the counters are only assembled while there is a listener
+        self.day_listeners: List[Callable[[Dict], None]] = []
+
+        # Per-phase counters; a disabled instance is a no-op
+        self.instrumentation = Instrumentation(enabled=instrument)
+
+    @property
+    def users(self) -> Dict[str, List[Itinerary]]:
+        """User ID -> itineraries, built from the demand table on first access"""
+        if self._users is None:
+            self._users = self.demand_table.to_users()
+        return self._users
+
+    @users.setter
+    def users(self, users: Dict[str, List[Itinerary]]):
+        """Replace the demand with an object view, dropping any demand table"""
+        self._users = users
+        self.demand_table = None
+
+    def _generate_travellers(self, num_casual: int, num_business: int, seed: Optional[int] = None):
+        """
+        Generate casual and business travellers
+
+        With a seed, each user draws from its own stream keyed by the seed and
+        the user's index, otherwise from the global random module.
+        """
+        def rng(user_index: int):
+            return random if seed is None else user_random(seed, user_index)
+
         # Generate casual travellers
         for i in range(num_casual):
             user_id = f"casual-{i+1:03d}"
-            self._generate_casual_traveller(user_id)
+            self._generate_casual_traveller(user_id, rng(i))
 
         # Generate business travellers
         for i in range(num_business):
             user_id = f"business-{i+1:03d}"
-            self._generate_business_traveller(user_id)
+            self._generate_business_traveller(user_id, rng(num_casual + i))
 
         
     def generate_demand(self, total_users: int, proportion_casual: float, 
-                       simulation_id: Optional[str] = None):
+                       simulation_id: Optional[str] = None, vectorized: bool = False,
+                       seed: Optional[int] = None):
         """
         Generate a complete simulation run with all users and their itineraries.
 
@@ -85,6 +259,11 @@ class HotelDemandSimulator:
             total_users: Total number of users to simulate
             proportion_casual: Proportion of casual travellers (0.0 to 1.0)
             simulation_id: Optional simulation ID (generated if not provided)
+            vectorized: Draw all users at once into self.demand_table with NumPy;
+                self.users is then only built when first accessed
+            seed: Master seed; every user draws from its own stream derived
+                from the seed and the user's index, so the same seed gives the
+                same demand and any user can be regenerated on its own
         """
         if simulation_id is None:
             simulation_id = f"sim_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -96,11 +275,59 @@ class HotelDemandSimulator:
         logger.info(f"Starting demand generation: {total_users} users, "
                    f"{proportion_casual*100:.1f}% casual, {total_capacity} total capacity")
 
-        self.simulation_parameters = {
+        if vectorized and seed is None:
+            # The vectorized streams are always keyed, so record the key used
+            seed = np.random.SeedSequence().entropy
+
+        self.simulation_parameters = self.build_simulation_parameters(
+            simulation_id, total_users, proportion_casual, seed
+        )
+
+        # Initialize supply in the configured backend
+        self.supply_manager.initialize_simulation(simulation_id, self.config)
+
+        # Calculate number of casual and business travellers
+        num_casual = int(total_users * proportion_casual)
+        num_business = total_users - num_casual
+        logger.info(f"Generating {num_casual} casual travellers and {num_business} business travellers")
+
+        if vectorized:
+            self._users = None
+            self.demand_table = generate_demand_table(num_casual, num_business, seed)
+            self.shopping_index = None
+            total_demands = self.demand_table.num_rows
+        else:
+            self._generate_travellers(num_casual, num_business, seed)
+            self.build_shopping_index()
+
+            # Calculate total demands
+            total_demands = sum(
+                itinerary.num_demands
+                for itineraries in self.users.values()
+                for itinerary in itineraries
+            )
+        logger.info(f"Demand generation complete: {total_demands} total demands generated")
+    
+    def build_simulation_parameters(self, simulation_id: str, total_users: int,
+                                    proportion_casual: float, seed: Optional[int] = None) -> Dict:
+        """
+        Describe a demand run for saved files
+
+        Args:
+            simulation_id: Simulation ID
+            total_users: Total number of users
+            proportion_casual: Proportion of casual travellers
+            seed: Master demand seed, if any
+
+        Returns:
+            simulation_parameters dictionary for the configured hotels and agents
+        """
+        return {
             "simulation_id": simulation_id,
             "total_users": total_users,
             "proportion_casual": proportion_casual,
-            "total_hotel_capacity": total_capacity,
+            "total_hotel_capacity": self.config.get_total_hotel_capacity(),
+            "seed": seed,
             "hotels": [
                 {
                     "hotel_id": h.hotel_id,
@@ -119,43 +346,25 @@ class HotelDemandSimulator:
             ]
         }
 
-        # Initialize supply in MongoDB
-        self.supply_manager.initialize_simulation(simulation_id, self.config)
-
-        # Calculate number of casual and business travellers
-        num_casual = int(total_users * proportion_casual)
-        num_business = total_users - num_casual
-        logger.info(f"Generating {num_casual} casual travellers and {num_business} business travellers")
-
-        self._generate_travellers(num_casual, num_business)
-        
-        # Calculate total demands
-        total_demands = sum(
-            len(itinerary.demands)
-            for itineraries in self.users.values()
-            for itinerary in itineraries
-        )
-        logger.info(f"Demand generation complete: {total_demands} total demands generated")
-    
-    def _generate_casual_traveller(self, user_id: str):
+    def _generate_casual_traveller(self, user_id: str, rng=random):
         """Generate a casual traveller with 2 trips per year."""
         itineraries = []
 
         # Generate 2 trips
-        trip_dates = self._schedule_trips(num_trips=2, year_length=100)
+        trip_dates = self._schedule_trips(num_trips=2, year_length=100, rng=rng)
 
         for trip_id, start_date in enumerate(trip_dates):
             # Trip length: Normal(8, 2)
-            trip_length = max(1, int(random.gauss(8, 2)))
+            trip_length = max(1, int(rng.gauss(8, 2)))
             end_date = min(99, start_date + trip_length - 1)
 
             # Base max price: Normal(110, 20)
-            base_max_price = random.gauss(110, 20)
-            min_price = base_max_price * random.uniform(0.7, 0.9)
+            base_max_price = rng.gauss(110, 20)
+            min_price = base_max_price * rng.uniform(0.7, 0.9)
 
             # Shopping window: 50-10 days before, ends 10-5 days before
-            shop_start = start_date - random.randint(20, 50)
-            shop_end = start_date - random.randint(5, 15)
+            shop_start = start_date - rng.randint(20, 50)
+            shop_end = start_date - rng.randint(5, 15)
 
             # Clamp shopping window to start no earlier than day -20
             shop_start = max(shop_start, -20)
@@ -164,31 +373,22 @@ class HotelDemandSimulator:
             if shop_end <= shop_start:
                 shop_end = shop_start + 1
 
-            # Generate demands for each shopping day
-            demands = []
-            for shopping_day in range(shop_start, shop_end + 1):
-                # Linear interpolation for price
-                progress = (shopping_day - shop_start) / (shop_end - shop_start)
-                max_price_per_night = min_price + (base_max_price - min_price) * progress
-
-                demand = Demand(
-                    shopping_date=shopping_day,
-                    stay_start_date=start_date,
-                    stay_end_date=end_date,
-                    max_price_per_night=max_price_per_night
-                )
-                demands.append(demand)
-            
+            # Price rises linearly from min_price to base_max_price over the window
             itinerary = Itinerary(
                 user_id=user_id,
                 trip_id=trip_id,
-                demands=demands
+                stay_start_date=start_date,
+                stay_end_date=end_date,
+                shop_start=shop_start,
+                shop_end=shop_end,
+                min_price=min_price,
+                max_price=base_max_price
             )
             itineraries.append(itinerary)
         
         self.users[user_id] = itineraries
     
-    def _generate_business_traveller(self, user_id: str):
+    def _generate_business_traveller(self, user_id: str, rng=random):
         """Generate a business traveller with 5 trips per year (1 long, 4 short)."""
         itineraries = []
         
@@ -196,50 +396,46 @@ class HotelDemandSimulator:
         trip_lengths = []
 
         # long trip
-        trip_lengths.append(max(1, int(random.gauss(20, 5))))  # Long trip
+        trip_lengths.append(max(1, int(rng.gauss(20, 5))))  # Long trip
 
         # short trip
         for _ in range(4):
-            trip_lengths.append(max(1, int(random.gauss(5, 1))))  # Short trips
+            trip_lengths.append(max(1, int(rng.gauss(5, 1))))  # Short trips
         
-        trip_dates = self._schedule_trips(num_trips=5, year_length=100, trip_lengths=trip_lengths)
+        trip_dates = self._schedule_trips(num_trips=5, year_length=100, trip_lengths=trip_lengths, rng=rng)
         
         for trip_id, start_date in enumerate(trip_dates):
             trip_length = trip_lengths[trip_id]
             end_date = min(99, start_date + trip_length - 1)
             
             # Fixed max price: Normal(150, 10) - Higher willingness to pay (willing to pay a premium)
-            max_price_per_night = random.gauss(150, 10)
+            max_price_per_night = rng.gauss(150, 10)
             
             # Shopping window: 7-3 days before
-            shop_start = start_date - random.randint(3, 7)
+            shop_start = start_date - rng.randint(3, 7)
             shop_end = start_date - 1
 
             # Clamp shopping window to start no earlier than day -20
             shop_start = max(shop_start, -20)
 
-            # Generate demands for each shopping day
-            demands = []
-            for shopping_day in range(shop_start, shop_end + 1):
-                demand = Demand(
-                    shopping_date=shopping_day,
-                    stay_start_date=start_date,
-                    stay_end_date=end_date,
-                    max_price_per_night=max_price_per_night
-                )
-                demands.append(demand)
-            
+            # Same price on every shopping day
             itinerary = Itinerary(
                 user_id=user_id,
                 trip_id=trip_id,
-                demands=demands
+                stay_start_date=start_date,
+                stay_end_date=end_date,
+                shop_start=shop_start,
+                shop_end=shop_end,
+                min_price=max_price_per_night,
+                max_price=max_price_per_night
             )
             itineraries.append(itinerary)
         
         self.users[user_id] = itineraries
     
     # naive trip scheduling method currently doesn't deconflict between clashing trips (uses) a naive 25 day block out period to avoid clashes
-    def _schedule_trips(self, num_trips: int, year_length: int, trip_lengths: Optional[List[int]] = None) -> List[int]:
+    def _schedule_trips(self, num_trips: int, year_length: int, trip_lengths: Optional[List[int]] = None,
+                        rng=random) -> List[int]:
         """Schedule non-overlapping trip start dates for a user."""
         trip_dates = []
         available_days = set(range(0, year_length))
@@ -255,7 +451,7 @@ class HotelDemandSimulator:
                     break
                 
                 # Pick a random available day
-                start_date = random.choice(list(available_days))
+                start_date = rng.choice(list(available_days))
                 trip_dates.append(start_date)
                 
                 # Remove this day and some days after (rough estimate of trip length)
@@ -270,7 +466,7 @@ class HotelDemandSimulator:
                     break
                 
                 # Pick a random available day
-                start_date = random.choice(list(available_days))
+                start_date = rng.choice(list(available_days))
                 trip_dates.append(start_date)
                 
                 # Remove this day and some days after (rough estimate of trip length)
@@ -279,6 +475,14 @@ class HotelDemandSimulator:
             
             return sorted(trip_dates)
     
+    def build_shopping_index(self):
+        """Index unbooked itineraries by shopping day so each day only visits live demand."""
+        if self._users is None:
+            # Walk the demand table directly rather than building the object view
+            self.shopping_index = TableShoppingIndex(self.demand_table)
+        else:
+            self.shopping_index = ShoppingIndex(self.users)
+    
     def process_daily_shopping(self, simulation_day: int) -> List[Dict]:
         """
         Process shopping for a given day using the pricing engine and supply manager.
@@ -291,47 +495,55 @@ class HotelDemandSimulator:
         """
         if not self.simulation_id:
             raise ValueError("Simulation not initialized. Call generate_demand first.")
-        
+
+        with self.instrumentation.day(simulation_day):
+            return self._process_shoppers(simulation_day)
+
+    def _process_shoppers(self, simulation_day: int) -> List[Dict]:
+        """Reprice, then let each of the day's shoppers book its best offer"""
+        probe = self.instrumentation
+
         # Update hotel prices based on current day (dynamic pricing)
-        self.pricing_engine.update_hotel_prices(
-            self.simulation_id, simulation_day, self.supply_manager
-        )
+        with probe.phase("update_hotel_prices"):
+            self.pricing_engine.update_hotel_prices(
+                self.simulation_id, simulation_day, self.supply_manager
+            )
 
         bookings_today = []
         demands_checked = 0
         price_rejections = 0
         capacity_rejections = 0
 
-        # Find all demands for this shopping date
-        for user_id, itineraries in self.users.items():
-            for itinerary in itineraries:
-                # Skip if already booked
-                if itinerary.is_booked:
-                    continue
+        if self.shopping_index is None:
+            self.build_shopping_index()
 
-                # Find demands for this shopping date
-                matching_demands = [d for d in itinerary.demands if d.shopping_date == simulation_day]
+        # Visit only the itineraries shopping on this date
+        for user_id, itinerary, demand in self.shopping_index.shoppers(simulation_day):
+            # Skip if booked outside the index
+            if itinerary.is_booked:
+                continue
 
-                if not matching_demands:
-                    continue
-
-                demands_checked += 1
+            demands_checked += 1
 
-                # Use the first matching demand
-                demand = matching_demands[0]
-                stay_dates = list(range(demand.stay_start_date, demand.stay_end_date + 1))
+            stay_dates = list(range(demand.stay_start_date, demand.stay_end_date + 1))
 
-                # Find best offer
-                best_offer = self.pricing_engine.get_best_offer(
+            # Find best offer, and why every other supplier had none
+            with probe.phase("evaluate_offers"):
+                search = self.pricing_engine.evaluate_offers(
                     self.simulation_id,
                     simulation_day,
                     stay_dates,
                     demand.max_price_per_night,
                     self.supply_manager
                 )
-
-                if best_offer:
-                    # Make booking
+            best_offer = search.best_offer
+            for supplier_id, _, reason in search.rejections:
+                counts = self.supplier_rejections.setdefault(supplier_id, {})
+                counts[reason.value] = counts.get(reason.value, 0) + 1
+
+            if best_offer:
+                # Make booking
+                with probe.phase("book_room"):
                     booking = self.supply_manager.book_room(
                         simulation_id=self.simulation_id,
                         supplier_id=best_offer['supplier_id'],
@@ -341,90 +553,184 @@ class HotelDemandSimulator:
                         stay_dates=stay_dates,
                         user_id=user_id,
                         trip_id=itinerary.trip_id,
-                        config=self.config
+                        config=self.config,
+                        quoted_total_price=(best_offer['total_price']
+                                            if self.pricing_engine.lazy_pricing else None)
                     )
 
-                    if booking:
-                        # Mark itinerary as booked
-                        itinerary.is_booked = True
-                        itinerary.booked_price_per_night = booking.price_per_night
-                        itinerary.booked_supplier_id = booking.supplier_id
-                        itinerary.booked_supplier_type = booking.supplier_type.value
-                        itinerary.booked_hotel_id = booking.hotel_id
-
-                        # Record booking
-                        booking_info = {
-                            "user_id": user_id,
-                            "supplier_id": booking.supplier_id,
-                            "supplier_type": booking.supplier_type.value,
-                            "hotel_id": booking.hotel_id,
-                            "booked_price_per_night": booking.price_per_night,
-                            "stay_dates": {
-                                "start_date": demand.stay_start_date,
-                                "end_date": demand.stay_end_date
-                            }
+                if booking:
+                    # Mark itinerary as booked
+                    itinerary.is_booked = True
+                    itinerary.booked_price_per_night = booking.price_per_night
+                    itinerary.booked_supplier_id = booking.supplier_id
+                    itinerary.booked_supplier_type = booking.supplier_type.value
+                    itinerary.booked_hotel_id = booking.hotel_id
+                    self.shopping_index.remove(user_id, itinerary, simulation_day)
+
+                    # Record booking
+                    booking_info = {
+                        "user_id": user_id,
+                        "supplier_id": booking.supplier_id,
+                        "supplier_type": booking.supplier_type.value,
+                        "hotel_id": booking.hotel_id,
+                        "booked_price_per_night": booking.price_per_night,
+                        "stay_dates": {
+                            "start_date": demand.stay_start_date,
+                            "end_date": demand.stay_end_date
                         }
-                        bookings_today.append(booking_info)
-                        self.bookings.append(booking_info)
-
-                        logger.info(f"Booking confirmed: {user_id} booked {booking.hotel_id} "
-                                  f"via {booking.supplier_id} at ${booking.price_per_night:.2f}/night "
-                                  f"for days {demand.stay_start_date}-{demand.stay_end_date}")
-                    else:
-                        capacity_rejections += 1
+                    }
+                    bookings_today.append(booking_info)
+                    self.bookings.append(booking_info)
+
+                    logger.info(f"Booking confirmed: {user_id} booked {booking.hotel_id} "
+                              f"via {booking.supplier_id} at ${booking.price_per_night:.2f}/night "
+                              f"for days {demand.stay_start_date}-{demand.stay_end_date}")
+                else:
+                    capacity_rejections += 1
+            else:
+                # Price too high if any supplier had rooms for the whole stay
+                if search.rejection_reason is RejectionReason.OVER_BUDGET:
+                    price_rejections += 1
+                    logger.debug(f"{user_id}: Price too high (max ${demand.max_price_per_night:.2f})")
                 else:
-                    # Either no capacity or price too high
-                    # Check if any supplier has capacity
-                    has_capacity = False
-                    for hotel in self.config.hotels:
-                        for stay_day in stay_dates:
-                            daily_supply = self.supply_manager.get_daily_supply(
-                                self.simulation_id, hotel.hotel_id, stay_day
-                            )
-                            if daily_supply and daily_supply.hotel_rooms_remaining > 0:
-                                has_capacity = True
-                                break
-                        if has_capacity:
-                            break
-                    
-                    if has_capacity:
-                        price_rejections += 1
-                        logger.debug(f"{user_id}: Price too high (max ${demand.max_price_per_night:.2f})")
-                    else:
-                        capacity_rejections += 1
-                        logger.debug(f"{user_id}: No capacity available")
+                    capacity_rejections += 1
+                    logger.debug(f"{user_id}: No capacity available")
+
+        with probe.phase("checkpoint"):
+            self.supply_manager.checkpoint("day")
 
         logger.info(f"Day {simulation_day}: {demands_checked} demands checked, "
                    f"{len(bookings_today)} bookings made, {price_rejections} price rejections, "
                    f"{capacity_rejections} capacity rejections")
 
+        if self.day_listeners:
+            counters = {
+                "day": simulation_day,
+                "demands_checked": demands_checked,
+                "bookings": len(bookings_today),
+                "total_bookings": len(self.bookings),
+                "price_rejections": price_rejections,
+                "capacity_rejections": capacity_rejections
+            }
+            for listener in self.day_listeners:
+                listener(counters)
+
         return bookings_today
     
-    def run_full_simulation(self):
-        """Run the complete simulation from day -20 to day 99"""
+    def run_full_simulation(self, start_day: Optional[int] = None):
+        """
+        Run the complete simulation from day -20 to day 99
+
+        Args:
+            start_day: Day to start from instead of day -20, e.g. to continue a fork
+
+        Returns:
+            Simulation statistics, including "supplier_rejections" (supplier ID ->
+            rejection reason -> count of shoppers it could not offer a stay) and
+            the run's "instrumentation" report if the simulator was created with
+            instrument=True
+        """
         if not self.simulation_id:
             raise ValueError("Simulation not initialized. Call generate_demand first.")
         
+        if start_day is None:
+            start_day = self.config.simulation_start_day
+        
         logger.info(f"Starting full simulation run for {self.simulation_id}")
         
-        for simulation_day in range(-20, 100):
+        probe = self.instrumentation
+        probe.reset()
+        
+        for simulation_day in range(start_day, self.config.simulation_end_day + 1):
             self.process_daily_shopping(simulation_day)
         
+        with probe.phase("checkpoint"):
+            self.supply_manager.checkpoint("run")
+        
         # Get final statistics
-        stats = self.supply_manager.get_simulation_statistics(
-            self.simulation_id, self.config
-        )
+        with probe.phase("get_simulation_statistics"):
+            stats = self.supply_manager.get_simulation_statistics(
+                self.simulation_id, self.config
+            )
         
         logger.info(f"Simulation complete: {stats['total_bookings']} bookings, "
                    f"${stats['total_revenue']:.2f} revenue, "
                    f"{stats['occupancy_rate']:.1f}% occupancy")
         
+        stats["supplier_rejections"] = self._supplier_rejection_stats()
+        
+        if probe.enabled:
+            stats["instrumentation"] = probe.report()
+        
         return stats
     
+    def fork(self, simulation_id: Optional[str] = None,
+             config: Optional[SimulationConfig] = None) -> "HotelDemandSimulator":
+        """
+        Branch the simulation so a what-if variant can continue from the current day.
+
+        The fork shares supply state with this simulator copy-on-write (in the
+        memory backend) and gets its own copy of the booked-itinerary flags, so
+        either side can carry on without affecting the other.
+
+        Args:
+            simulation_id: ID of the branch (generated if not provided)
+            config: Configuration to continue with, e.g. different prices or
+                margins; supply already allocated to travel agents is kept
+
+        Returns:
+            New HotelDemandSimulator sharing this one's supply manager
+        """
+        if not self.simulation_id:
+            raise ValueError("Simulation not initialized. Call generate_demand first.")
+
+        if simulation_id is None:
+            simulation_id = f"{self.simulation_id}_fork_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+
+        self.supply_manager.flush()
+        self.supply_manager.fork_simulation(self.simulation_id, simulation_id)
+
+        child = copy.copy(self)
+        child.simulation_id = simulation_id
+        child.simulation_parameters = {**self.simulation_parameters, "simulation_id": simulation_id}
+        child.bookings = list(self.bookings)
+        child.supplier_rejections = {supplier_id: dict(counts)
+                                     for supplier_id, counts in self.supplier_rejections.items()}
+        child.day_listeners = []
+        child.instrumentation = Instrumentation(enabled=self.instrumentation.enabled)
+
+        if config is not None:
+            child.config = config
+            child.pricing_engine = PricingEngine(config, lazy_pricing=self.pricing_engine.lazy_pricing)
+
+        if self._users is None:
+            # Columnar demand: share the columns, copy only the booking state
+            child.demand_table = self.demand_table.shallow_copy()
+            child.shopping_index = (self.shopping_index.fork(child.demand_table)
+                                    if self.shopping_index is not None else None)
+        else:
+            child._users = {
+                user_id: [copy.copy(itinerary) for itinerary in itineraries]
+                for user_id, itineraries in self._users.items()
+            }
+            child.shopping_index = None
+
+        logger.info(f"Forked simulation {self.simulation_id} into {simulation_id}")
+        return child
+
     def save_run(self, filepath: str):
-        """Save the generated demand to a JSON file."""
+        """
+        Save the generated demand to a JSON file, or to the columnar format
+        if filepath ends in DemandTable.FILE_EXTENSION. Compact itineraries
+        are saved as their shopping window rather than one entry per day.
+        A summary sidecar is written beside the file for the run catalogue.
+        """
         logger.info(f"Saving simulation to {filepath}")
 
+        if filepath.endswith(DemandTable.FILE_EXTENSION):
+            self._save_columnar_run(filepath)
+            return
+
         data = {
             "simulation_parameters": self.simulation_parameters,
             "users": {}
@@ -433,16 +739,25 @@ class HotelDemandSimulator:
         for user_id, itineraries in self.users.items():
             user_data = []
             for itinerary in itineraries:
-                demands_data = [asdict(d) for d in itinerary.demands]
-                itinerary_data = {
-                    "trip_id": itinerary.trip_id,
-                    "demands": demands_data,
+                itinerary_data = {"trip_id": itinerary.trip_id}
+                if itinerary.is_compact:
+                    itinerary_data["window"] = {
+                        "stay_start_date": itinerary.stay_start_date,
+                        "stay_end_date": itinerary.stay_end_date,
+                        "shop_start": itinerary.shop_start,
+                        "shop_end": itinerary.shop_end,
+                        "min_price": itinerary.min_price,
+                        "max_price": itinerary.max_price
+                    }
+                else:
+                    itinerary_data["demands"] = [asdict(d) for d in itinerary.demands]
+                itinerary_data.update({
                     "is_booked": itinerary.is_booked,
                     "booked_price_per_night": itinerary.booked_price_per_night,
                     "booked_supplier_id": itinerary.booked_supplier_id,
                     "booked_supplier_type": itinerary.booked_supplier_type,
                     "booked_hotel_id": itinerary.booked_hotel_id
-                }
+                })
                 user_data.append(itinerary_data)
             data["users"][user_id] = user_data
 
@@ -454,46 +769,133 @@ class HotelDemandSimulator:
         logger.info(f"Simulation saved successfully: {file_size} bytes")
         logger.debug(f"File path: {os.path.abspath(filepath)}")
 
-    def load_run(self, filepath: str):
-        """Load a previously saved demand run from JSON."""
+        write_sidecar(filepath, self.simulation_parameters, summarize_users(self.users))
+
+    def get_demand_table(self) -> DemandTable:
+        """Get the demand and booking state in columnar form, building it from self.users if needed."""
+        # Booking state lives on the itineraries once the object view exists
+        return self.demand_table if self._users is None else DemandTable.from_users(self.users)
+
+    def set_demand_table(self, table: DemandTable, simulation_parameters: Dict):
+        """
+        Use a columnar demand table as this simulator's demand.
+
+        Args:
+            table: Demand table; booking state is recorded on it as the simulation runs
+            simulation_parameters: Parameters the table was generated with
+        """
+        self.simulation_parameters = simulation_parameters
+        self.simulation_id = simulation_parameters.get("simulation_id")
+        self._users = None
+        self.demand_table = table
+        self.shopping_index = None
+
+    def _save_columnar_run(self, filepath: str):
+        """Save the demand and booking state in the columnar format."""
+        table = self.get_demand_table()
+
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        table.save(filepath, self.simulation_parameters)
+
+        file_size = os.path.getsize(filepath)
+        logger.info(f"Simulation saved successfully: {table.num_rows} demands, {file_size} bytes")
+        logger.debug(f"File path: {os.path.abspath(filepath)}")
+
+        write_sidecar(filepath, self.simulation_parameters, summarize_table(table))
+
+    def load_run(self, filepath: str, mmap: bool = False):
+        """
+        Load a previously saved demand run from JSON, or from the columnar
+        format if filepath ends in DemandTable.FILE_EXTENSION.
+
+        Args:
+            filepath: Path of the saved run
+            mmap: Memory-map the columns of a columnar run instead of reading
+                them; process_daily_shopping then walks them by shopping day.
+                Accessing self.users still builds the full object view.
+        """
         logger.info(f"Loading simulation from {filepath}")
 
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        if filepath.endswith(DemandTable.FILE_EXTENSION):
+            self._load_columnar_run(filepath, mmap)
+            return
+
+        if mmap:
+            raise ValueError(f"Memory-mapped loading needs a {DemandTable.FILE_EXTENSION} file, got {filepath}")
+
+        # Stream the file one user at a time so only that user's dicts are
+        # ever held alongside the itineraries built so far
+        users = {}
+        simulation_parameters = None
 
-        self.simulation_parameters = data["simulation_parameters"]
+        for kind, key, value in iter_run(filepath):
+            if kind == "user":
+                users[key] = [self._itinerary_from_dict(key, itinerary_data) for itinerary_data in value]
+            elif key == "simulation_parameters":
+                simulation_parameters = value
+
+        if simulation_parameters is None:
+            raise ValueError(f"{filepath} has no simulation_parameters")
+
+        self.simulation_parameters = simulation_parameters
         self.simulation_id = self.simulation_parameters.get("simulation_id")
         
         logger.debug(f"Loaded parameters: {self.simulation_parameters}")
 
-        self.users = {}
-
-        for user_id, user_data in data["users"].items():
-            itineraries = []
-            for itinerary_data in user_data:
-                demands = [
-                    Demand(**d) for d in itinerary_data["demands"]
-                ]
-                itinerary = Itinerary(
-                    user_id=user_id,
-                    trip_id=itinerary_data["trip_id"],
-                    demands=demands,
-                    is_booked=itinerary_data.get("is_booked", False),
-                    booked_price_per_night=itinerary_data.get("booked_price_per_night"),
-                    booked_supplier_id=itinerary_data.get("booked_supplier_id"),
-                    booked_supplier_type=itinerary_data.get("booked_supplier_type"),
-                    booked_hotel_id=itinerary_data.get("booked_hotel_id")
-                )
-                itineraries.append(itinerary)
-            self.users[user_id] = itineraries
+        self.users = users
 
+        self.build_shopping_index()
+        
         logger.info(f"Simulation loaded successfully: {len(self.users)} users")
+
+    @staticmethod
+    def _itinerary_from_dict(user_id: str, itinerary_data: Dict) -> Itinerary:
+        """Build an itinerary from its saved JSON form."""
+        # Compact runs store the shopping window, older runs every demand
+        if "window" in itinerary_data:
+            demands = None
+            window = itinerary_data["window"]
+        else:
+            demands = [Demand(**d) for d in itinerary_data["demands"]]
+            window = {}
+        return Itinerary(
+            user_id=user_id,
+            trip_id=itinerary_data["trip_id"],
+            demands=demands,
+            **window,
+            is_booked=itinerary_data.get("is_booked", False),
+            booked_price_per_night=itinerary_data.get("booked_price_per_night"),
+            booked_supplier_id=itinerary_data.get("booked_supplier_id"),
+            booked_supplier_type=itinerary_data.get("booked_supplier_type"),
+            booked_hotel_id=itinerary_data.get("booked_hotel_id")
+        )
+
+    def _load_columnar_run(self, filepath: str, mmap: bool = False):
+        """Load a columnar run; the object view is built when first needed."""
+        table, simulation_parameters = DemandTable.load(filepath, mmap=mmap)
+        self.set_demand_table(table, simulation_parameters)
+
+        logger.debug(f"Loaded parameters: {self.simulation_parameters}")
+
+        logger.info(f"Simulation loaded successfully: {len(table.user_ids)} users, {table.num_rows} demands")
     
     def get_statistics(self) -> Dict:
         """Get statistics for the current simulation"""
         if not self.simulation_id:
             raise ValueError("Simulation not initialized")
         
-        return self.supply_manager.get_simulation_statistics(
+        stats = self.supply_manager.get_simulation_statistics(
             self.simulation_id, self.config
-        )
\ No newline at end of file
+        )
+        stats["supplier_rejections"] = self._supplier_rejection_stats()
+        return stats
+
+    def _supplier_rejection_stats(self) -> Dict[str, Dict[str, int]]:
+        """Rejection counts of every configured supplier, by RejectionReason value"""
+        supplier_ids = ([hotel.hotel_id for hotel in self.config.hotels]
+                        + [agent.agent_id for agent in self.config.travel_agents])
+        return {
+            supplier_id: {reason.value: self.supplier_rejections.get(supplier_id, {}).get(reason.value, 0)
+                          for reason in RejectionReason}
+            for supplier_id in supplier_ids
+        }
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Supplier Run
+
+Runs one supplier configuration against a saved demand file under its own simulation ID.
+"""
+
+import logging
+import uuid
+from typing import Callable, Dict, Optional
+
+from simulator import HotelDemandSimulator
+from utils.models import SimulationConfig
+from utils.supply_manager import BaseSupplyManager
+
+logger = logging.getLogger(__name__)
+
+
+def run_supplier_config(filepath: str, config: SimulationConfig,
+                        progress: Optional[Callable[..., None]] = None,
+                        instrument: bool = False,
+                        supply_manager: Optional[BaseSupplyManager] = None) -> Dict:
+    """
+    Run a supplier configuration against a demand file
+
+    Every saved run carries the simulation ID it was generated under, so
+    concurrent runs of one file on a shared store would otherwise reset and
+    book into the same supply. Each run gets the file's ID plus a unique
+    suffix instead, and its supply and bookings are removed when it ends.
+
+    Args:
+        filepath: Saved demand file
+        config: Configuration to apply
+        progress: Called with the day range and then each day's counters
+        instrument: Collect the per-phase instrumentation report
+        supply_manager: Supply store to run in (a new MongoDB SupplyManager
+            if not provided)
+
+    Returns:
+        Simulation statistics
+    """
+    sim = HotelDemandSimulator(config=config, instrument=instrument, supply_manager=supply_manager)
+    sim.load_run(filepath)
+
+    sim.simulation_id = f"{sim.simulation_id}_{uuid.uuid4().hex[:12]}"
+    sim.simulation_parameters = {**sim.simulation_parameters, "simulation_id": sim.simulation_id}
+
+    if progress is not None:
+        progress(start_day=sim.config.simulation_start_day, end_day=sim.config.simulation_end_day)
+        # Report each day's counters as progress
+        sim.day_listeners.append(lambda counters: progress(**counters))
+
+    try:
+        sim.supply_manager.initialize_simulation(sim.simulation_id, sim.config)
+        stats = sim.run_full_simulation()
+    finally:
+        sim.supply_manager.cleanup_simulation(sim.simulation_id)
+
+    logger.info(f"Supplier run {sim.simulation_id} complete - {stats['total_bookings']} bookings, "
+                f"${stats['total_revenue']:.2f} revenue")
+    return stats
@@ -0,0 +1,46 @@
+"""
+Unit tests for the benchmark harness.
+"""
+
+import tempfile
+import shutil
+import unittest
+from benchmarks.bench_simulation import PHASES, compare_results, run_scenario
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Test timing a scenario and comparing against a baseline."""
+
+    def test_run_scenario(self):
+        """Test that every phase is timed and each day is recorded."""
+        work_dir = tempfile.mkdtemp()
+        try:
+            timings = run_scenario("small", work_dir)
+        finally:
+            shutil.rmtree(work_dir)
+
+        for phase in PHASES:
+            self.assertGreaterEqual(timings[phase], 0)
+        self.assertEqual(len(timings["process_daily_shopping_per_day"]), 120)
+        self.assertGreater(timings["total_bookings"], 0)
+
+    def test_compare_flags_regressions(self):
+        """Test that only slowdowns beyond the threshold and noise floor are flagged."""
+        def results(generate, shopping, stats):
+            timings = {"generate_demand": generate, "process_daily_shopping": shopping,
+                       "get_simulation_statistics": stats}
+            return {"scenarios": {"small": {"timings": timings}}}
+
+        rows = compare_results(results(1.3, 2.0, 0.004), results(1.0, 2.1, 0.001), threshold=0.2)
+        flagged = {row["phase"]: row["regression"] for row in rows}
+
+        self.assertEqual(flagged, {
+            "generate_demand": True,
+            "process_daily_shopping": False,
+            "get_simulation_statistics": False
+        })
+        self.assertEqual(compare_results(results(1, 1, 1), {"scenarios": {}}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
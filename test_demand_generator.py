@@ -0,0 +1,224 @@
+"""
+Unit tests for vectorized demand generation and the columnar demand table.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from simulator import HotelDemandSimulator
+from utils.demand_generator import generate_demand_table
+from utils.demand_table import DemandTable
+
+
+class TestVectorizedDemandGeneration(unittest.TestCase):
+    """Test the NumPy demand generator."""
+
+    def setUp(self):
+        """Generate a small demand table."""
+        self.table = generate_demand_table(200, 100, seed=3)
+        self.users = self.table.to_users()
+
+    def test_trip_counts(self):
+        """Test that casual users get 2 trips and business users 5."""
+        self.assertEqual(len(self.users), 300)
+        for user_id, itineraries in self.users.items():
+            expected = 2 if user_id.startswith("casual") else 5
+            self.assertEqual([it.trip_id for it in itineraries], list(range(expected)))
+
+    def test_trip_start_dates(self):
+        """Test that each user's trips start on distinct days in trip order."""
+        for itineraries in self.users.values():
+            starts = [it.demands[0].stay_start_date for it in itineraries]
+            self.assertEqual(starts, sorted(set(starts)))
+
+    def test_shopping_windows(self):
+        """Test that every itinerary shops on consecutive days before its stay."""
+        for itineraries in self.users.values():
+            for itinerary in itineraries:
+                days = [d.shopping_date for d in itinerary.demands]
+                self.assertEqual(days, list(range(days[0], days[-1] + 1)))
+                self.assertGreaterEqual(days[0], -20)
+                self.assertLessEqual(itinerary.demands[0].stay_end_date, 99)
+
+    def test_casual_price_interpolation(self):
+        """Test that casual prices rise linearly to the base price over the window."""
+        for user_id, itineraries in self.users.items():
+            if not user_id.startswith("casual"):
+                continue
+            for itinerary in itineraries:
+                prices = [d.max_price_per_night for d in itinerary.demands]
+                steps = np.diff(prices)
+                self.assertTrue(np.allclose(steps, steps[0]))
+                self.assertGreater(prices[-1], prices[0])
+
+    def test_to_users_is_compact(self):
+        """Test that generated itineraries come back compact and round-trip exactly."""
+        itineraries = [it for its in self.users.values() for it in its]
+        self.assertTrue(all(it.is_compact for it in itineraries))
+
+        table = DemandTable.from_users(self.users)
+        original = np.lexsort((self.table.shopping_date, self.table.itinerary))
+        rebuilt = np.lexsort((table.shopping_date, table.itinerary))
+        for name in DemandTable.COLUMNS:
+            np.testing.assert_array_equal(getattr(table, name)[rebuilt], getattr(self.table, name)[original])
+
+    def test_to_users_keeps_irregular_rows(self):
+        """Test that rows no shopping window reproduces stay explicit demands."""
+        table = generate_demand_table(1, 1, seed=3)
+        table.max_price = table.max_price.copy()
+        table.max_price[1] += 1.0
+        table.shopping_date = table.shopping_date.copy()
+        table.shopping_date[table.itinerary == 2] *= 2
+
+        users = table.to_users()
+        itineraries = [it for its in users.values() for it in its]
+        self.assertEqual([it.is_compact for it in itineraries[:3]], [False, True, False])
+        np.testing.assert_array_equal(DemandTable.from_users(users).max_price, table.max_price)
+
+    def test_vectorized_simulation(self):
+        """Test that a simulation runs from the demand table."""
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.generate_demand(total_users=30, proportion_casual=0.5,
+                                  simulation_id="sim_vectorized", vectorized=True)
+
+        self.assertIsNotNone(simulator.demand_table)
+        self.assertEqual(len(simulator.users), 30)
+
+        stats = simulator.run_full_simulation()
+        self.assertEqual(stats['total_bookings'], len(simulator.bookings))
+
+
+class TestSeededDemandStreams(unittest.TestCase):
+    """Test that every user's demand depends only on the seed and the user."""
+
+    @staticmethod
+    def _user_demand(table):
+        """Map each user ID to its (trip, shopping day, stay, price) rows."""
+        users = table.to_users()
+        return {
+            user_id: [(it.trip_id, d.shopping_date, d.stay_start_date, d.stay_end_date, d.max_price_per_night)
+                      for it in itineraries for d in it.demands]
+            for user_id, itineraries in users.items()
+        }
+
+    def test_same_seed_same_demand(self):
+        """Test that a seed reproduces its demand and another seed does not."""
+        first = self._user_demand(generate_demand_table(50, 20, seed=9))
+        self.assertEqual(first, self._user_demand(generate_demand_table(50, 20, seed=9)))
+        self.assertNotEqual(first, self._user_demand(generate_demand_table(50, 20, seed=10)))
+
+    def test_user_ranges_match_full_table(self):
+        """Test that generating users in ranges gives the full table's users."""
+        full = self._user_demand(generate_demand_table(50, 20, seed=4))
+        parts = {}
+        for start in range(0, 70, 16):
+            parts.update(self._user_demand(generate_demand_table(50, 20, seed=4, user_start=start,
+                                                                 user_stop=start + 16)))
+        self.assertEqual(parts, full)
+
+    def test_single_user_regenerated_alone(self):
+        """Test that one user's demand can be regenerated on its own."""
+        full = self._user_demand(generate_demand_table(50, 20, seed=4))
+        alone = self._user_demand(generate_demand_table(50, 20, seed=4, user_start=57, user_stop=58))
+        self.assertEqual(list(alone), ["business-008"])
+        self.assertEqual(alone["business-008"], full["business-008"])
+
+    def test_per_user_streams_in_simulator(self):
+        """Test that seeded object-path users do not depend on the population size."""
+        small = HotelDemandSimulator(supply_backend="memory")
+        small.generate_demand(total_users=10, proportion_casual=1.0, simulation_id="sim_small", seed=21)
+        large = HotelDemandSimulator(supply_backend="memory")
+        large.generate_demand(total_users=40, proportion_casual=1.0, simulation_id="sim_large", seed=21)
+
+        for user_id, itineraries in small.users.items():
+            self.assertEqual(itineraries, large.users[user_id])
+        self.assertEqual(small.simulation_parameters["seed"], 21)
+
+
+class TestColumnarRunFormat(unittest.TestCase):
+    """Test saving and loading runs in the columnar format."""
+
+    def setUp(self):
+        """Create a temporary directory for saved runs."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip_matches_json(self):
+        """Test that a booked run loads the same from JSON and columnar files."""
+        random.seed(5)
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.generate_demand(total_users=40, proportion_casual=0.5, simulation_id="sim_columnar")
+        simulator.run_full_simulation()
+
+        json_path = os.path.join(self.temp_dir, "run.json")
+        columnar_path = os.path.join(self.temp_dir, "run.sim")
+        simulator.save_run(json_path)
+        simulator.save_run(columnar_path)
+        self.assertLess(os.path.getsize(columnar_path), os.path.getsize(json_path))
+
+        from_json = HotelDemandSimulator(supply_backend="memory")
+        from_json.load_run(json_path)
+        from_columnar = HotelDemandSimulator(supply_backend="memory")
+        from_columnar.load_run(columnar_path)
+
+        self.assertEqual(from_columnar.simulation_id, "sim_columnar")
+        self.assertEqual(from_columnar.simulation_parameters, from_json.simulation_parameters)
+        self.assertEqual(from_columnar.users, from_json.users)
+        self.assertTrue(any(it.is_booked for its in from_columnar.users.values() for it in its))
+
+    def test_rows_ordered_by_shopping_day(self):
+        """Test that the file's day offsets index its rows by shopping day."""
+        path = os.path.join(self.temp_dir, "table.sim")
+        generate_demand_table(30, 10, seed=1).save(path, {})
+
+        header, _ = DemandTable.read_header(path)
+        table, _ = DemandTable.load(path)
+        offsets = header["day_offsets"]
+        for i, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+            self.assertTrue(np.all(table.shopping_date[start:end] == header["first_shopping_day"] + i))
+
+    def test_memory_mapped_replay(self):
+        """Test that a memory-mapped run books what the object view books."""
+        path = os.path.join(self.temp_dir, "replay.sim")
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.generate_demand(total_users=100, proportion_casual=0.8,
+                                  simulation_id="sim_mmap", vectorized=True)
+        simulator.save_run(path)
+
+        results = []
+        for mmap in (False, True):
+            replay = HotelDemandSimulator(supply_backend="memory")
+            replay.load_run(path, mmap=mmap)
+            replay.supply_manager.initialize_simulation(replay.simulation_id, replay.config)
+            if not mmap:
+                replay.build_shopping_index()
+            results.append((replay.run_full_simulation(), replay.bookings))
+
+        self.assertIsInstance(replay.demand_table.max_price, np.memmap)
+        self.assertEqual(results[0], results[1])
+        self.assertGreater(results[1][0]['total_bookings'], 0)
+
+        # Booking state recorded against the mapped table survives a save
+        replay.save_run(path)
+        reloaded = HotelDemandSimulator(supply_backend="memory")
+        reloaded.load_run(path)
+        booked = sum(it.is_booked for its in reloaded.users.values() for it in its)
+        self.assertEqual(booked, results[1][0]['total_bookings'])
+
+    def test_rejects_other_files(self):
+        """Test that a JSON file is not read as a columnar file."""
+        path = os.path.join(self.temp_dir, "bad.sim")
+        with open(path, "w") as f:
+            f.write("{}")
+        with self.assertRaises(ValueError):
+            DemandTable.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
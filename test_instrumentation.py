@@ -0,0 +1,87 @@
+"""
+Unit tests for per-phase instrumentation.
+"""
+
+import threading
+import unittest
+from simulator import HotelDemandSimulator
+from utils.instrumentation import Instrumentation, RoundTripListener, OTHER_PHASE
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test phase timing, round trip attribution and the simulator report."""
+
+    def test_phase_counters(self):
+        """Test that phases are counted per day and for the run."""
+        instrumentation = Instrumentation(enabled=True)
+        listener = RoundTripListener()
+
+        with instrumentation.day(5):
+            with instrumentation.phase("evaluate_offers"):
+                listener.started(None)
+                listener.started(None)
+            with instrumentation.phase("evaluate_offers"):
+                pass
+            listener.started(None)
+        with instrumentation.phase("get_simulation_statistics"):
+            listener.started(None)
+        listener.started(None)  # not collecting
+
+        report = instrumentation.report()
+        day = report["days"][0]
+        self.assertEqual(day["day"], 5)
+        self.assertEqual(day["round_trips"], 3)
+        self.assertEqual(day["phases"]["evaluate_offers"]["calls"], 2)
+        self.assertEqual(day["phases"]["evaluate_offers"]["round_trips"], 2)
+        self.assertEqual(day["phases"][OTHER_PHASE]["round_trips"], 1)
+        self.assertNotIn("get_simulation_statistics", day["phases"])
+        self.assertEqual(report["totals"]["round_trips"], 4)
+        self.assertEqual(report["totals"]["phases"]["get_simulation_statistics"]["calls"], 1)
+
+    def test_round_trips_follow_thread(self):
+        """Test that round trips on another thread are not attributed to this run."""
+        instrumentation = Instrumentation(enabled=True)
+        listener = RoundTripListener()
+
+        with instrumentation.phase("book_room"):
+            other = threading.Thread(target=listener.started, args=(None,))
+            other.start()
+            other.join()
+
+        self.assertEqual(instrumentation.report()["totals"]["round_trips"], 0)
+
+    def test_disabled_is_noop(self):
+        """Test that disabled instrumentation collects nothing."""
+        instrumentation = Instrumentation()
+        with instrumentation.day(0):
+            with instrumentation.phase("book_room"):
+                RoundTripListener().started(None)
+
+        self.assertEqual(instrumentation.report()["days"], [])
+        self.assertEqual(instrumentation.report()["totals"]["phases"], {})
+
+    def test_simulation_report(self):
+        """Test that an instrumented run reports every day and leaves results unchanged."""
+        results = []
+        for instrument in (False, True):
+            simulator = HotelDemandSimulator(supply_backend="memory", instrument=instrument)
+            simulator.generate_demand(total_users=50, proportion_casual=0.8,
+                                      simulation_id="sim_instrument", seed=4)
+            results.append(simulator.run_full_simulation())
+
+        plain, instrumented = results
+        report = instrumented.pop("instrumentation")
+        self.assertNotIn("instrumentation", plain)
+        self.assertEqual(plain, instrumented)
+
+        self.assertEqual([day["day"] for day in report["days"]], list(range(-20, 100)))
+        phases = report["totals"]["phases"]
+        self.assertEqual(phases["update_hotel_prices"]["calls"], 120)
+        self.assertEqual(phases["book_room"]["calls"], instrumented["total_bookings"])
+        self.assertEqual(sum(day["phases"]["evaluate_offers"]["calls"] for day in report["days"]
+                             if "evaluate_offers" in day["phases"]),
+                         phases["evaluate_offers"]["calls"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Unit tests for the background job manager.
+"""
+
+import threading
+import time
+import unittest
+from utils.job_manager import JobManager, JobStatus
+
+
+class TestJobManager(unittest.TestCase):
+    """Test queueing, progress and expiry of background jobs."""
+
+    def setUp(self):
+        """Create a manager with one worker."""
+        self.manager = JobManager(max_workers=1, max_queued=2, result_ttl=60)
+
+    def tearDown(self):
+        """Stop the worker."""
+        self.manager.shutdown()
+
+    def _wait(self, job, timeout=5):
+        """Wait for a job to finish."""
+        deadline = time.time() + timeout
+        while not job.is_finished and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(job.is_finished)
+
+    def test_result_and_progress(self):
+        """Test that a job reports progress and keeps its result."""
+        release = threading.Event()
+
+        def work(progress):
+            progress(day=-20, bookings=0)
+            release.wait(5)
+            progress(day=99, bookings=12)
+            return {"total_bookings": 12}
+
+        job = self.manager.submit(work, description="test")
+        while job.progress.get("day") != -20:
+            time.sleep(0.01)
+        self.assertEqual(self.manager.get(job.job_id).status, JobStatus.RUNNING)
+
+        release.set()
+        self._wait(job)
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        self.assertEqual(job.progress, {"day": 99, "bookings": 12})
+        self.assertEqual(job.result, {"total_bookings": 12})
+        self.assertEqual(job.to_dict()["status"], "succeeded")
+
+    def test_subscribers_receive_events(self):
+        """Test that a subscriber sees each progress update and the final status."""
+        release = threading.Event()
+
+        def work(progress):
+            release.wait(5)
+            progress(day=1, total_bookings=3)
+            progress(day=2, total_bookings=5)
+            return 5
+
+        job = self.manager.submit(work)
+        events = self.manager.subscribe(job.job_id)
+        release.set()
+
+        received = [events.get(timeout=5) for _ in range(3)]
+        self.assertEqual([event for event, _ in received], ["progress", "progress", "done"])
+        self.assertEqual(received[1][1], {"day": 2, "total_bookings": 5})
+        self.assertEqual(received[2][1]["status"], "succeeded")
+        self.assertEqual(job.subscribers, [])
+
+        # A late subscriber gets the last progress and the final status at once
+        late = self.manager.subscribe(job.job_id)
+        self.assertEqual(late.get_nowait()[0], "progress")
+        self.assertEqual(late.get_nowait()[0], "done")
+        self.assertIsNone(self.manager.subscribe("unknown"))
+
+    def test_failure_recorded(self):
+        """Test that an exception fails the job with its message."""
+        def work(progress):
+            raise ValueError("bad demand file")
+
+        job = self.manager.submit(work)
+        self._wait(job)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.error, "bad demand file")
+
+    def test_queue_is_bounded(self):
+        """Test that submissions are refused once the queue is full."""
+        release = threading.Event()
+        jobs = [self.manager.submit(lambda progress: release.wait(5)) for _ in range(2)]
+        self.assertEqual(jobs[1].status, JobStatus.QUEUED)
+
+        with self.assertRaises(ValueError):
+            self.manager.submit(lambda progress: None)
+
+        release.set()
+        for job in jobs:
+            self._wait(job)
+        self.manager.submit(lambda progress: None)
+
+    def test_finished_jobs_expire(self):
+        """Test that finished jobs are dropped after the TTL."""
+        job = self.manager.submit(lambda progress: 1)
+        self._wait(job)
+        self.assertIs(self.manager.get(job.job_id), job)
+
+        job.finished_at -= 61
+        self.assertIsNone(self.manager.get(job.job_id))
+        self.assertIsNone(self.manager.get("unknown"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Unit tests for streaming saved JSON runs.
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from simulator import HotelDemandSimulator
+from utils.json_stream import iter_run
+from utils.models import Demand, Itinerary
+
+
+class TestStreamingRunReader(unittest.TestCase):
+    """Test that runs stream one user at a time and load as before."""
+
+    def setUp(self):
+        """Save a booked run with compact and legacy itineraries."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "run.json")
+
+        random.seed(4)
+        self.simulator = HotelDemandSimulator(supply_backend="memory")
+        self.simulator.generate_demand(total_users=20, proportion_casual=0.5, simulation_id="sim_stream")
+        self.simulator.run_full_simulation()
+        self.simulator.users["legacy-001"] = [Itinerary(
+            user_id="legacy-001", trip_id=0,
+            demands=[Demand(shopping_date=d, stay_start_date=40, stay_end_date=44,
+                            max_price_per_night=1e-7 * d) for d in range(30, 36)]
+        )]
+        self.simulator.save_run(self.path)
+
+        with open(self.path) as f:
+            self.document = json.load(f)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_members_match_document(self):
+        """Test that every chunk size yields the document's users and members."""
+        for chunk_size in (1, 7, 64, 1 << 16):
+            users = {}
+            members = {}
+            for kind, key, value in iter_run(self.path, chunk_size=chunk_size):
+                (users if kind == "user" else members)[key] = value
+
+            self.assertEqual(users, self.document["users"])
+            self.assertEqual(members, {"simulation_parameters": self.document["simulation_parameters"]})
+
+    def test_load_run_matches_saved_run(self):
+        """Test that a streamed load rebuilds the saved itineraries."""
+        loaded = HotelDemandSimulator(supply_backend="memory")
+        loaded.load_run(self.path)
+
+        self.assertEqual(loaded.simulation_id, "sim_stream")
+        self.assertEqual(loaded.users, self.simulator.users)
+
+    def test_compact_document(self):
+        """Test a document without whitespace and with an empty users object."""
+        path = os.path.join(self.temp_dir, "empty.json")
+        with open(path, "w") as f:
+            f.write('{"users":{},"simulation_parameters":{"simulation_id":"x","n":12345}}')
+        items = list(iter_run(path, chunk_size=3))
+        self.assertEqual(items, [("member", "simulation_parameters", {"simulation_id": "x", "n": 12345})])
+
+    def test_truncated_file_rejected(self):
+        """Test that a truncated run raises ValueError."""
+        with open(self.path) as f:
+            text = f.read()
+        with open(self.path, "w") as f:
+            f.write(text[:len(text) // 2])
+
+        with self.assertRaises(ValueError):
+            list(iter_run(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
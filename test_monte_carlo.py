@@ -0,0 +1,49 @@
+"""
+Unit tests for the Monte Carlo runner.
+"""
+
+import unittest
+from monte_carlo import MonteCarloRunner, summarize_runs
+from utils.models import SimulationConfig
+
+
+class TestMonteCarloRunner(unittest.TestCase):
+    """Test running simulations over many seeds."""
+
+    def test_parallel_matches_serial(self):
+        """Test that the process pool returns the same runs as a serial loop."""
+        serial = MonteCarloRunner(SimulationConfig(), 30, 0.8, seeds=3, max_workers=1).run()
+        parallel = MonteCarloRunner(SimulationConfig(), 30, 0.8, seeds=3, max_workers=2).run()
+
+        self.assertEqual([run["seed"] for run in parallel["runs"]], [0, 1, 2])
+        self.assertEqual(serial["runs"], parallel["runs"])
+        self.assertEqual(serial["summary"], parallel["summary"])
+
+    def test_config_is_used(self):
+        """Test that every run simulates the given configuration."""
+        config = SimulationConfig()
+        config.hotels = config.hotels[:1]
+        result = MonteCarloRunner(config, 20, 0.5, seeds=[7], max_workers=1).run()
+        self.assertEqual(result["runs"][0]["total_room_days"], 20 * 100)
+
+    def test_summarize_runs(self):
+        """Test the aggregated distribution of each statistic."""
+        runs = [{"seed": i, "total_revenue": float(v), "total_bookings": v} for i, v in enumerate([10, 20, 30])]
+        summary = summarize_runs(runs, percentiles=(50,))
+
+        self.assertNotIn("seed", summary)
+        self.assertEqual(summary["total_revenue"]["mean"], 20.0)
+        self.assertEqual(summary["total_bookings"]["p50"], 20.0)
+        self.assertEqual(summary["total_bookings"]["min"], 10.0)
+        self.assertEqual(summary["total_bookings"]["max"], 30.0)
+
+    def test_invalid_arguments(self):
+        """Test that impossible run settings are rejected."""
+        with self.assertRaises(ValueError):
+            MonteCarloRunner(SimulationConfig(), 10, 1.5, seeds=2)
+        with self.assertRaises(ValueError):
+            MonteCarloRunner(SimulationConfig(), 10, 0.5, seeds=[])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Unit tests for the parameter sweep engine.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+from simulator import HotelDemandSimulator
+from parameter_sweep import ParameterSweep, apply_overrides, check_combinations, grid, random_sample
+from utils.job_manager import JobManager, JobStatus
+from utils.models import SimulationConfig
+
+
+class TestSweepParameters(unittest.TestCase):
+    """Test building and applying sweep combinations."""
+
+    def test_apply_overrides(self):
+        """Test that overrides change a copy of the configuration."""
+        base = SimulationConfig()
+        config = apply_overrides(base, {
+            "hotels.large_hotel.base_price": 99,
+            "hotels.large_hotel.lead_time_0_7": 2.0,
+            "travel_agents.travel_agent_1.profit_margin": 0.3,
+            "allocation_rules.travel_agent_1.boutique_hotel": 8
+        })
+
+        large = config.get_hotel_by_id("large_hotel")
+        self.assertEqual(large.base_price, 99.0)
+        self.assertEqual(large.dynamic_pricing_config["lead_time_0_7"], 2.0)
+        self.assertEqual(large.dynamic_pricing_config["lead_time_8_14"], 1.3)
+        self.assertEqual(config.get_travel_agent_by_id("travel_agent_1").profit_margin, 0.3)
+        self.assertEqual(config.allocation_rules["travel_agent_1"]["boutique_hotel"], 8)
+        self.assertEqual(base.get_hotel_by_id("large_hotel").base_price, 120.0)
+
+    def test_unknown_parameter(self):
+        """Test that a bad parameter path is rejected."""
+        for path in ("hotels.large_hotel.rooms", "hotels.no_hotel.base_price", "weather.sunny.days"):
+            with self.assertRaises(ValueError):
+                apply_overrides(SimulationConfig(), {path: 1})
+
+    def test_grid_and_sample(self):
+        """Test grid and random sample combinations."""
+        combinations = grid({"hotels.large_hotel.base_price": [100, 120], "travel_agents.travel_agent_1.profit_margin": [0.1, 0.2]})
+        self.assertEqual(len(combinations), 4)
+        self.assertIn({"hotels.large_hotel.base_price": 120, "travel_agents.travel_agent_1.profit_margin": 0.1}, combinations)
+
+        samples = random_sample({"hotels.large_hotel.base_price": {"min": 90, "max": 110}}, 5, seed=1)
+        self.assertEqual(len(samples), 5)
+        self.assertTrue(all(90 <= s["hotels.large_hotel.base_price"] <= 110 for s in samples))
+        self.assertEqual(samples, random_sample({"hotels.large_hotel.base_price": {"min": 90, "max": 110}}, 5, seed=1))
+
+
+class TestParameterSweep(unittest.TestCase):
+    """Test running a sweep against a saved demand file."""
+
+    def setUp(self):
+        """Save a small demand run."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.demand_path = os.path.join(self.temp_dir, "demand.json")
+        random.seed(11)
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.generate_demand(total_users=40, proportion_casual=0.8, simulation_id="sim_sweep")
+        simulator.save_run(self.demand_path)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_sweep_matches_single_run(self):
+        """Test that each sweep row matches running its configuration alone."""
+        combinations = grid({"hotels.large_hotel.base_price": [90, 120, 150]})
+        rows = ParameterSweep(self.demand_path, max_workers=2).run(combinations)
+
+        self.assertEqual([row["rank"] for row in rows], [1, 2, 3])
+        revenues = [row["total_revenue"] for row in rows]
+        self.assertEqual(revenues, sorted(revenues, reverse=True))
+
+        for row in rows:
+            simulator = HotelDemandSimulator(supply_backend="memory", config=apply_overrides(SimulationConfig(), row["overrides"]))
+            simulator.load_run(self.demand_path)
+            simulator.supply_manager.initialize_simulation(simulator.simulation_id, simulator.config)
+            stats = simulator.run_full_simulation()
+            self.assertEqual(stats["total_revenue"], row["total_revenue"])
+            self.assertEqual(stats["occupancy_rate"], row["occupancy_rate"])
+
+    def test_progress_per_combination(self):
+        """Test that a sweep reports each finished combination, in a pool or alone."""
+        combinations = grid({"hotels.large_hotel.base_price": [90, 120, 150]})
+        for max_workers in (1, 2):
+            updates = []
+            ParameterSweep(self.demand_path, max_workers=max_workers).run(
+                combinations, progress=lambda **fields: updates.append(fields)
+            )
+            self.assertEqual(updates, [{"completed": i, "total": 3} for i in range(4)])
+
+    def test_sweep_as_job(self):
+        """Test that a queued sweep reports its progress and keeps the ranked rows."""
+        combinations = grid({"hotels.large_hotel.base_price": [90, 150]})
+        manager = JobManager(max_workers=1)
+        try:
+            job = manager.submit(
+                lambda progress: ParameterSweep(self.demand_path, max_workers=2).run(combinations, progress=progress),
+                description="sweep"
+            )
+            deadline = time.time() + 60
+            while not job.is_finished and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            manager.shutdown()
+
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        self.assertEqual(job.progress, {"completed": 2, "total": 2})
+        self.assertEqual([row["rank"] for row in job.result], [1, 2])
+
+    def test_check_combinations(self):
+        """Test that a bad sweep is rejected before any demand is loaded."""
+        check_combinations(SimulationConfig(), grid({"hotels.large_hotel.base_price": [90, 150]}))
+        for combinations, rank_by in (([{}], "happiness"),
+                                      ([{"hotels.large_hotel.rooms": 1}], "total_revenue"),
+                                      ([{}] * 1001, "total_revenue")):
+            with self.assertRaises(ValueError):
+                check_combinations(SimulationConfig(), combinations, rank_by)
+
+    def test_unknown_rank_metric(self):
+        """Test that an unknown ranking metric is rejected."""
+        with self.assertRaises(ValueError):
+            ParameterSweep(self.demand_path, max_workers=1).run([{}], rank_by="happiness")
+
+
+if __name__ == '__main__':
+    unittest.main()
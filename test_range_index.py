@@ -0,0 +1,69 @@
+"""
+Unit tests for the segment-tree and prefix-sum range indexes.
+"""
+
+import unittest
+import numpy as np
+from utils.range_index import PrefixSumIndex, RangeMinIndex
+
+
+class TestRangeIndexes(unittest.TestCase):
+    """Test range queries against direct slices of the array."""
+
+    def setUp(self):
+        """Create random rows with an awkward, non power of two length."""
+        self.rng = np.random.default_rng(0)
+        self.values = self.rng.integers(0, 50, size=(3, 37))
+
+    def test_range_min(self):
+        """Test every range of every row."""
+        index = RangeMinIndex(self.values)
+        for row in range(3):
+            for first in range(37):
+                for last in range(first, 37):
+                    self.assertEqual(index.min(row, first, last), self.values[row, first:last + 1].min())
+
+    def test_range_add(self):
+        """Test that range updates keep every range minimum current."""
+        index = RangeMinIndex(self.values)
+        values = self.values.copy()
+        for _ in range(50):
+            row = int(self.rng.integers(3))
+            first, last = sorted(int(day) for day in self.rng.integers(0, 37, size=2))
+            if self.rng.random() < 0.5:
+                cells = slice(first, last + 1)
+            else:
+                cells = np.unique(self.rng.integers(first, last + 1, size=3))
+            values[row, cells] -= 1
+            index.add(row, cells, -1)
+
+        for row in range(3):
+            for first in range(37):
+                for last in range(first, 37):
+                    self.assertEqual(index.min(row, first, last), values[row, first:last + 1].min())
+
+    def test_interleaved_adds_and_queries(self):
+        """Test that queries between additions see every earlier addition."""
+        for num_days in (1, 2, 16, 37):
+            values = self.rng.integers(0, 50, size=(2, num_days))
+            index = RangeMinIndex(values)
+            for _ in range(200):
+                row = int(self.rng.integers(2))
+                first, last = sorted(int(day) for day in self.rng.integers(0, num_days, size=2))
+                if self.rng.random() < 0.5:
+                    delta = int(self.rng.integers(-3, 4))
+                    values[row, first:last + 1] += delta
+                    index.add(row, slice(first, last + 1), delta)
+                else:
+                    self.assertEqual(index.min(row, first, last), values[row, first:last + 1].min())
+
+    def test_prefix_sum(self):
+        """Test range sums."""
+        prices = self.rng.random((2, 37)) * 100
+        index = PrefixSumIndex(prices)
+        for first, last in [(0, 0), (0, 36), (5, 17), (36, 36)]:
+            self.assertAlmostEqual(index.sum(1, first, last), prices[1, first:last + 1].sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
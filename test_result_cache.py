@@ -0,0 +1,80 @@
+"""
+Unit tests for the supplier run result cache.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from utils.models import SimulationConfig
+from utils.result_cache import ResultCache, config_hash
+
+
+class TestResultCache(unittest.TestCase):
+    """Test keying, eviction and persistence of cached results."""
+
+    def setUp(self):
+        """Create a demand file in a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.demand_path = os.path.join(self.temp_dir, "run.json")
+        with open(self.demand_path, "w") as f:
+            f.write('{"users": {}}')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_config_hash_is_canonical(self):
+        """Test that equal configurations hash the same and changes do not."""
+        config = SimulationConfig()
+        same = SimulationConfig()
+        same.hotels[0].base_price = int(same.hotels[0].base_price)
+        same.allocation_rules = {"travel_agent_1": {"large_hotel": 20, "boutique_hotel": 5}}
+        self.assertEqual(config_hash(config), config_hash(same))
+
+        changed = SimulationConfig()
+        changed.travel_agents[0].profit_margin = 0.2
+        self.assertNotEqual(config_hash(config), config_hash(changed))
+
+    def test_key_follows_file_contents(self):
+        """Test that rewriting the demand file changes the key."""
+        cache = ResultCache()
+        key = cache.make_key(self.demand_path, SimulationConfig())
+        self.assertEqual(key, cache.make_key(self.demand_path, SimulationConfig()))
+
+        with open(self.demand_path, "w") as f:
+            f.write('{"users": {"casual-001": []}}')
+        self.assertNotEqual(key, cache.make_key(self.demand_path, SimulationConfig()))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used result is evicted."""
+        cache = ResultCache(max_entries=2)
+        cache.put("a", {"total_revenue": 1.0})
+        cache.put("b", {"total_revenue": 2.0})
+        cache.get("a")
+        cache.put("c", {"total_revenue": 3.0})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"total_revenue": 1.0})
+
+    def test_persists_on_disk(self):
+        """Test that a new cache over the same directory finds earlier results."""
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        ResultCache(cache_dir=cache_dir).put("a", {"total_bookings": 4})
+
+        reopened = ResultCache(cache_dir=cache_dir)
+        self.assertEqual(reopened.get("a"), {"total_bookings": 4})
+        self.assertIsNone(reopened.get("missing"))
+
+    def test_disk_is_capped(self):
+        """Test that the cache directory keeps at most max_entries results."""
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        cache = ResultCache(max_entries=2, cache_dir=cache_dir)
+        for key in ("a", "b", "c"):
+            cache.put(key, {"key": key})
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Unit tests for run summary sidecars and the cached run catalogue.
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from simulator import HotelDemandSimulator
+from utils.run_catalogue import RunCatalogue, read_sidecar, sidecar_path, summarize_file
+
+
+class TestRunCatalogue(unittest.TestCase):
+    """Test that listings and details come from sidecars."""
+
+    def setUp(self):
+        """Save a booked run in both formats."""
+        self.temp_dir = tempfile.mkdtemp()
+        random.seed(2)
+        self.simulator = HotelDemandSimulator(supply_backend="memory")
+        self.simulator.generate_demand(total_users=30, proportion_casual=0.6, simulation_id="sim_catalogue")
+        self.simulator.run_full_simulation()
+        for name in ("run.json", "run.sim"):
+            self.simulator.save_run(os.path.join(self.temp_dir, name))
+        self.catalogue = RunCatalogue(self.temp_dir)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_sidecar_matches_file(self):
+        """Test that the sidecar written on save summarises the file."""
+        for name in ("run.json", "run.sim"):
+            path = os.path.join(self.temp_dir, name)
+            meta = read_sidecar(path)
+            parameters, summary = summarize_file(path)
+
+            self.assertEqual(meta["stats"], summary)
+            self.assertEqual(meta["simulation_parameters"], parameters)
+            self.assertEqual(meta["stats"]["casual_users"], 18)
+            self.assertEqual(meta["stats"]["booked_itineraries"], len(self.simulator.bookings))
+
+    def test_listing_skips_sidecars(self):
+        """Test that the listing has one entry per run with its stats."""
+        entries = self.catalogue.list()
+        self.assertEqual(sorted(e["name"] for e in entries), ["run.json", "run.sim"])
+        self.assertEqual(entries[0]["stats"]["total_users"], 30)
+
+    def test_listing_cached_until_folder_changes(self):
+        """Test that the listing is reused until a run is added."""
+        folder_mtime = os.stat(self.temp_dir).st_mtime_ns - 5 * 10 ** 9
+        os.utime(self.temp_dir, ns=(folder_mtime, folder_mtime))
+        self.catalogue.list()
+        listing = self.catalogue._listing
+        self.catalogue.list()
+        self.assertIs(self.catalogue._listing, listing)
+
+        self.simulator.save_run(os.path.join(self.temp_dir, "other.json"))
+        self.assertEqual(len(self.catalogue.list()), 3)
+
+    def test_stale_sidecar_rewritten(self):
+        """Test that details reparse a file changed after its sidecar."""
+        path = os.path.join(self.temp_dir, "run.json")
+        with open(path) as f:
+            data = json.load(f)
+        data["users"] = {user_id: its for user_id, its in data["users"].items() if user_id.startswith("casual")}
+        with open(path, "w") as f:
+            json.dump(data, f)
+        os.utime(path, ns=(0, 0))
+
+        self.assertIsNone(read_sidecar(path))
+        self.assertEqual(self.catalogue.details("run.json")["stats"]["business_users"], 0)
+        self.assertIsNotNone(read_sidecar(path))
+
+    def test_legacy_file_gets_sidecar(self):
+        """Test that a run saved without a sidecar gets one on first details request."""
+        path = os.path.join(self.temp_dir, "run.json")
+        os.remove(sidecar_path(path))
+
+        meta = self.catalogue.details("run.json")
+        self.assertEqual(meta["stats"]["total_users"], 30)
+        self.assertTrue(os.path.exists(sidecar_path(path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
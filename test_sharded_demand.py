@@ -0,0 +1,72 @@
+"""
+Unit tests for sharded demand generation.
+"""
+
+import filecmp
+import os
+import shutil
+import tempfile
+import unittest
+from sharded_demand import ShardedDemandGenerator
+from simulator import HotelDemandSimulator
+from utils.demand_generator import generate_demand_table
+from utils.models import SimulationConfig
+from utils.run_catalogue import read_sidecar, summarize_file
+
+
+class TestShardedDemandGenerator(unittest.TestCase):
+    """Test generating demand in user-range shards."""
+
+    def setUp(self):
+        """Create a temporary directory for demand files."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def _generate(self, name, num_shards, max_workers):
+        """Generate 403 users into a named file."""
+        path = os.path.join(self.temp_dir, name)
+        generator = ShardedDemandGenerator(SimulationConfig(), 403, 0.7, seed=8,
+                                           num_shards=num_shards, max_workers=max_workers)
+        return path, generator.generate(path, simulation_id="sim_sharded")
+
+    def test_matches_single_table(self):
+        """Test that merged shards are the file one table would save."""
+        path, params = self._generate("sharded.sim", num_shards=5, max_workers=1)
+        expected = os.path.join(self.temp_dir, "single.sim")
+        generate_demand_table(282, 121, seed=8).save(expected, params)
+
+        self.assertTrue(filecmp.cmp(path, expected, shallow=False))
+        # Part files are cleaned up and the catalogue sidecar written
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["sharded.sim", "sharded.sim.meta.json", "single.sim"])
+        self.assertEqual(read_sidecar(path)["stats"], summarize_file(path)[1])
+
+    def test_independent_of_workers(self):
+        """Test that the file does not depend on shard or worker counts."""
+        serial, _ = self._generate("serial.sim", num_shards=1, max_workers=1)
+        parallel, _ = self._generate("parallel.sim", num_shards=7, max_workers=2)
+        self.assertTrue(filecmp.cmp(serial, parallel, shallow=False))
+
+    def test_replay(self):
+        """Test that a sharded file loads and runs."""
+        path, params = self._generate("replay.sim", num_shards=3, max_workers=1)
+        self.assertEqual(params["seed"], 8)
+
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.load_run(path, mmap=True)
+        simulator.supply_manager.initialize_simulation(simulator.simulation_id, simulator.config)
+        stats = simulator.run_full_simulation()
+        self.assertEqual(simulator.simulation_id, "sim_sharded")
+        self.assertGreater(stats['total_bookings'], 0)
+
+    def test_rejects_other_formats(self):
+        """Test that only columnar files can be written."""
+        generator = ShardedDemandGenerator(SimulationConfig(), 10, 0.5, seed=1)
+        with self.assertRaises(ValueError):
+            generator.generate(os.path.join(self.temp_dir, "demand.json"))
+
+
+if __name__ == '__main__':
+    unittest.main()
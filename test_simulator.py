@@ -6,7 +6,7 @@ import unittest
 import json
 import os
 import tempfile
-from simulator import HotelDemandSimulator, Demand, Itinerary
+from simulator import HotelDemandSimulator, Demand, Itinerary, ShoppingIndex
 
 
 class TestDemandAndItinerary(unittest.TestCase):
@@ -41,6 +41,54 @@ class TestDemandAndItinerary(unittest.TestCase):
         self.assertEqual(len(itinerary.demands), 2)
         self.assertFalse(itinerary.is_booked)
 
+    def test_compact_itinerary(self):
+        """Test that a compact itinerary derives its demands from the shopping window."""
+        itinerary = Itinerary(
+            user_id="casual-001",
+            trip_id=0,
+            stay_start_date=30,
+            stay_end_date=35,
+            shop_start=-2,
+            shop_end=2,
+            min_price=80.0,
+            max_price=100.0
+        )
+        self.assertTrue(itinerary.is_compact)
+        self.assertEqual(itinerary.num_demands, 5)
+        self.assertEqual([d.shopping_date for d in itinerary.demands], [-2, -1, 0, 1, 2])
+        self.assertEqual(itinerary.demand_on(0), Demand(0, 30, 35, 90.0))
+        self.assertEqual(itinerary.demand_on(2).max_price_per_night, 100.0)
+        self.assertIsNone(itinerary.demand_on(3))
+        self.assertFalse(hasattr(itinerary, "__dict__"))
+
+
+class TestShoppingIndex(unittest.TestCase):
+    """Test the shopping-day index."""
+    
+    def setUp(self):
+        """Create two users with overlapping shopping windows."""
+        self.first = Itinerary("casual-001", 0, [Demand(d, 10, 12, 100.0) for d in range(-5, 0)])
+        self.second = Itinerary("business-001", 0, [Demand(d, 5, 6, 150.0) for d in range(-3, 2)])
+        self.booked = Itinerary("business-001", 1, [Demand(-3, 20, 21, 150.0)], is_booked=True)
+        self.index = ShoppingIndex({
+            "casual-001": [self.first],
+            "business-001": [self.second, self.booked]
+        })
+    
+    def test_buckets_by_shopping_day(self):
+        """Test that each day only holds the itineraries shopping on it."""
+        self.assertEqual([e[1] for e in self.index.shoppers(-5)], [self.first])
+        self.assertEqual([e[1] for e in self.index.shoppers(-3)], [self.first, self.second])
+        self.assertEqual([e[1] for e in self.index.shoppers(1)], [self.second])
+        self.assertEqual(list(self.index.shoppers(50)), [])
+    
+    def test_remove_booked_itinerary(self):
+        """Test that a booked itinerary leaves every later bucket."""
+        self.index.remove("casual-001", self.first, -3)
+        self.assertEqual([e[1] for e in self.index.shoppers(-3)], [self.first, self.second])
+        self.assertEqual([e[1] for e in self.index.shoppers(-2)], [self.second])
+        self.assertEqual([e[1] for e in self.index.shoppers(-1)], [self.second])
+
 
 class TestSimulatorGeneration(unittest.TestCase):
     """Test demand generation."""
@@ -0,0 +1,97 @@
+"""
+Unit tests for running supplier configurations against saved demand.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from simulator import HotelDemandSimulator
+from supplier_run import run_supplier_config
+from utils.job_manager import JobManager, JobStatus
+from utils.memory_supply_manager import InMemorySupplyManager
+from utils.models import SimulationConfig
+
+
+def _config(price_factor):
+    """Default configuration with every hotel price scaled"""
+    config = SimulationConfig()
+    for hotel in config.hotels:
+        hotel.base_price *= price_factor
+    return config
+
+
+def _outcome(stats):
+    """Statistics that depend on the supply a run booked against"""
+    return {key: stats[key] for key in ("total_bookings", "total_revenue", "booked_room_days")}
+
+
+class TestSupplierRun(unittest.TestCase):
+    """Test supplier runs on a shared supply store."""
+
+    def setUp(self):
+        """Save a small demand file."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "run.json")
+        random.seed(3)
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.generate_demand(150, 0.8, "shared_run")
+        simulator.save_run(self.path)
+
+    def tearDown(self):
+        """Remove the demand file."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_concurrent_jobs_on_one_file(self):
+        """Test that two jobs on one file at once each get their own supply."""
+        configs = [_config(1.0), _config(0.5)]
+        solo = [_outcome(run_supplier_config(self.path, config, supply_manager=InMemorySupplyManager()))
+                for config in configs]
+        self.assertNotEqual(solo[0], solo[1])
+
+        store = InMemorySupplyManager()
+        manager = JobManager(max_workers=2)
+        # Hold both jobs at their first day until both have initialized supply
+        both_running = threading.Barrier(2, timeout=10)
+
+        def job(config):
+            def work(progress):
+                def report(**fields):
+                    if fields.get("day") is not None and not getattr(report, "synced", False):
+                        report.synced = True
+                        both_running.wait()
+                    progress(**fields)
+                return run_supplier_config(self.path, config, progress=report, supply_manager=store)
+            return work
+
+        try:
+            jobs = [manager.submit(job(config), description="supplier run") for config in configs]
+            deadline = time.time() + 60
+            while not all(j.is_finished for j in jobs) and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            manager.shutdown()
+
+        self.assertEqual([j.status for j in jobs], [JobStatus.SUCCEEDED] * 2)
+        self.assertEqual([_outcome(j.result) for j in jobs], solo)
+        self.assertEqual(store._ledgers, {})
+        self.assertEqual(store._simulations, {})
+
+    def test_cleanup_after_failure(self):
+        """Test that a failed run still removes its supply."""
+        store = InMemorySupplyManager()
+
+        def fail(**fields):
+            if "day" in fields:
+                raise RuntimeError("stop")
+
+        with self.assertRaises(RuntimeError):
+            run_supplier_config(self.path, SimulationConfig(), progress=fail, supply_manager=store)
+        self.assertEqual(store._ledgers, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
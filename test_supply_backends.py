@@ -0,0 +1,440 @@
+"""
+Unit tests for the in-memory supply backend and MongoDB write buffering.
+"""
+
+import random
+import unittest
+from unittest import mock
+from simulator import HotelDemandSimulator
+from utils.memory_supply_manager import InMemorySupplyManager
+from utils.supply_manager import BaseSupplyManager, SupplyManager
+from utils.inventory_ledger import InventoryLedger
+from utils.models import SimulationConfig, SupplierType, RejectionReason, DailySupply
+from utils.pricing_engine import PricingEngine
+
+
+class TestInMemorySupplyManager(unittest.TestCase):
+    """Test the in-memory SupplyManager API."""
+
+    def setUp(self):
+        """Initialize a simulation in a fresh in-memory store."""
+        self.config = SimulationConfig()
+        self.supply_manager = InMemorySupplyManager()
+        self.supply_manager.initialize_simulation("sim_test", self.config)
+
+    def test_initialize_simulation(self):
+        """Test that every hotel has supply for every operational day."""
+        for hotel in self.config.hotels:
+            for day in range(self.config.operational_start_day, self.config.operational_end_day + 1):
+                daily_supply = self.supply_manager.get_daily_supply("sim_test", hotel.hotel_id, day)
+                self.assertIsNotNone(daily_supply)
+                self.assertEqual(daily_supply.hotel_rooms_total, hotel.total_rooms)
+
+    def test_travel_agent_allocation(self):
+        """Test that travel agent allocations come out of hotel stock."""
+        daily_supply = self.supply_manager.get_daily_supply("sim_test", "large_hotel", 10)
+        allocated = sum(a.rooms_allocated for a in daily_supply.travel_agent_allocations)
+        self.assertGreater(allocated, 0)
+        self.assertEqual(daily_supply.hotel_rooms_remaining, 80 - allocated)
+
+    def test_book_room_decrements_inventory(self):
+        """Test that a hotel booking decrements rooms for every stay night."""
+        before = self.supply_manager.get_daily_supply("sim_test", "large_hotel", 20).hotel_rooms_remaining
+
+        booking = self.supply_manager.book_room(
+            simulation_id="sim_test",
+            supplier_id="large_hotel",
+            supplier_type=SupplierType.HOTEL,
+            hotel_id="large_hotel",
+            booking_day=0,
+            stay_dates=[20, 21, 22],
+            user_id="casual-001",
+            trip_id=0,
+            config=self.config
+        )
+
+        self.assertIsNotNone(booking)
+        self.assertAlmostEqual(booking.total_price, 3 * 120.0)
+        for day in [20, 21, 22]:
+            daily_supply = self.supply_manager.get_daily_supply("sim_test", "large_hotel", day)
+            self.assertEqual(daily_supply.hotel_rooms_remaining, before - 1)
+
+        stats = self.supply_manager.get_simulation_statistics("sim_test", self.config)
+        self.assertEqual(stats['total_bookings'], 1)
+        self.assertEqual(stats['hotel_bookings'], 1)
+
+    def test_stay_availability(self):
+        """Test that the ledger range read matches reading each night."""
+        self.supply_manager.book_room(
+            simulation_id="sim_test", supplier_id="large_hotel", supplier_type=SupplierType.HOTEL,
+            hotel_id="large_hotel", booking_day=0, stay_dates=[21], user_id="casual-001",
+            trip_id=0, config=self.config
+        )
+        hotel_ids = [hotel.hotel_id for hotel in self.config.hotels]
+
+        for start_day, end_day in [(18, 24), (-5, 3), (95, 105)]:
+            stays = self.supply_manager.get_stay_availability("sim_test", hotel_ids, start_day, end_day)
+            per_night = BaseSupplyManager.get_stay_availability(
+                self.supply_manager, "sim_test", hotel_ids, start_day, end_day
+            )
+            self.assertEqual(stays, per_night)
+
+        stay = self.supply_manager.get_stay_availability("sim_test", ["large_hotel"], 18, 24)["large_hotel"]
+        remaining = [self.supply_manager.get_daily_supply("sim_test", "large_hotel", day).hotel_rooms_remaining
+                     for day in range(18, 25)]
+        self.assertEqual(stay.hotel_rooms_remaining, min(remaining))
+        self.assertEqual(stay.num_nights, 7)
+        self.assertGreater(stay.agent_rooms_remaining["travel_agent_1"], 0)
+
+        partial = self.supply_manager.get_stay_availability("sim_test", ["large_hotel"], 95, 105)["large_hotel"]
+        self.assertEqual(partial.hotel_rooms_remaining, 0)
+        self.assertEqual(self.supply_manager.get_stay_availability("sim_test", ["large_hotel"], 200, 210), {})
+
+    def test_cleanup_simulation(self):
+        """Test that cleanup removes all supply and bookings."""
+        self.supply_manager.cleanup_simulation("sim_test")
+        self.assertIsNone(self.supply_manager.get_daily_supply("sim_test", "large_hotel", 0))
+        stats = self.supply_manager.get_simulation_statistics("sim_test", self.config)
+        self.assertEqual(stats['total_bookings'], 0)
+
+
+class TestInventoryLedger(unittest.TestCase):
+    """Test the dense inventory ledger."""
+
+    def setUp(self):
+        """Create a ledger for the default configuration."""
+        self.config = SimulationConfig()
+        self.ledger = InventoryLedger("sim_test", self.config)
+
+    def test_stay_cells(self):
+        """Test mapping stay dates onto the day axis."""
+        self.assertEqual(self.ledger.stay_cells([3, 4, 5]), slice(3, 6))
+        self.assertEqual(list(self.ledger.stay_cells([3, 5])), [3, 5])
+        self.assertIsNone(self.ledger.stay_cells([98, 99, 100]))
+        self.assertIsNone(self.ledger.stay_cells([-1, 0]))
+
+    def test_min_rooms_over_stay(self):
+        """Test that availability is the minimum over the stay."""
+        h = self.ledger.hotel_index["boutique_hotel"]
+        self.ledger.hotel_rooms_remaining[h, 12] = 0
+        self.assertEqual(self.ledger.min_hotel_rooms("boutique_hotel", [10, 11]), 20)
+        self.assertEqual(self.ledger.min_hotel_rooms("boutique_hotel", [10, 11, 12]), 0)
+        self.assertEqual(self.ledger.min_hotel_rooms("unknown_hotel", [10]), 0)
+
+    def test_agent_first_allocation_is_sellable(self):
+        """Test that top-ups reduce hotel stock but only the first allocation is sold."""
+        self.ledger.allocate_to_agent("travel_agent_1", "boutique_hotel", 5, 5)
+        self.ledger.allocate_to_agent("travel_agent_1", "boutique_hotel", 30, 5)
+
+        self.assertEqual(self.ledger.min_hotel_rooms("boutique_hotel", [10]), 15)
+        self.assertEqual(self.ledger.min_hotel_rooms("boutique_hotel", [40]), 10)
+        self.assertEqual(self.ledger.min_agent_rooms("travel_agent_1", "boutique_hotel", [40]), 5)
+        self.assertEqual(self.ledger.min_agent_rooms("travel_agent_1", "boutique_hotel", [4, 5]), 0)
+
+    def test_range_index_tracks_writes(self):
+        """Test that indexed range queries follow bookings, allocations and forks."""
+        self.ledger.allocate_to_agent("travel_agent_1", "large_hotel", 0, 4)
+        self.assertEqual(self.ledger.min_hotel_rooms_between("large_hotel", 10, 20), 76)
+        self.assertEqual(self.ledger.min_agent_rooms_between("travel_agent_1", "large_hotel", 10, 20), 4)
+
+        child = self.ledger.fork("sim_child")
+        for _ in range(3):
+            child.record_booking(SupplierType.HOTEL, "large_hotel", "large_hotel", slice(15, 18), 100.0)
+        child.record_booking(SupplierType.TRAVEL_AGENT, "travel_agent_1", "large_hotel", slice(19, 20), 100.0)
+
+        self.assertEqual(child.min_hotel_rooms_between("large_hotel", 10, 20), 73)
+        self.assertEqual(child.min_hotel_rooms_between("large_hotel", 18, 20), 76)
+        self.assertEqual(child.min_agent_rooms_between("travel_agent_1", "large_hotel", 10, 20), 3)
+        self.assertEqual(self.ledger.min_hotel_rooms_between("large_hotel", 10, 20), 76)
+        self.assertEqual(self.ledger.min_agent_rooms_between("travel_agent_1", "large_hotel", 10, 20), 4)
+        self.assertEqual(child.min_hotel_rooms_between("large_hotel", 95, 100), 0)
+
+        self.ledger.allocate_to_agent("travel_agent_1", "large_hotel", 50, 6)
+        self.assertEqual(self.ledger.min_hotel_rooms_between("large_hotel", 45, 55), 70)
+        self.assertAlmostEqual(self.ledger.agent_cost_basis_total("travel_agent_1", "large_hotel", 10, 12),
+                               float(self.ledger.agent_cost_basis_for("travel_agent_1", "large_hotel",
+                                                                      [10, 11, 12]).sum()))
+
+    def test_daily_supply_round_trip(self):
+        """Test that a DailySupply view writes back into the ledger."""
+        daily_supply = self.ledger.to_daily_supply("large_hotel", 7)
+        daily_supply.hotel_rooms_remaining = 3
+        daily_supply.hotel_price = 99.0
+        self.ledger.update_from_daily_supply(daily_supply)
+
+        self.assertEqual(self.ledger.min_hotel_rooms("large_hotel", [7]), 3)
+        self.assertEqual(self.ledger.to_daily_supply("large_hotel", 7).hotel_price, 99.0)
+
+    def test_fork_is_copy_on_write(self):
+        """Test that a fork shares arrays until one side writes to them."""
+        child = self.ledger.fork("sim_fork")
+        self.assertIs(child.hotel_rooms_remaining, self.ledger.hotel_rooms_remaining)
+
+        cells = child.stay_cells([20, 21])
+        child.record_booking(SupplierType.HOTEL, "large_hotel", "large_hotel", cells, 100.0)
+
+        self.assertIsNot(child.hotel_rooms_remaining, self.ledger.hotel_rooms_remaining)
+        self.assertIs(child.hotel_price, self.ledger.hotel_price)
+        self.assertEqual(child.min_hotel_rooms("large_hotel", [20, 21]), 79)
+        self.assertEqual(self.ledger.min_hotel_rooms("large_hotel", [20, 21]), 80)
+
+        self.ledger.record_booking(SupplierType.HOTEL, "large_hotel", "large_hotel", cells, 100.0)
+        self.ledger.record_booking(SupplierType.HOTEL, "large_hotel", "large_hotel", cells, 100.0)
+        self.assertEqual(child.min_hotel_rooms("large_hotel", [20, 21]), 79)
+        self.assertEqual(self.ledger.min_hotel_rooms("large_hotel", [20, 21]), 78)
+
+
+class TestSimulatorMemoryBackend(unittest.TestCase):
+    """Test running full simulations without a database."""
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected."""
+        with self.assertRaises(ValueError):
+            HotelDemandSimulator(supply_backend="sqlite")
+
+    def test_full_simulation(self):
+        """Test a full simulation run against the in-memory backend."""
+        random.seed(42)
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.generate_demand(total_users=50, proportion_casual=0.8, simulation_id="sim_memory")
+
+        stats = simulator.run_full_simulation()
+
+        self.assertEqual(stats['total_bookings'], len(simulator.bookings))
+        self.assertGreater(stats['total_bookings'], 0)
+        self.assertEqual(
+            stats['total_bookings'],
+            stats['hotel_bookings'] + stats['travel_agent_bookings']
+        )
+
+    def test_day_listeners(self):
+        """Test that day listeners get each day's counters."""
+        random.seed(42)
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.generate_demand(total_users=50, proportion_casual=0.8, simulation_id="sim_listen")
+        days = []
+        simulator.day_listeners.append(days.append)
+
+        stats = simulator.run_full_simulation()
+
+        self.assertEqual([d['day'] for d in days], list(range(-20, 100)))
+        self.assertEqual(sum(d['bookings'] for d in days), stats['total_bookings'])
+        self.assertEqual(days[-1]['total_bookings'], stats['total_bookings'])
+        self.assertGreater(sum(d['demands_checked'] for d in days), 0)
+
+
+    def test_lazy_pricing_matches_eager(self):
+        """Test that lazy pricing books exactly what eager pricing books."""
+        results = []
+        for lazy_pricing in (False, True):
+            random.seed(7)
+            simulator = HotelDemandSimulator(supply_backend="memory", lazy_pricing=lazy_pricing)
+            simulator.generate_demand(total_users=40, proportion_casual=0.5, simulation_id="sim_lazy")
+            results.append((simulator.run_full_simulation(), simulator.bookings))
+
+        self.assertEqual(results[0], results[1])
+
+    def test_fork_continues_like_parent(self):
+        """Test that forks continue exactly like the run they branched from."""
+        random.seed(3)
+        reference = HotelDemandSimulator(supply_backend="memory")
+        reference.generate_demand(total_users=40, proportion_casual=0.8, simulation_id="sim_reference")
+        expected = reference.run_full_simulation()
+
+        random.seed(3)
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.generate_demand(total_users=40, proportion_casual=0.8, simulation_id="sim_prefix")
+        for day in range(-20, 30):
+            simulator.process_daily_shopping(day)
+
+        same = simulator.fork("sim_same")
+        cheaper_config = SimulationConfig()
+        cheaper_config.hotels[1].base_price = 60.0
+        cheaper = simulator.fork("sim_cheaper", config=cheaper_config)
+
+        self.assertEqual(simulator.run_full_simulation(start_day=30), expected)
+        self.assertEqual(same.run_full_simulation(start_day=30), expected)
+        self.assertEqual(same.bookings, reference.bookings)
+        self.assertNotEqual(cheaper.run_full_simulation(start_day=30), expected)
+
+
+class TestLazyPricing(unittest.TestCase):
+    """Test price snapshots in lazy pricing mode."""
+
+    def setUp(self):
+        """Create a lazy pricing engine for the default configuration."""
+        self.config = SimulationConfig()
+        self.engine = PricingEngine(self.config, lazy_pricing=True)
+
+    def test_update_hotel_prices_writes_nothing(self):
+        """Test that daily repricing leaves stored prices untouched."""
+        supply_manager = InMemorySupplyManager()
+        supply_manager.initialize_simulation("sim_test", self.config)
+        self.engine.update_hotel_prices("sim_test", 0, supply_manager)
+        daily_supply = supply_manager.get_daily_supply("sim_test", "large_hotel", 3)
+        self.assertEqual(daily_supply.hotel_price, 120.0)
+
+    def test_snapshot_matches_calculated_prices(self):
+        """Test that a snapshot materialises the lead-time prices."""
+        snapshot = self.engine.snapshot_hotel_prices(current_day=10)
+        for hotel in self.config.hotels:
+            prices = snapshot[hotel.hotel_id]
+            self.assertEqual(sorted(prices), list(range(10, 100)))
+            for stay_day, price in prices.items():
+                self.assertEqual(price, self.engine.calculate_hotel_price(hotel, 10, stay_day))
+
+    def test_price_history(self):
+        """Test the price history of one stay day across shopping days."""
+        history = self.engine.get_price_history("boutique_hotel", stay_day=40, first_day=0)
+        self.assertEqual(len(history), 41)
+        self.assertEqual(history[0], {'day': 0, 'price': 150.0})
+        self.assertEqual(history[-1], {'day': 40, 'price': 225.0})
+        self.assertEqual(self.engine.get_price_history("unknown_hotel", 40), [])
+
+
+class TestOfferEvaluation(unittest.TestCase):
+    """Test rejection reasons from offer evaluation."""
+
+    def setUp(self):
+        """Initialize a simulation in a fresh in-memory store."""
+        self.config = SimulationConfig()
+        self.engine = PricingEngine(self.config)
+        self.supply_manager = InMemorySupplyManager()
+        self.supply_manager.initialize_simulation("sim_test", self.config)
+        self.engine.update_hotel_prices("sim_test", 0, self.supply_manager)
+
+    def test_over_budget(self):
+        """Test that every supplier with rooms rejects a stay it prices too high."""
+        search = self.engine.evaluate_offers("sim_test", 0, [10, 11], 1.0, self.supply_manager)
+
+        self.assertIsNone(search.best_offer)
+        self.assertEqual(search.rejection_reason, RejectionReason.OVER_BUDGET)
+        self.assertEqual(len(search.rejections),
+                         len(self.config.hotels) * (1 + len(self.config.travel_agents)))
+
+    def test_no_capacity(self):
+        """Test that a stay outside the operational days has no capacity anywhere."""
+        search = self.engine.evaluate_offers("sim_test", 0, [200], 1000.0, self.supply_manager)
+
+        self.assertIsNone(search.best_offer)
+        self.assertEqual(search.rejection_reason, RejectionReason.NO_CAPACITY)
+
+    def test_best_offer(self):
+        """Test that evaluation finds the same offer as get_best_offer."""
+        search = self.engine.evaluate_offers("sim_test", 0, [40, 41, 42], 1000.0, self.supply_manager)
+
+        self.assertIsNone(search.rejection_reason)
+        self.assertEqual(search.best_offer,
+                         self.engine.get_best_offer("sim_test", 0, [40, 41, 42], 1000.0, self.supply_manager))
+
+    def test_storage_path_matches_ledger(self):
+        """Test that offers read through get_stay_availability book exactly what the ledger books."""
+        class NoLedgerSupplyManager(InMemorySupplyManager):
+            def get_ledger(self, simulation_id):
+                return None
+
+        results = []
+        for supply_manager in (InMemorySupplyManager(), NoLedgerSupplyManager()):
+            simulator = HotelDemandSimulator(supply_backend="memory")
+            simulator.supply_manager = supply_manager
+            simulator.generate_demand(total_users=40, proportion_casual=0.5, simulation_id="sim_range", seed=6)
+            results.append((simulator.run_full_simulation(), simulator.bookings))
+
+        self.assertEqual(results[0], results[1])
+
+    def test_day_counters_cover_every_shopper(self):
+        """Test that each shopper is a booking, a price rejection or a capacity rejection."""
+        simulator = HotelDemandSimulator(supply_backend="memory")
+        simulator.generate_demand(total_users=50, proportion_casual=0.8, simulation_id="sim_reject", seed=2)
+        days = []
+        simulator.day_listeners.append(days.append)
+
+        stats = simulator.run_full_simulation()
+
+        for counters in days:
+            self.assertEqual(counters["bookings"] + counters["price_rejections"] + counters["capacity_rejections"],
+                             counters["demands_checked"])
+        self.assertEqual(sorted(stats["supplier_rejections"]),
+                         sorted([h.hotel_id for h in simulator.config.hotels]
+                                + [a.agent_id for a in simulator.config.travel_agents]))
+        self.assertGreater(sum(counts["over_budget"] for counts in stats["supplier_rejections"].values()), 0)
+
+
+class _CountingCollection:
+    """Stand-in for a MongoDB collection that records each command sent"""
+
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    def __getattr__(self, command):
+        def send(*args, **kwargs):
+            self.calls.append((self.name, command, args))
+            if command == "find_one_and_update":
+                return {"hotel_price": 100.0, "travel_agent_allocations": []}
+        return send
+
+
+class _CountingClient:
+    """Stand-in for MongoClient whose collections share one command log"""
+
+    def __init__(self, *args, **kwargs):
+        self.calls = []
+
+    def __getitem__(self, db_name):
+        return {name: _CountingCollection(name, self.calls)
+                for name in ("daily_supply", "bookings", "simulations")}
+
+
+class TestMongoFlushPolicy(unittest.TestCase):
+    """Test the round trips the MongoDB backend makes per booking when buffering."""
+
+    def setUp(self):
+        """Create a "day" buffered manager on a command-counting client."""
+        with mock.patch("utils.supply_manager.MongoClient", _CountingClient):
+            self.supply_manager = SupplyManager(flush_policy="day")
+        self.calls = self.supply_manager.client.calls
+        self.config = SimulationConfig()
+
+    def _supply(self, hotel_id, day):
+        """Dirty supply document for one night"""
+        return DailySupply("sim_test", hotel_id, day, 100, 100, 120.0, [])
+
+    def _book(self, stay_dates):
+        """Book a hotel room and return the commands it sent"""
+        del self.calls[:]
+        booking = self.supply_manager.book_room(
+            "sim_test", "large_hotel", SupplierType.HOTEL, "large_hotel", 0, stay_dates,
+            "casual-001", 0, self.config
+        )
+        self.assertIsNotNone(booking)
+        return [command for _, command, _ in self.calls]
+
+    def test_booking_keeps_bookings_buffered(self):
+        """Test that each booking costs one update per night plus one revenue update."""
+        for i in range(3):
+            commands = self._book([20 + i, 21 + i, 22 + i])
+            self.assertEqual(commands, ["find_one_and_update"] * 3 + ["update_many"])
+        self.assertEqual(len(self.supply_manager._pending_bookings), 3)
+
+        del self.calls[:]
+        self.supply_manager.checkpoint("day")
+        self.assertEqual([command for _, command, _ in self.calls], ["insert_many"])
+        self.assertEqual(len(self.calls[0][2][0]), 3)
+
+    def test_booking_flushes_only_its_nights(self):
+        """Test that only buffered supply of the booked nights is written first."""
+        self.supply_manager._save_daily_supply(self._supply("large_hotel", 21))
+        self.supply_manager._save_daily_supply(self._supply("large_hotel", 40))
+        self.supply_manager._save_daily_supply(self._supply("small_hotel", 21))
+
+        commands = self._book([20, 21, 22])
+        self.assertEqual(commands, ["bulk_write"] + ["find_one_and_update"] * 3 + ["update_many"])
+        self.assertEqual(len(self.calls[0][2][0]), 1)
+        self.assertEqual(set(self.supply_manager._pending_supply),
+                         {("sim_test", "large_hotel", 40), ("sim_test", "small_hotel", 21)})
+        self.assertEqual(self.supply_manager._pending_ops, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
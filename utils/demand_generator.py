@@ -0,0 +1,264 @@
+"""
+Vectorized Demand Generator
+Draws casual and business traveller demand for all users at once with NumPy.
+"""
+
+import logging
+import random
+from typing import Optional, Tuple
+import numpy as np
+from .demand_table import DemandTable
+
+logger = logging.getLogger(__name__)
+
+# Users scheduled per block, bounding the (users x days) scheduling arrays
+SCHEDULE_CHUNK_SIZE = 65536
+
+# Uniform draws in each user's stream
+CASUAL_DRAWS = 12    # 2 trip picks + 5 per trip
+BUSINESS_DRAWS = 22  # 6 for trip lengths, 5 trip picks, 6 for prices, 5 window offsets
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+
+def master_key(seed: int) -> int:
+    """Derive the 64-bit key every user stream is keyed from"""
+    return int(np.random.SeedSequence(seed).generate_state(1, dtype=np.uint64)[0])
+
+
+def user_random(seed: int, user_index: int) -> random.Random:
+    """
+    Independent random.Random stream for one user of the per-user generator
+
+    Args:
+        seed: Master seed
+        user_index: Global index of the user (casual first, then business)
+
+    Returns:
+        random.Random seeded from the seed spawned for that user
+    """
+    state = np.random.SeedSequence(seed, spawn_key=(user_index,)).generate_state(2, dtype=np.uint64)
+    return random.Random(int(state[0]) << 64 | int(state[1]))
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 output function, applied elementwise"""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def user_uniforms(key: int, user_index: np.ndarray, num_draws: int) -> np.ndarray:
+    """
+    Per-user uniform streams
+
+    Row i depends only on the key and user_index[i], so any user's draws are
+    the same however the users are split up, and can be regenerated alone.
+
+    Args:
+        key: Key from master_key()
+        user_index: Global index of each user
+        num_draws: Draws per user
+
+    Returns:
+        Uniforms in [0, 1), shape (len(user_index), num_draws)
+    """
+    with np.errstate(over="ignore"):
+        user_key = _splitmix64(np.uint64(key) + np.asarray(user_index, dtype=np.uint64) * _GOLDEN_GAMMA)
+        counters = np.arange(1, num_draws + 1, dtype=np.uint64) * _GOLDEN_GAMMA
+        bits = _splitmix64(user_key[:, None] + counters[None, :])
+    return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def _normal_pair(u1: np.ndarray, u2: np.ndarray, mean: float, std: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Two independent Normal(mean, std) draws from two uniforms (Box-Muller)"""
+    radius = np.sqrt(-2.0 * np.log1p(-u1))
+    angle = 2.0 * np.pi * u2
+    return mean + std * radius * np.cos(angle), mean + std * radius * np.sin(angle)
+
+
+def _integers(u: np.ndarray, low: int, high: int) -> np.ndarray:
+    """Integers uniform on [low, high] inclusive"""
+    return low + (u * (high - low + 1)).astype(np.int64)
+
+
+def _schedule_trips(uniforms: np.ndarray, blackouts: np.ndarray, year_length: int) -> np.ndarray:
+    """
+    Schedule non-overlapping trip start dates for many users at once
+
+    Each pick is uniform over the user's still-available days and then blacks
+    out blackouts[:, k] days from the picked day, like the per-user scheduler.
+
+    Args:
+        uniforms: One uniform per pick, shape (users, picks)
+        blackouts: Days blacked out by each pick, shape (users, picks)
+        year_length: Number of days in the year
+
+    Returns:
+        Start dates sorted ascending per user, shape (users, picks); picks
+        that found no available day are -1 and sorted last
+    """
+    num_users, num_picks = blackouts.shape
+    days = np.arange(year_length)
+    picks = np.full((num_users, num_picks), -1, dtype=np.int64)
+
+    for lo in range(0, num_users, SCHEDULE_CHUNK_SIZE):
+        hi = min(lo + SCHEDULE_CHUNK_SIZE, num_users)
+        available = np.ones((hi - lo, year_length), dtype=bool)
+
+        for k in range(num_picks):
+            count = available.sum(axis=1)
+            has_day = count > 0
+
+            # Index of the chosen day among each user's available days
+            choice = np.minimum((uniforms[lo:hi, k] * count).astype(np.int64), np.maximum(count - 1, 0))
+            ranks = np.cumsum(available, axis=1, dtype=np.int16)
+            start = np.argmax(ranks > choice[:, None], axis=1)
+            start = np.where(has_day, start, -1)
+            picks[lo:hi, k] = start
+
+            end = start + blackouts[lo:hi, k]
+            available &= ~((days >= start[:, None]) & (days < end[:, None]) & has_day[:, None])
+
+    picks[picks < 0] = year_length
+    picks.sort(axis=1)
+    picks[picks == year_length] = -1
+    return picks
+
+
+def _expand(shop_start: np.ndarray, shop_end: np.ndarray):
+    """
+    Expand per-itinerary shopping windows into one row per shopping day
+
+    Returns:
+        Tuple of (itinerary index of each row, day offset within the window)
+    """
+    counts = shop_end - shop_start + 1
+    rows = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, offsets
+
+
+def _casual_itineraries(u: np.ndarray, year_length: int, earliest_shopping_day: int):
+    """Draw casual traveller trips: 2 per year, Normal(8, 2) nights, prices rising over the window"""
+    starts = _schedule_trips(u[:, 0:2], np.full((len(u), 2), 25, dtype=np.int64), year_length)
+    user, trip = np.nonzero(starts >= 0)
+    start_date = starts[user, trip]
+
+    # Draws 2 + 5 * trip_id onwards belong to that trip
+    draw = 2 + 5 * trip
+    length_draw, price_draw = _normal_pair(u[user, draw], u[user, draw + 1], 8, 2)
+    trip_length = np.maximum(1, np.trunc(length_draw).astype(np.int64))
+    end_date = np.minimum(year_length - 1, start_date + trip_length - 1)
+
+    base_max_price = 110 + 20 * (price_draw - 8) / 2
+    min_price = base_max_price * (0.7 + 0.2 * u[user, draw + 2])
+
+    shop_start = np.maximum(start_date - _integers(u[user, draw + 3], 20, 50), earliest_shopping_day)
+    shop_end = start_date - _integers(u[user, draw + 4], 5, 15)
+    shop_end = np.where(shop_end <= shop_start, shop_start + 1, shop_end)
+
+    rows, offsets = _expand(shop_start, shop_end)
+    progress = offsets / (shop_end - shop_start)[rows]
+    max_price = min_price[rows] + (base_max_price - min_price)[rows] * progress
+
+    return user, trip, start_date, end_date, shop_start, rows, offsets, max_price
+
+
+def _business_itineraries(u: np.ndarray, year_length: int, earliest_shopping_day: int):
+    """Draw business traveller trips: 1 long and 4 short per year at a fixed premium price"""
+    z = np.concatenate([_normal_pair(u[:, i], u[:, i + 1], 0, 1) for i in (0, 2, 4)]).reshape(6, -1).T
+    trip_lengths = np.empty((len(u), 5), dtype=np.int64)
+    trip_lengths[:, 0] = np.trunc(20 + 5 * z[:, 0])
+    trip_lengths[:, 1:] = np.trunc(5 + z[:, 1:5])
+    np.maximum(trip_lengths, 1, out=trip_lengths)
+
+    # Schedule longest first, then pair sorted dates with the original trip order
+    blackouts = -np.sort(-trip_lengths, axis=1) + 1
+    starts = _schedule_trips(u[:, 6:11], blackouts, year_length)
+    user, trip = np.nonzero(starts >= 0)
+    start_date = starts[user, trip]
+
+    end_date = np.minimum(year_length - 1, start_date + trip_lengths[user, trip] - 1)
+
+    prices = np.concatenate([_normal_pair(u[:, i], u[:, i + 1], 150, 10) for i in (11, 13, 15)]).reshape(6, -1).T
+    price = prices[user, trip]
+
+    shop_start = np.maximum(start_date - _integers(u[user, 17 + trip], 3, 7), earliest_shopping_day)
+    shop_end = start_date - 1
+
+    rows, offsets = _expand(shop_start, shop_end)
+    return user, trip, start_date, end_date, shop_start, rows, offsets, price[rows]
+
+
+def generate_demand_table(num_casual: int, num_business: int, seed: Optional[int] = None,
+                          user_start: int = 0, user_stop: Optional[int] = None,
+                          year_length: int = 100, earliest_shopping_day: int = -20) -> DemandTable:
+    """
+    Generate demand for all travellers with the same distributions as the
+    per-user generator in HotelDemandSimulator
+
+    Users are indexed casual first, then business. Each user's draws come
+    from its own stream keyed by the seed and its index, so a user range
+    gives exactly the rows the full population has for those users.
+
+    Args:
+        num_casual: Number of casual travellers
+        num_business: Number of business travellers
+        seed: Master seed (fresh entropy if not provided)
+        user_start: First user index to generate
+        user_stop: One past the last user index to generate (defaults to all)
+        year_length: Number of days trips can start on
+        earliest_shopping_day: First day anyone shops
+
+    Returns:
+        DemandTable for users user_start..user_stop-1, with the user column
+        and itinerary numbers local to that range
+    """
+    total_users = num_casual + num_business
+    user_stop = total_users if user_stop is None else min(user_stop, total_users)
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    key = master_key(seed)
+
+    ranges = (
+        (_casual_itineraries, CASUAL_DRAWS, "casual", 0,
+         max(user_start, 0), min(user_stop, num_casual)),
+        (_business_itineraries, BUSINESS_DRAWS, "business", num_casual,
+         max(user_start, num_casual), user_stop),
+    )
+
+    user_ids = []
+    columns = {name: [] for name in DemandTable.COLUMNS}
+    itinerary_offset = 0
+
+    for draw, num_draws, prefix, first_index, lo, hi in ranges:
+        if hi <= lo:
+            continue
+
+        user_index = np.arange(lo, hi)
+        uniforms = user_uniforms(key, user_index, num_draws)
+        user, trip, start_date, end_date, shop_start, rows, offsets, max_price = draw(
+            uniforms, year_length, earliest_shopping_day
+        )
+
+        user_offset = len(user_ids)
+        user_ids += [f"{prefix}-{i - first_index + 1:03d}" for i in range(lo, hi)]
+
+        columns["user"].append((user[rows] + user_offset).astype(np.int32))
+        columns["trip"].append(trip[rows].astype(np.int8))
+        columns["itinerary"].append((rows + itinerary_offset).astype(np.int32))
+        columns["shopping_date"].append((shop_start[rows] + offsets).astype(np.int16))
+        columns["stay_start"].append(start_date[rows].astype(np.int16))
+        columns["stay_end"].append(end_date[rows].astype(np.int16))
+        columns["max_price"].append(max_price)
+
+        itinerary_offset += len(start_date)
+
+    arrays = {
+        name: np.concatenate(parts) if parts else np.zeros(0, dtype=DemandTable.DTYPES[name])
+        for name, parts in columns.items()
+    }
+    table = DemandTable(user_ids, **arrays)
+    logger.debug(f"Generated {table.num_rows} demands for {table.num_itineraries} itineraries")
+    return table
@@ -0,0 +1,390 @@
+"""
+Demand Table
+Columnar storage for generated demand, one row per itinerary per shopping day.
+"""
+
+import os
+import json
+import struct
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .models import Demand, Itinerary
+
+logger = logging.getLogger(__name__)
+
+
+class DemandTable:
+    """
+    Columnar demand for a whole simulation.
+
+    Itineraries are numbered in user and trip order and the user column
+    indexes into user_ids. Generated tables keep each itinerary's rows
+    together; tables loaded from disk are ordered by shopping day instead.
+    """
+
+    COLUMNS = ("user", "trip", "itinerary", "shopping_date", "stay_start", "stay_end", "max_price")
+    DTYPES = {
+        "user": np.int32,
+        "trip": np.int8,
+        "itinerary": np.int32,
+        "shopping_date": np.int16,
+        "stay_start": np.int16,
+        "stay_end": np.int16,
+        "max_price": np.float64,
+    }
+
+    # Columnar file layout: MAGIC, header length (uint64), JSON header, then
+    # each column's raw little-endian data at the offset given in the header
+    FILE_EXTENSION = ".sim"
+    MAGIC = b"HDSIMCOL"
+    FORMAT_VERSION = 1
+    ALIGNMENT = 64
+
+    def __init__(self, user_ids: List[str], user: np.ndarray, trip: np.ndarray,
+                 itinerary: np.ndarray, shopping_date: np.ndarray, stay_start: np.ndarray,
+                 stay_end: np.ndarray, max_price: np.ndarray,
+                 bookings: Optional[Dict[int, Dict[str, Any]]] = None,
+                 day_offsets: Optional[np.ndarray] = None, first_shopping_day: int = 0):
+        """
+        Wrap demand columns
+
+        Args:
+            user_ids: User ID of each user index
+            user: User index of each row
+            trip: Trip ID of each row
+            itinerary: Global itinerary index of each row
+            shopping_date: Shopping day of each row
+            stay_start: First night of the trip
+            stay_end: Last night of the trip
+            max_price: Maximum price per night on the shopping day
+            bookings: Itinerary index -> booked fields, for booked itineraries
+            day_offsets: Row offset of each shopping day, if rows are in
+                shopping day order, with the row count appended
+            first_shopping_day: Shopping day of the first day_offsets entry
+        """
+        self.user_ids = user_ids
+        self.user = user
+        self.trip = trip
+        self.itinerary = itinerary
+        self.shopping_date = shopping_date
+        self.stay_start = stay_start
+        self.stay_end = stay_end
+        self.max_price = max_price
+        self.bookings = bookings or {}
+        self.day_offsets = day_offsets
+        self.first_shopping_day = first_shopping_day
+
+    @property
+    def num_rows(self) -> int:
+        """Number of demands in the table"""
+        return len(self.shopping_date)
+
+    @property
+    def num_itineraries(self) -> int:
+        """Number of itineraries in the table"""
+        return int(self.itinerary.max()) + 1 if self.num_rows else 0
+
+    def shallow_copy(self) -> "DemandTable":
+        """Copy that shares the (read-only) columns but has its own booking state"""
+        return DemandTable(
+            self.user_ids, self.user, self.trip, self.itinerary, self.shopping_date,
+            self.stay_start, self.stay_end, self.max_price,
+            bookings=dict(self.bookings),
+            day_offsets=self.day_offsets,
+            first_shopping_day=self.first_shopping_day
+        )
+
+    def day_index(self) -> Tuple[Optional[np.ndarray], int, np.ndarray]:
+        """
+        Locate each shopping day's rows
+
+        Returns:
+            Tuple of (row order, or None if rows are already in shopping day
+            order, first shopping day, offsets of each day's rows within that
+            order with the row count appended)
+        """
+        if self.day_offsets is not None:
+            return None, self.first_shopping_day, self.day_offsets
+
+        order = np.argsort(self.shopping_date, kind="stable")
+        shopping_date = self.shopping_date[order].astype(np.int64)
+        first_day = int(shopping_date[0]) if self.num_rows else 0
+        day_counts = np.bincount(shopping_date - first_day, minlength=1)
+        return order, first_day, np.concatenate(([0], np.cumsum(day_counts)))
+
+    @classmethod
+    def from_users(cls, users: Dict[str, List[Itinerary]]) -> "DemandTable":
+        """
+        Build a table from the simulator's object view, keeping booking state
+
+        Args:
+            users: Dictionary of user_id -> list of itineraries
+
+        Returns:
+            DemandTable with one row per Demand
+        """
+        columns = {name: [] for name in cls.COLUMNS}
+        bookings = {}
+        itinerary_index = 0
+
+        for user_index, itineraries in enumerate(users.values()):
+            for itinerary in itineraries:
+                for demand in itinerary.demands:
+                    columns["user"].append(user_index)
+                    columns["trip"].append(itinerary.trip_id)
+                    columns["itinerary"].append(itinerary_index)
+                    columns["shopping_date"].append(demand.shopping_date)
+                    columns["stay_start"].append(demand.stay_start_date)
+                    columns["stay_end"].append(demand.stay_end_date)
+                    columns["max_price"].append(demand.max_price_per_night)
+
+                if itinerary.is_booked:
+                    bookings[itinerary_index] = {
+                        "booked_price_per_night": itinerary.booked_price_per_night,
+                        "booked_supplier_id": itinerary.booked_supplier_id,
+                        "booked_supplier_type": itinerary.booked_supplier_type,
+                        "booked_hotel_id": itinerary.booked_hotel_id
+                    }
+                itinerary_index += 1
+
+        arrays = {name: np.array(values, dtype=cls.DTYPES[name]) for name, values in columns.items()}
+        return cls(list(users), bookings=bookings, **arrays)
+
+    def by_shopping_day(self) -> "DemandTable":
+        """Get this table with its rows in shopping day order and day_offsets set"""
+        order, first_day, day_offsets = self.day_index()
+        if order is None:
+            return self
+
+        columns = {name: getattr(self, name)[order] for name in self.COLUMNS}
+        return DemandTable(self.user_ids, bookings=self.bookings, day_offsets=day_offsets,
+                           first_shopping_day=first_day, **columns)
+
+    def save(self, filepath: str, simulation_parameters: Dict):
+        """
+        Write the table in the columnar file format, ordered by shopping day
+
+        Args:
+            filepath: Destination path
+            simulation_parameters: Parameters stored in the JSON header
+        """
+        table = self.by_shopping_day()
+        columns, data_size = self.column_layout(self.num_rows)
+
+        header = {
+            "version": self.FORMAT_VERSION,
+            "simulation_parameters": simulation_parameters,
+            "num_rows": self.num_rows,
+            "first_shopping_day": table.first_shopping_day,
+            "day_offsets": np.asarray(table.day_offsets).tolist(),
+            "user_ids": self.user_ids,
+            "bookings": {str(k): v for k, v in self.bookings.items()},
+            "columns": columns,
+        }
+
+        # Write beside the target and swap it in, so a table memory-mapped
+        # from filepath can be saved back over it
+        temp_path = f"{filepath}.tmp"
+        with open(temp_path, "wb") as f:
+            data_start = self.write_header(f, header)
+            for column in columns:
+                f.seek(data_start + column["offset"])
+                np.asarray(getattr(table, column["name"])).astype(column["dtype"]).tofile(f)
+            f.truncate(data_start + data_size)
+        os.replace(temp_path, filepath)
+
+    @classmethod
+    def column_layout(cls, num_rows: int) -> Tuple[List[Dict], int]:
+        """
+        Place each column in the data section of a columnar file
+
+        Args:
+            num_rows: Number of rows in the file
+
+        Returns:
+            Tuple of (header column entries with name, dtype and offset,
+            total size of the data section in bytes)
+        """
+        columns = []
+        offset = 0
+        for name in cls.COLUMNS:
+            dtype = np.dtype(cls.DTYPES[name]).newbyteorder("<")
+            columns.append({"name": name, "dtype": dtype.str, "offset": offset})
+            offset += -(-num_rows * dtype.itemsize // cls.ALIGNMENT) * cls.ALIGNMENT
+        return columns, offset
+
+    @classmethod
+    def write_header(cls, f, header: Dict) -> int:
+        """
+        Write the magic and JSON header at the start of a columnar file
+
+        Args:
+            f: File opened for binary writing
+            header: Header dictionary
+
+        Returns:
+            Byte offset where column data starts
+        """
+        header_bytes = json.dumps(header).encode("utf-8")
+        data_start = len(cls.MAGIC) + 8 + len(header_bytes)
+        header_bytes += b" " * (-data_start % cls.ALIGNMENT)
+        data_start += -data_start % cls.ALIGNMENT
+
+        f.seek(0)
+        f.write(cls.MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        return data_start
+
+    @classmethod
+    def read_header(cls, filepath: str) -> Tuple[Dict, int]:
+        """
+        Read the JSON header of a columnar file
+
+        Returns:
+            Tuple of (header, byte offset where column data starts)
+        """
+        with open(filepath, "rb") as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"{filepath} is not a columnar simulation file")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+
+        if header.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar file version {header.get('version')} in {filepath}")
+        return header, len(cls.MAGIC) + 8 + header_length
+
+    @classmethod
+    def load(cls, filepath: str, mmap: bool = False) -> Tuple["DemandTable", Dict]:
+        """
+        Read a columnar file
+
+        Args:
+            filepath: Path written by save()
+            mmap: Memory-map the columns read-only instead of reading them
+                into memory, so pages are only loaded as rows are visited
+
+        Returns:
+            Tuple of (table, simulation_parameters)
+        """
+        header, data_start = cls.read_header(filepath)
+        num_rows = header["num_rows"]
+
+        arrays = {}
+        if mmap and num_rows:
+            for column in header["columns"]:
+                arrays[column["name"]] = np.memmap(filepath, dtype=column["dtype"], mode="r",
+                                                   offset=data_start + column["offset"], shape=(num_rows,))
+        else:
+            with open(filepath, "rb") as f:
+                for column in header["columns"]:
+                    f.seek(data_start + column["offset"])
+                    arrays[column["name"]] = np.fromfile(f, dtype=column["dtype"], count=num_rows)
+
+        table = cls(
+            header["user_ids"],
+            bookings={int(k): v for k, v in header["bookings"].items()},
+            day_offsets=np.array(header["day_offsets"], dtype=np.int64),
+            first_shopping_day=header["first_shopping_day"],
+            **arrays
+        )
+        return table, header["simulation_parameters"]
+
+    def to_users(self) -> Dict[str, List[Itinerary]]:
+        """
+        Build the object view used by the simulator
+
+        Itineraries whose rows cover a contiguous shopping window for one stay,
+        with prices that reproduce exactly as a linear ramp from the first to
+        the last row (constant for business travellers), are built compact;
+        any other itinerary keeps its rows as explicit demands.
+
+        Returns:
+            Dictionary of user_id -> list of itineraries, including users
+            without any trips
+        """
+        users: Dict[str, List[Itinerary]] = {user_id: [] for user_id in self.user_ids}
+        if not self.num_rows:
+            return users
+
+        # Group rows by itinerary, keeping shopping day order within each
+        order = np.lexsort((self.shopping_date, self.itinerary))
+        itinerary = self.itinerary[order]
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(itinerary)) + 1, [self.num_rows])).tolist()
+
+        compact = self._window_rows(order, bounds).tolist()
+
+        user = self.user[order].tolist()
+        trip = self.trip[order].tolist()
+        shopping_date = self.shopping_date[order].tolist()
+        stay_start = self.stay_start[order].tolist()
+        stay_end = self.stay_end[order].tolist()
+        max_price = self.max_price[order].tolist()
+
+        for group, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if compact[group]:
+                demands = None
+                window = {
+                    "stay_start_date": stay_start[start],
+                    "stay_end_date": stay_end[start],
+                    "shop_start": shopping_date[start],
+                    "shop_end": shopping_date[end - 1],
+                    "min_price": max_price[start],
+                    "max_price": max_price[end - 1]
+                }
+            else:
+                demands = [
+                    Demand(
+                        shopping_date=shopping_date[row],
+                        stay_start_date=stay_start[row],
+                        stay_end_date=stay_end[row],
+                        max_price_per_night=max_price[row]
+                    )
+                    for row in range(start, end)
+                ]
+                window = {}
+            user_id = self.user_ids[user[start]]
+            booking = self.bookings.get(int(itinerary[start]), {})
+            users[user_id].append(Itinerary(
+                user_id=user_id,
+                trip_id=trip[start],
+                demands=demands,
+                **window,
+                is_booked=bool(booking),
+                **booking
+            ))
+
+        return users
+
+    def _window_rows(self, order: np.ndarray, bounds: List[int]) -> np.ndarray:
+        """
+        Which itineraries an Itinerary shopping window reproduces row for row
+
+        Args:
+            order: Row order grouping itineraries, by shopping day within each
+            bounds: Start of each itinerary's rows in that order, then num_rows
+
+        Returns:
+            Boolean per itinerary
+        """
+        starts = np.asarray(bounds[:-1])
+        counts = np.diff(bounds)
+        first = np.repeat(starts, counts)
+        last = np.repeat(starts + counts - 1, counts)
+
+        day = self.shopping_date[order].astype(np.int64)
+        price = self.max_price[order].astype(np.float64)
+        stay_start = self.stay_start[order]
+        stay_end = self.stay_end[order]
+
+        # One row per day from the first shopping day, all for the same stay
+        ok = (day - day[first] == np.arange(len(order)) - first)
+        ok &= (stay_start == stay_start[first]) & (stay_end == stay_end[first])
+
+        # Same arithmetic as Itinerary.demand_on, so compact prices match exactly
+        span = day[last] - day[first]
+        progress = np.divide(day - day[first], span, out=np.zeros(len(order)), where=span > 0)
+        ok &= price[first] + (price[last] - price[first]) * progress == price
+
+        return np.logical_and.reduceat(ok, starts)
@@ -0,0 +1,162 @@
+"""
+Instrumentation
+Opt-in wall time, call and storage round trip counters per simulation phase and simulated day.
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+from pymongo import monitoring
+
+# Instrumentation collecting on each thread, so round trips from concurrent
+# simulations sharing a MongoClient are attributed to the right run
+_active = threading.local()
+
+# Shared no-op returned by a disabled Instrumentation
+_DISABLED = nullcontext()
+
+# Phase that round trips made inside a day but outside any phase are counted under
+OTHER_PHASE = "other"
+
+
+def _new_counters() -> Dict:
+    """Empty counters of one phase"""
+    return {"seconds": 0.0, "calls": 0, "round_trips": 0}
+
+
+class RoundTripListener(monitoring.CommandListener):
+    """
+    Counts MongoDB commands against the instrumentation active on the issuing thread.
+
+    Command events are published synchronously on the thread running the
+    operation, so no locking is needed.
+    """
+
+    def started(self, event):
+        instrumentation = getattr(_active, "instrumentation", None)
+        if instrumentation is not None:
+            instrumentation.record_round_trip()
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class _Scope:
+    """Times one phase or day and makes its Instrumentation active on this thread"""
+
+    __slots__ = ("instrumentation", "name", "day", "start", "previous", "previous_phase")
+
+    def __init__(self, instrumentation: "Instrumentation", name: Optional[str], day: Optional[int]):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.day = day
+
+    def __enter__(self):
+        self.previous = getattr(_active, "instrumentation", None)
+        _active.instrumentation = self.instrumentation
+        self.previous_phase = self.instrumentation._phase
+        if self.name is None:
+            self.instrumentation._begin_day(self.day)
+        else:
+            self.instrumentation._phase = self.name
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        if self.name is None:
+            self.instrumentation._end_day(elapsed)
+        else:
+            self.instrumentation._end_phase(self.name, elapsed)
+        self.instrumentation._phase = self.previous_phase
+        _active.instrumentation = self.previous
+        return False
+
+
+class Instrumentation:
+    """
+    Per-phase counters for a simulation run.
+
+    Wrap each simulated day in day() and each piece of work in phase(); every
+    phase records its wall time, call count and the storage round trips made
+    while it ran, both for the current day and for the run. Disabled
+    instrumentation returns a shared no-op context, so the simulator can
+    leave the calls in place.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Args:
+            enabled: Whether to collect anything
+        """
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Discard everything collected so far"""
+        self.totals: Dict[str, Dict] = {}
+        self.days: List[Dict] = []
+        self._day: Optional[Dict] = None
+        self._phase: Optional[str] = None
+
+    def day(self, day: int):
+        """Context timing one simulated day"""
+        if not self.enabled:
+            return _DISABLED
+        return _Scope(self, None, day)
+
+    def phase(self, name: str):
+        """Context timing one call of a phase"""
+        if not self.enabled:
+            return _DISABLED
+        return _Scope(self, name, None)
+
+    def record_round_trip(self):
+        """Count a storage round trip against the current phase"""
+        phase = self._phase or OTHER_PHASE
+        self.totals.setdefault(phase, _new_counters())["round_trips"] += 1
+        if self._day is not None:
+            self._day["round_trips"] += 1
+            self._day["phases"].setdefault(phase, _new_counters())["round_trips"] += 1
+
+    def report(self) -> Dict:
+        """
+        Structured report of everything collected
+
+        Returns:
+            Dictionary with run totals per phase and, for each simulated day,
+            its wall time, round trips and per-phase counters
+        """
+        return {
+            "enabled": self.enabled,
+            "totals": {
+                "seconds": sum(day["seconds"] for day in self.days),
+                "round_trips": sum(counters["round_trips"] for counters in self.totals.values()),
+                "phases": {name: dict(counters) for name, counters in self.totals.items()}
+            },
+            "days": [
+                {**day, "phases": {name: dict(counters) for name, counters in day["phases"].items()}}
+                for day in self.days
+            ]
+        }
+
+    def _begin_day(self, day: int):
+        """Start collecting a day's counters"""
+        self._day = {"day": day, "seconds": 0.0, "round_trips": 0, "phases": {}}
+
+    def _end_day(self, elapsed: float):
+        """Close the current day"""
+        self._day["seconds"] = elapsed
+        self.days.append(self._day)
+        self._day = None
+
+    def _end_phase(self, name: str, elapsed: float):
+        """Add one call of a phase to the run and day counters"""
+        for phases in ((self.totals,) if self._day is None else (self.totals, self._day["phases"])):
+            counters = phases.setdefault(name, _new_counters())
+            counters["seconds"] += elapsed
+            counters["calls"] += 1
@@ -0,0 +1,362 @@
+"""
+Inventory Ledger
+Dense NumPy representation of the supply state of one simulation.
+"""
+
+import copy
+import logging
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+from .models import DailySupply, SupplyAllocation, SupplierType, SimulationConfig, StayAvailability
+from .range_index import PrefixSumIndex, RangeMinIndex
+
+logger = logging.getLogger(__name__)
+
+StayCells = Union[slice, np.ndarray]
+
+
+class InventoryLedger:
+    """
+    Supply state for every hotel, travel agent and operational day of a simulation.
+
+    Hotel state is indexed by [hotel, day] and travel agent state by
+    [agent, hotel, day], where day is the offset from operational_start_day.
+    Each agent cell holds the agent's first allocation for that night, which is
+    the allocation DailySupply lookups have always sold from; later top-ups
+    still come out of the hotel's stock.
+
+    Ledgers created by fork() share their state arrays copy-on-write: read
+    arrays directly, but go through writable() before modifying one.
+
+    Rooms remaining and agent cost basis are also indexed per (supplier,
+    hotel) row for O(1) range minimums and sums over a stay. The indexes are
+    built on first use, kept current by record_booking and rebuilt after
+    any other write to the arrays they cover.
+    """
+
+    STATE_ARRAYS = (
+        "hotel_rooms_remaining", "hotel_price", "bookings_count", "total_revenue",
+        "agent_rooms_allocated", "agent_rooms_remaining", "agent_cost_basis"
+    )
+
+    def __init__(self, simulation_id: str, config: SimulationConfig):
+        """
+        Build a ledger with full hotel stock and no travel agent allocations
+
+        Args:
+            simulation_id: Simulation identifier
+            config: Simulation configuration with hotels and travel agents
+        """
+        self.simulation_id = simulation_id
+        self.start_day = config.operational_start_day
+        self.num_days = config.operational_end_day - config.operational_start_day + 1
+
+        self.hotel_ids = [h.hotel_id for h in config.hotels]
+        self.agent_ids = [a.agent_id for a in config.travel_agents]
+        self.hotel_index = {hotel_id: i for i, hotel_id in enumerate(self.hotel_ids)}
+        self.agent_index = {agent_id: i for i, agent_id in enumerate(self.agent_ids)}
+
+        num_hotels = len(self.hotel_ids)
+        num_agents = len(self.agent_ids)
+
+        # [hotel]
+        self.hotel_rooms_total = np.array([h.total_rooms for h in config.hotels], dtype=np.int64)
+        base_prices = np.array([h.base_price for h in config.hotels], dtype=np.float64)
+
+        # [hotel, day]
+        self.hotel_rooms_remaining = np.repeat(self.hotel_rooms_total[:, None], self.num_days, axis=1)
+        self.hotel_price = np.repeat(base_prices[:, None], self.num_days, axis=1)
+        self.bookings_count = np.zeros((num_hotels, self.num_days), dtype=np.int64)
+        self.total_revenue = np.zeros((num_hotels, self.num_days), dtype=np.float64)
+
+        # [agent, hotel, day]
+        self.agent_rooms_allocated = np.zeros((num_agents, num_hotels, self.num_days), dtype=np.int64)
+        self.agent_rooms_remaining = np.zeros((num_agents, num_hotels, self.num_days), dtype=np.int64)
+        self.agent_cost_basis = np.zeros((num_agents, num_hotels, self.num_days), dtype=np.float64)
+
+        # State arrays that may still be shared with a fork
+        self._shared = set()
+
+        # State array name -> range index over it, built on first use;
+        # agent rows are flattened to agent * num_hotels + hotel
+        self._indexes: Dict[str, Union[RangeMinIndex, PrefixSumIndex]] = {}
+
+    def fork(self, simulation_id: str) -> "InventoryLedger":
+        """
+        Branch the supply state without copying it
+
+        Both ledgers keep sharing every state array until one of them writes
+        to it, at which point writable() gives the writer its own copy of that
+        array only.
+
+        Args:
+            simulation_id: Simulation the new ledger belongs to
+
+        Returns:
+            New ledger with the same state as this one
+        """
+        child = copy.copy(self)
+        child.simulation_id = simulation_id
+        child._indexes = {}
+        child._shared = set(self.STATE_ARRAYS)
+        self._shared = set(self.STATE_ARRAYS)
+        return child
+
+    def writable(self, name: str) -> np.ndarray:
+        """Get a state array for writing, first copying it if it is shared with a fork"""
+        if name in self._shared:
+            setattr(self, name, getattr(self, name).copy())
+            self._shared.discard(name)
+        return getattr(self, name)
+
+    def stay_cells(self, stay_dates: Sequence[int]) -> Optional[StayCells]:
+        """
+        Map stay dates onto the day axis
+
+        Args:
+            stay_dates: Days of the stay
+
+        Returns:
+            A slice for a contiguous stay, an index array otherwise, or None if
+            any night falls outside the operational period
+        """
+        if len(stay_dates) == 0:
+            return None
+
+        first = stay_dates[0] - self.start_day
+        last = stay_dates[-1] - self.start_day
+
+        if last - first + 1 == len(stay_dates) and all(
+            day == stay_dates[0] + i for i, day in enumerate(stay_dates)
+        ):
+            if first < 0 or last >= self.num_days:
+                return None
+            return slice(first, last + 1)
+
+        cells = np.asarray(stay_dates, dtype=np.int64) - self.start_day
+        if cells.min() < 0 or cells.max() >= self.num_days:
+            return None
+        return cells
+
+    def min_hotel_rooms(self, hotel_id: str, stay_dates: Sequence[int]) -> int:
+        """Fewest rooms the hotel has left on any night of the stay (0 if unknown)"""
+        h = self.hotel_index.get(hotel_id)
+        cells = self.stay_cells(stay_dates)
+        if h is None or cells is None:
+            return 0
+        if isinstance(cells, slice):
+            return self._index("hotel_rooms_remaining").min(h, cells.start, cells.stop - 1)
+        return int(self.hotel_rooms_remaining[h, cells].min())
+
+    def min_agent_rooms(self, agent_id: str, hotel_id: str, stay_dates: Sequence[int]) -> int:
+        """Fewest rooms the agent has left at the hotel on any night of the stay (0 if unknown)"""
+        a = self.agent_index.get(agent_id)
+        h = self.hotel_index.get(hotel_id)
+        cells = self.stay_cells(stay_dates)
+        if a is None or h is None or cells is None:
+            return 0
+        if isinstance(cells, slice):
+            return self._index("agent_rooms_remaining").min(self._agent_row(a, h), cells.start, cells.stop - 1)
+        return int(self.agent_rooms_remaining[a, h, cells].min())
+
+    def min_hotel_rooms_between(self, hotel_id: str, start_day: int, end_day: int) -> int:
+        """Fewest rooms the hotel has left on any night from start_day to end_day (0 if unknown)"""
+        h = self.hotel_index.get(hotel_id)
+        first = start_day - self.start_day
+        last = end_day - self.start_day
+        if h is None or first < 0 or last >= self.num_days or first > last:
+            return 0
+        return self._index("hotel_rooms_remaining").min(h, first, last)
+
+    def min_agent_rooms_between(self, agent_id: str, hotel_id: str, start_day: int, end_day: int) -> int:
+        """Fewest rooms the agent has left at the hotel on any night from start_day to end_day (0 if unknown)"""
+        a = self.agent_index.get(agent_id)
+        h = self.hotel_index.get(hotel_id)
+        first = start_day - self.start_day
+        last = end_day - self.start_day
+        if a is None or h is None or first < 0 or last >= self.num_days or first > last:
+            return 0
+        return self._index("agent_rooms_remaining").min(self._agent_row(a, h), first, last)
+
+    def agent_cost_basis_total(self, agent_id: str, hotel_id: str, start_day: int, end_day: int) -> float:
+        """Agent's cost basis at the hotel summed over the nights start_day to end_day"""
+        return self._index("agent_cost_basis").sum(
+            self._agent_row(self.agent_index[agent_id], self.hotel_index[hotel_id]),
+            start_day - self.start_day, end_day - self.start_day
+        )
+
+    def agent_cost_basis_for(self, agent_id: str, hotel_id: str, stay_dates: Sequence[int]) -> np.ndarray:
+        """Per-night cost basis of the agent's allocation at the hotel"""
+        a = self.agent_index[agent_id]
+        h = self.hotel_index[hotel_id]
+        return self.agent_cost_basis[a, h, self.stay_cells(stay_dates)]
+
+    def stay_availability(self, hotel_id: str, start_day: int, end_day: int) -> Optional[StayAvailability]:
+        """
+        Slice a hotel's supply over the nights start_day to end_day
+
+        Returns:
+            StayAvailability, or None if the hotel is unknown or no night of the
+            stay is within the operational period
+        """
+        h = self.hotel_index.get(hotel_id)
+        first = max(start_day - self.start_day, 0)
+        last = min(end_day - self.start_day, self.num_days - 1)
+        if h is None or first > last:
+            return None
+
+        cells = slice(first, last + 1)
+        complete = last - first == end_day - start_day
+        availability = StayAvailability(
+            hotel_id=hotel_id,
+            start_day=start_day,
+            end_day=end_day,
+            hotel_rooms_remaining=int(self.hotel_rooms_remaining[h, cells].min()) if complete else 0,
+            hotel_prices=self.hotel_price[h, cells].tolist()
+        )
+
+        allocated = self.agent_rooms_allocated[:, h, cells] > 0
+        for a, agent_id in enumerate(self.agent_ids):
+            nights = allocated[a]
+            if not nights.any():
+                continue
+            availability.agent_rooms_remaining[agent_id] = (
+                int(self.agent_rooms_remaining[a, h, cells].min()) if complete and nights.all() else 0
+            )
+            availability.agent_cost_basis[agent_id] = self.agent_cost_basis[a, h, cells][nights].tolist()
+
+        return availability
+
+    def allocate_to_agent(self, agent_id: str, hotel_id: str, from_day: int, num_rooms: int):
+        """
+        Move up to num_rooms rooms per night from the hotel to the agent, from
+        from_day to the end of the operational period
+
+        Args:
+            agent_id: Travel agent receiving the rooms
+            hotel_id: Hotel the rooms come from
+            from_day: First night of the allocation
+            num_rooms: Rooms per night to allocate
+        """
+        a = self.agent_index[agent_id]
+        h = self.hotel_index[hotel_id]
+        start = max(from_day - self.start_day, 0)
+
+        hotel_remaining = self.writable("hotel_rooms_remaining")[h, start:]
+        rooms = np.minimum(num_rooms, hotel_remaining)
+        rooms[rooms < 0] = 0
+
+        allocated = self.writable("agent_rooms_allocated")[a, h, start:]
+        first = (allocated == 0) & (rooms > 0)
+        allocated[first] = rooms[first]
+        self.writable("agent_rooms_remaining")[a, h, start:][first] = rooms[first]
+        self.writable("agent_cost_basis")[a, h, start:][first] = self.hotel_price[h, start:][first]
+
+        hotel_remaining -= rooms
+        self._invalidate("hotel_rooms_remaining", "agent_rooms_remaining", "agent_cost_basis")
+
+    def record_booking(self, supplier_type: SupplierType, supplier_id: str, hotel_id: str,
+                       cells: StayCells, price_per_night: float):
+        """Take one room per night from the supplier and book the revenue against the hotel"""
+        h = self.hotel_index[hotel_id]
+
+        if supplier_type == SupplierType.HOTEL:
+            self.writable("hotel_rooms_remaining")[h, cells] -= 1
+            index = self._indexes.get("hotel_rooms_remaining")
+            if index is not None:
+                index.add(h, cells, -1)
+        else:  # TRAVEL_AGENT
+            a = self.agent_index[supplier_id]
+            self.writable("agent_rooms_remaining")[a, h, cells] -= 1
+            index = self._indexes.get("agent_rooms_remaining")
+            if index is not None:
+                index.add(self._agent_row(a, h), cells, -1)
+
+        self.writable("bookings_count")[h, cells] += 1
+        self.writable("total_revenue")[h, cells] += price_per_night
+
+    def to_daily_supply(self, hotel_id: str, day: int) -> Optional[DailySupply]:
+        """Build a DailySupply view of one (hotel, day) cell"""
+        h = self.hotel_index.get(hotel_id)
+        d = day - self.start_day
+        if h is None or d < 0 or d >= self.num_days:
+            return None
+
+        allocations = [
+            SupplyAllocation(
+                supplier_id=agent_id,
+                supplier_type=SupplierType.TRAVEL_AGENT,
+                day=day,
+                hotel_id=hotel_id,
+                rooms_allocated=int(self.agent_rooms_allocated[a, h, d]),
+                rooms_remaining=int(self.agent_rooms_remaining[a, h, d]),
+                cost_basis=float(self.agent_cost_basis[a, h, d])
+            )
+            for a, agent_id in enumerate(self.agent_ids)
+            if self.agent_rooms_allocated[a, h, d] > 0
+        ]
+
+        return DailySupply(
+            simulation_id=self.simulation_id,
+            hotel_id=hotel_id,
+            day=day,
+            hotel_rooms_total=int(self.hotel_rooms_total[h]),
+            hotel_rooms_remaining=int(self.hotel_rooms_remaining[h, d]),
+            hotel_price=float(self.hotel_price[h, d]),
+            travel_agent_allocations=allocations,
+            bookings_count=int(self.bookings_count[h, d]),
+            total_revenue=float(self.total_revenue[h, d])
+        )
+
+    def update_from_daily_supply(self, daily_supply: DailySupply):
+        """Write a DailySupply view back into the ledger"""
+        h = self.hotel_index.get(daily_supply.hotel_id)
+        d = daily_supply.day - self.start_day
+        if h is None or d < 0 or d >= self.num_days:
+            logger.warning(f"Ignoring supply for {daily_supply.hotel_id} on day {daily_supply.day}: "
+                           f"outside the ledger")
+            return
+
+        self.writable("hotel_rooms_remaining")[h, d] = daily_supply.hotel_rooms_remaining
+        self.writable("hotel_price")[h, d] = daily_supply.hotel_price
+        self.writable("bookings_count")[h, d] = daily_supply.bookings_count
+        self.writable("total_revenue")[h, d] = daily_supply.total_revenue
+
+        seen = set()
+        for allocation in daily_supply.travel_agent_allocations:
+            a = self.agent_index.get(allocation.supplier_id)
+            if a is None or a in seen:
+                continue
+            seen.add(a)
+            self.writable("agent_rooms_allocated")[a, h, d] = allocation.rooms_allocated
+            self.writable("agent_rooms_remaining")[a, h, d] = allocation.rooms_remaining
+            self.writable("agent_cost_basis")[a, h, d] = allocation.cost_basis
+
+        self._invalidate("hotel_rooms_remaining", "agent_rooms_remaining", "agent_cost_basis")
+
+    def _agent_row(self, a: int, h: int) -> int:
+        """Row of an (agent, hotel) pair in the agent indexes"""
+        return a * len(self.hotel_ids) + h
+
+    def _index(self, name: str) -> Union[RangeMinIndex, PrefixSumIndex]:
+        """Range index over a state array, building it if needed"""
+        index = self._indexes.get(name)
+        if index is None:
+            values = getattr(self, name)
+            if values.ndim == 3:
+                values = values.reshape(-1, self.num_days)
+            index = PrefixSumIndex(values) if name == "agent_cost_basis" else RangeMinIndex(values)
+            self._indexes[name] = index
+        return index
+
+    def _invalidate(self, *names: str):
+        """Drop the indexes over state arrays written outside record_booking"""
+        for name in names:
+            self._indexes.pop(name, None)
+
+    def room_day_totals(self, hotel_ids: List[str]) -> Dict[str, int]:
+        """Total and booked room-days across the given hotels"""
+        rows = [self.hotel_index[hotel_id] for hotel_id in hotel_ids if hotel_id in self.hotel_index]
+        total = int(self.hotel_rooms_total[rows].sum()) * self.num_days
+        remaining = int(self.hotel_rooms_remaining[rows].sum())
+        return {"total_room_days": total, "booked_room_days": total - remaining}
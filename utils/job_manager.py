@@ -0,0 +1,199 @@
+"""
+Job Manager
+Runs long simulations on a bounded background worker pool and tracks their progress and results.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(Enum):
+    """Lifecycle of a background job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A submitted job and what is known about it so far"""
+    job_id: str
+    description: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    subscribers: List[queue.Queue] = field(default_factory=list, repr=False)
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has succeeded or failed"""
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status fields for API responses, without the result"""
+        return {
+            "job_id": self.job_id,
+            "description": self.description,
+            "status": self.status.value,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": dict(self.progress),
+            "error": self.error
+        }
+
+
+class JobManager:
+    """
+    Queue of background jobs run by a fixed number of worker threads.
+
+    Jobs receive a progress callback that merges keyword fields into the
+    job's progress. Subscribers get each progress update as a ("progress",
+    fields) event and a final ("done", status) event; with no subscribers
+    nothing is published. Finished jobs are kept for result_ttl seconds.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queued: int = 32, result_ttl: float = 3600):
+        """
+        Args:
+            max_workers: Jobs run at the same time
+            max_queued: Jobs waiting or running before submissions are refused
+            result_ttl: Seconds a finished job and its result are kept
+        """
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], description: str = "") -> Job:
+        """
+        Queue a job
+
+        Args:
+            fn: Called on a worker thread as fn(progress), where progress(**fields)
+                updates the job's progress; its return value is the job result
+            description: Short description shown in the job status
+
+        Returns:
+            The queued job
+
+        Raises:
+            ValueError: If max_queued jobs are already waiting or running
+        """
+        with self._lock:
+            self._expire()
+            active = sum(not job.is_finished for job in self._jobs.values())
+            if active >= self.max_queued:
+                raise ValueError(f"Job queue is full ({active} jobs waiting or running)")
+
+            job = Job(job_id=uuid.uuid4().hex, description=description)
+            self._jobs[job.job_id] = job
+
+        self._executor.submit(self._run, job, fn)
+        logger.info(f"Job {job.job_id} queued: {description}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID, or None if it is unknown or has expired"""
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def subscribe(self, job_id: str) -> Optional[queue.Queue]:
+        """
+        Follow a job's progress
+
+        Args:
+            job_id: Job to follow
+
+        Returns:
+            Queue receiving (event, data) tuples, starting with the current
+            progress and ending with "done"; None if the job is unknown
+        """
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            events = queue.Queue()
+            if job.progress:
+                events.put(("progress", dict(job.progress)))
+            if job.is_finished:
+                events.put(("done", job.to_dict()))
+            else:
+                job.subscribers.append(events)
+            return events
+
+    def unsubscribe(self, job_id: str, events: queue.Queue):
+        """Stop following a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and events in job.subscribers:
+                job.subscribers.remove(events)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[..., Any]):
+        """Run a job on a worker thread, recording its outcome"""
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+
+        def progress(**fields):
+            job.progress = {**job.progress, **fields}
+            if job.subscribers:
+                self._publish(job, "progress", dict(job.progress))
+
+        # finished_at is set before the status so expiry never sees a
+        # finished job without it
+        try:
+            job.result = fn(progress)
+            job.finished_at = time.time()
+            self._finish(job, JobStatus.SUCCEEDED)
+            logger.info(f"Job {job.job_id} succeeded")
+        except Exception as e:
+            job.error = str(e)
+            job.finished_at = time.time()
+            self._finish(job, JobStatus.FAILED)
+            logger.error(f"Job {job.job_id} failed: {str(e)}", exc_info=True)
+
+    def _publish(self, job: Job, event: str, data: Dict[str, Any]):
+        """Send an event to every subscriber of a job"""
+        with self._lock:
+            for events in job.subscribers:
+                events.put((event, data))
+
+    def _finish(self, job: Job, status: JobStatus):
+        """Set a job's final status and close its subscriptions"""
+        with self._lock:
+            job.status = status
+            for events in job.subscribers:
+                events.put(("done", job.to_dict()))
+            job.subscribers.clear()
+
+    def _expire(self):
+        """Drop finished jobs older than the TTL; the caller holds the lock"""
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.is_finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,112 @@
+"""
+Streaming Run Reader
+Walks a saved JSON run one user at a time instead of loading the whole document.
+"""
+
+import json
+from typing import Any, Iterator, Tuple
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+
+
+class _JsonReader:
+    """Incremental reader over a text stream, holding only the unparsed tail"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self, size: int):
+        """Drop the consumed prefix and append up to size more characters"""
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at the end of the stream"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._read_more(self.chunk_size)
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Malformed simulation file: expected one of {chars!r}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading as much as it needs"""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number ending at the buffer edge may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Malformed simulation file: {e}") from e
+            self._read_more(size)
+            size *= 2
+
+
+def iter_run(filepath: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, str, Any]]:
+    """
+    Stream the members of a saved JSON run
+
+    Only one user's data is decoded at a time, so memory stays bounded by the
+    largest user rather than the file.
+
+    Args:
+        filepath: Saved JSON run
+        chunk_size: Characters read at a time
+
+    Yields:
+        ("user", user_id, itinerary dicts) for each user in "users", and
+        ("member", key, value) for every other top-level member
+    """
+    with open(filepath, "r") as f:
+        reader = _JsonReader(f, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Malformed simulation file: non-string key {key!r}")
+            reader.expect(":")
+
+            if key == "users":
+                reader.expect("{")
+                if reader.peek() == "}":
+                    reader.expect("}")
+                else:
+                    while True:
+                        user_id = reader.value()
+                        reader.expect(":")
+                        yield "user", user_id, reader.value()
+                        if reader.expect(",}") == "}":
+                            break
+            else:
+                yield "member", key, reader.value()
+
+            if reader.expect(",}") == "}":
+                break
+
+        if reader.peek():
+            raise ValueError(f"Malformed simulation file: trailing data in {filepath}")
@@ -0,0 +1,259 @@
+"""
+In-Memory Supply Manager
+Keeps supply and bookings in process, with the same API as the MongoDB SupplyManager.
+"""
+
+import logging
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from .models import DailySupply, Booking, SupplierType, SimulationConfig, StayAvailability
+from .supply_manager import BaseSupplyManager
+from .inventory_ledger import InventoryLedger
+
+logger = logging.getLogger(__name__)
+
+
+class InMemorySupplyManager(BaseSupplyManager):
+    """Manages hotel and travel agent supply in process memory, no database required"""
+
+    def __init__(self):
+        """Initialize empty in-process stores"""
+        # simulation_id -> InventoryLedger
+        self._ledgers: Dict[str, InventoryLedger] = {}
+        # simulation_id -> list of Booking
+        self._bookings: Dict[str, List[Booking]] = {}
+        # simulation_id -> stored simulation config
+        self._simulations: Dict[str, Dict] = {}
+
+    def initialize_simulation(self, simulation_id: str, config: SimulationConfig):
+        """
+        Initialize supply for a new simulation
+
+        Args:
+            simulation_id: Unique simulation identifier
+            config: Simulation configuration with hotels and travel agents
+        """
+        logger.info(f"Initializing simulation {simulation_id}")
+
+        self._save_simulation_config(simulation_id, config)
+        self._ledgers[simulation_id] = InventoryLedger(simulation_id, config)
+        self._allocate_travel_agent_inventory(simulation_id, config)
+
+        logger.info(f"Simulation {simulation_id} initialized successfully")
+
+    def _allocate_travel_agent_inventory(self, simulation_id: str, config: SimulationConfig):
+        """
+        Allocate inventory to travel agents on their scheduled days
+
+        Args:
+            simulation_id: Simulation identifier
+            config: Simulation configuration
+        """
+        ledger = self._ledgers[simulation_id]
+
+        for agent in config.travel_agents:
+            for allocation_day in agent.allocation_schedule:
+                if allocation_day < config.operational_start_day:
+                    continue
+
+                allocation_rules = config.allocation_rules.get(agent.agent_id, {})
+
+                for hotel_id, num_rooms in allocation_rules.items():
+                    if hotel_id not in ledger.hotel_index:
+                        continue
+
+                    ledger.allocate_to_agent(agent.agent_id, hotel_id, allocation_day, num_rooms)
+
+                    logger.debug(f"Allocated up to {num_rooms} rooms to {agent.agent_id} "
+                                 f"from {hotel_id} from day {allocation_day}")
+
+    def fork_simulation(self, source_simulation_id: str, simulation_id: str):
+        """
+        Branch a simulation; the ledgers share supply state copy-on-write
+
+        Args:
+            source_simulation_id: Simulation to branch from
+            simulation_id: Identifier of the new simulation
+        """
+        ledger = self._ledgers.get(source_simulation_id)
+        if ledger is None:
+            raise ValueError(f"Unknown simulation {source_simulation_id}")
+        if simulation_id in self._ledgers:
+            raise ValueError(f"Simulation {simulation_id} already exists")
+
+        self._ledgers[simulation_id] = ledger.fork(simulation_id)
+        self._bookings[simulation_id] = [
+            replace(booking, simulation_id=simulation_id)
+            for booking in self._bookings.get(source_simulation_id, [])
+        ]
+        self._simulations[simulation_id] = {
+            **self._simulations[source_simulation_id],
+            "simulation_id": simulation_id,
+            "forked_from": source_simulation_id
+        }
+
+        logger.info(f"Forked simulation {source_simulation_id} into {simulation_id}")
+
+    def get_ledger(self, simulation_id: str) -> Optional[InventoryLedger]:
+        """Get the InventoryLedger holding a simulation's supply"""
+        return self._ledgers.get(simulation_id)
+
+    def get_daily_supply(self, simulation_id: str, hotel_id: str, day: int) -> Optional[DailySupply]:
+        """
+        Get supply information for a specific day and hotel
+
+        Args:
+            simulation_id: Simulation identifier
+            hotel_id: Hotel identifier
+            day: Day number
+
+        Returns:
+            DailySupply view of the ledger or None if not found
+        """
+        ledger = self._ledgers.get(simulation_id)
+        if ledger is None:
+            return None
+        return ledger.to_daily_supply(hotel_id, day)
+
+    def get_stay_availability(self, simulation_id: str, hotel_ids: List[str],
+                              start_day: int, end_day: int) -> Dict[str, StayAvailability]:
+        """
+        Get rooms remaining and prices of every supplier at the given hotels
+        over the nights start_day to end_day, as slices of the ledger
+
+        Args:
+            simulation_id: Simulation identifier
+            hotel_ids: Hotels to look up
+            start_day: First night of the stay
+            end_day: Last night of the stay
+
+        Returns:
+            hotel_id -> StayAvailability, for hotels with supply on at least one night
+        """
+        ledger = self._ledgers.get(simulation_id)
+        if ledger is None:
+            return {}
+
+        availability = {}
+        for hotel_id in hotel_ids:
+            stay = ledger.stay_availability(hotel_id, start_day, end_day)
+            if stay is not None:
+                availability[hotel_id] = stay
+        return availability
+
+    def book_room(self, simulation_id: str, supplier_id: str, supplier_type: SupplierType,
+                  hotel_id: str, booking_day: int, stay_dates: List[int],
+                  user_id: str, trip_id: int, config: SimulationConfig,
+                  quoted_total_price: Optional[float] = None) -> Optional[Booking]:
+        """
+        Book a room from a supplier for given stay dates, directly against the ledger
+
+        Args:
+            simulation_id: Simulation identifier
+            supplier_id: ID of the supplier (hotel or travel agent)
+            supplier_type: Type of supplier
+            hotel_id: Hotel where booking is made
+            booking_day: Day when booking is made
+            stay_dates: List of days for the stay
+            user_id: User making the booking
+            trip_id: Trip identifier
+            config: Simulation configuration
+            quoted_total_price: Total price quoted by the PricingEngine; used instead
+                of the stored prices, which are not kept current in lazy pricing mode
+
+        Returns:
+            Booking object if successful, None otherwise
+        """
+        ledger = self._ledgers.get(simulation_id)
+        cells = ledger.stay_cells(stay_dates) if ledger else None
+        if cells is None or hotel_id not in ledger.hotel_index:
+            logger.warning(f"No supply data for {hotel_id} on days {stay_dates[0]}-{stay_dates[-1]}")
+            return None
+
+        h = ledger.hotel_index[hotel_id]
+
+        # Check availability with the ledger's range index and price every night
+        if supplier_type == SupplierType.HOTEL:
+            rooms = ledger.min_hotel_rooms(hotel_id, stay_dates)
+            prices = ledger.hotel_price[h, cells]
+        else:  # TRAVEL_AGENT
+            agent = config.get_travel_agent_by_id(supplier_id)
+            if agent is None or supplier_id not in ledger.agent_index:
+                logger.warning(f"Unknown travel agent {supplier_id}")
+                return None
+            a = ledger.agent_index[supplier_id]
+            rooms = ledger.min_agent_rooms(supplier_id, hotel_id, stay_dates)
+            prices = (ledger.agent_cost_basis[a, h, cells] + agent.operating_cost_per_room) * (1 + agent.profit_margin)
+
+        if rooms <= 0:
+            logger.warning(f"Supplier {supplier_id} has no rooms for days {stay_dates[0]}-{stay_dates[-1]}")
+            return None
+
+        if quoted_total_price is not None:
+            total_price = quoted_total_price
+        else:
+            total_price = sum(prices.tolist())
+        price_per_night = total_price / len(stay_dates)
+
+        ledger.record_booking(supplier_type, supplier_id, hotel_id, cells, price_per_night)
+
+        booking = Booking(
+            simulation_id=simulation_id,
+            user_id=user_id,
+            trip_id=trip_id,
+            supplier_id=supplier_id,
+            supplier_type=supplier_type,
+            booking_day=booking_day,
+            stay_dates=stay_dates,
+            price_per_night=price_per_night,
+            total_price=total_price,
+            hotel_id=hotel_id
+        )
+
+        self._save_booking(booking)
+
+        logger.info(f"Booking created: {user_id} booked {hotel_id} via {supplier_id} "
+                    f"for days {stay_dates[0]}-{stay_dates[-1]} at ${price_per_night:.2f}/night")
+
+        return booking
+
+    def _count_room_days(self, simulation_id: str, config: SimulationConfig) -> Tuple[int, int]:
+        """Count available and booked room-days from the ledger"""
+        ledger = self._ledgers.get(simulation_id)
+        if ledger is None:
+            return 0, 0
+        totals = ledger.room_day_totals([h.hotel_id for h in config.hotels])
+        return totals["total_room_days"], totals["booked_room_days"]
+
+    def _save_daily_supply(self, daily_supply: DailySupply):
+        """Write a DailySupply back into the ledger"""
+        ledger = self._ledgers.get(daily_supply.simulation_id)
+        if ledger is None:
+            logger.warning(f"Ignoring supply for uninitialized simulation {daily_supply.simulation_id}")
+            return
+        ledger.update_from_daily_supply(daily_supply)
+
+    def _save_simulation_config(self, simulation_id: str, config: SimulationConfig):
+        """Store the simulation config in memory"""
+        self._simulations[simulation_id] = {
+            "simulation_id": simulation_id,
+            "config": self._config_to_dict(config),
+            "created_at": datetime.now(),
+            "status": "initialized"
+        }
+
+    def _save_booking(self, booking: Booking):
+        """Save a booking in memory"""
+        self._bookings.setdefault(booking.simulation_id, []).append(booking)
+
+    def _get_booking_docs(self, simulation_id: str) -> List[Dict]:
+        """Get all bookings for a simulation in document form"""
+        return [self._booking_to_doc(b) for b in self._bookings.get(simulation_id, [])]
+
+    def cleanup_simulation(self, simulation_id: str):
+        """Remove all data for a simulation"""
+        self._ledgers.pop(simulation_id, None)
+        self._bookings.pop(simulation_id, None)
+        self._simulations.pop(simulation_id, None)
+        logger.info(f"Cleaned up simulation {simulation_id}")
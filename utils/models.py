@@ -4,7 +4,7 @@ Defines data structures for hotels, travel agents, and supply tracking.
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 from datetime import datetime
 from enum import Enum
 
@@ -15,6 +15,12 @@ class SupplierType(Enum):
     TRAVEL_AGENT = "travel_agent"
 
 
+class RejectionReason(Enum):
+    """Why a supplier could not offer a stay"""
+    NO_CAPACITY = "no_capacity"  # No room left on at least one night
+    OVER_BUDGET = "over_budget"  # Average nightly price above the shopper's maximum
+
+
 class PricingStrategy(Enum):
     """Pricing strategies available"""
     DYNAMIC = "dynamic"  # Hotels - price based on lead time
@@ -90,6 +96,215 @@ class DailySupply:
     updated_at: datetime = field(default_factory=datetime.now)
 
 
+@dataclass
+class StayAvailability:
+    """
+    Supply of one hotel and its travel agents over the nights start_day to end_day.
+
+    A night without supply counts as no rooms. Travel agents are listed if they
+    have an allocation on at least one night; each night sells from the agent's
+    first allocation, as DailySupply lookups do.
+    """
+    hotel_id: str
+    start_day: int
+    end_day: int
+    hotel_rooms_remaining: int  # Fewest rooms left on any night
+    hotel_prices: List[float] = field(default_factory=list)  # Stored price of each night with supply
+    agent_rooms_remaining: Dict[str, int] = field(default_factory=dict)  # agent_id -> fewest rooms left
+    agent_cost_basis: Dict[str, List[float]] = field(default_factory=dict)  # agent_id -> cost basis per night
+
+    @property
+    def num_nights(self) -> int:
+        """Nights in the stay"""
+        return self.end_day - self.start_day + 1
+
+    @property
+    def hotel_price_total(self) -> float:
+        """Stored hotel price summed over the stay"""
+        return sum(self.hotel_prices)
+
+    @property
+    def agent_cost_basis_total(self) -> Dict[str, float]:
+        """agent_id -> cost basis summed over the stay"""
+        return {agent_id: sum(costs) for agent_id, costs in self.agent_cost_basis.items()}
+
+    @classmethod
+    def from_daily_supplies(cls, hotel_id: str, start_day: int, end_day: int,
+                            supplies: Sequence["DailySupply"]) -> "StayAvailability":
+        """
+        Summarise a hotel's DailySupply records for the stay, in day order
+
+        Args:
+            hotel_id: Hotel the records belong to
+            start_day: First night
+            end_day: Last night
+            supplies: Records of the nights that have supply
+
+        Returns:
+            StayAvailability of the stay
+        """
+        complete = len(supplies) == end_day - start_day + 1
+        availability = cls(
+            hotel_id=hotel_id,
+            start_day=start_day,
+            end_day=end_day,
+            hotel_rooms_remaining=(min(s.hotel_rooms_remaining for s in supplies)
+                                   if complete and supplies else 0),
+            hotel_prices=[s.hotel_price for s in supplies]
+        )
+
+        nights: Dict[str, List[SupplyAllocation]] = {}
+        for daily_supply in supplies:
+            first = {}
+            for allocation in daily_supply.travel_agent_allocations:
+                first.setdefault(allocation.supplier_id, allocation)
+            for agent_id, allocation in first.items():
+                nights.setdefault(agent_id, []).append(allocation)
+
+        for agent_id, allocations in nights.items():
+            every_night = complete and len(allocations) == len(supplies)
+            availability.agent_rooms_remaining[agent_id] = (
+                min(a.rooms_remaining for a in allocations) if every_night else 0
+            )
+            availability.agent_cost_basis[agent_id] = [a.cost_basis for a in allocations]
+
+        return availability
+
+
+@dataclass
+class Demand:
+    """Represents a single user shopping for a hotel on a specific day."""
+    shopping_date: int
+    stay_start_date: int
+    stay_end_date: int
+    max_price_per_night: float
+
+class Itinerary:
+    """
+    Represents one trip's shopping demand.
+
+    Generated itineraries are compact: they keep the shopping window and the
+    price range, and derive each day's Demand on the fly. Itineraries built
+    from an explicit list of Demand objects (tests, legacy saved runs) keep
+    that list as is.
+    """
+    __slots__ = (
+        "user_id", "trip_id", "_demands",
+        "stay_start_date", "stay_end_date", "shop_start", "shop_end", "min_price", "max_price",
+        "is_booked", "booked_price_per_night", "booked_supplier_id",
+        "booked_supplier_type", "booked_hotel_id"
+    )
+
+    def __init__(self, user_id: str, trip_id: int, demands: Optional[List[Demand]] = None,
+                 is_booked: bool = False, booked_price_per_night: Optional[float] = None,
+                 booked_supplier_id: Optional[str] = None, booked_supplier_type: Optional[str] = None,
+                 booked_hotel_id: Optional[str] = None, stay_start_date: int = 0, stay_end_date: int = 0,
+                 shop_start: int = 0, shop_end: int = -1, min_price: float = 0.0, max_price: float = 0.0):
+        """
+        Args:
+            user_id: User the trip belongs to
+            trip_id: Trip number within the user's year
+            demands: Explicit per-day demands; if None the window fields below
+                describe the itinerary
+            stay_start_date: First night of the trip
+            stay_end_date: Last night of the trip
+            shop_start: First shopping day
+            shop_end: Last shopping day
+            min_price: Maximum price per night on shop_start
+            max_price: Maximum price per night on shop_end, rising linearly
+                from min_price
+        """
+        self.user_id = user_id
+        self.trip_id = trip_id
+        self._demands = demands
+        self.stay_start_date = stay_start_date
+        self.stay_end_date = stay_end_date
+        self.shop_start = shop_start
+        self.shop_end = shop_end
+        self.min_price = min_price
+        self.max_price = max_price
+        self.is_booked = is_booked
+        self.booked_price_per_night = booked_price_per_night
+        self.booked_supplier_id = booked_supplier_id
+        self.booked_supplier_type = booked_supplier_type
+        self.booked_hotel_id = booked_hotel_id
+
+    @property
+    def is_compact(self) -> bool:
+        """Whether the itinerary is described by its shopping window"""
+        return self._demands is None
+
+    @property
+    def num_demands(self) -> int:
+        """Number of shopping days, without building the demands"""
+        return len(self.shopping_days())
+
+    def shopping_days(self) -> Sequence[int]:
+        """Days on which the itinerary shops, in order"""
+        if self._demands is None:
+            return range(self.shop_start, self.shop_end + 1)
+        return [demand.shopping_date for demand in self._demands]
+
+    def demand_on(self, shopping_day: int) -> Optional[Demand]:
+        """Get the (first) Demand for a shopping day, or None if not shopping that day"""
+        if self._demands is not None:
+            for demand in self._demands:
+                if demand.shopping_date == shopping_day:
+                    return demand
+            return None
+
+        if shopping_day < self.shop_start or shopping_day > self.shop_end:
+            return None
+
+        # Linear interpolation for price
+        if self.shop_end > self.shop_start:
+            progress = (shopping_day - self.shop_start) / (self.shop_end - self.shop_start)
+        else:
+            progress = 0.0
+        return Demand(
+            shopping_date=shopping_day,
+            stay_start_date=self.stay_start_date,
+            stay_end_date=self.stay_end_date,
+            max_price_per_night=self.min_price + (self.max_price - self.min_price) * progress
+        )
+
+    @property
+    def demands(self) -> List[Demand]:
+        """Per-day Demand objects; generated on each access for compact itineraries"""
+        if self._demands is not None:
+            return self._demands
+        return [self.demand_on(day) for day in self.shopping_days()]
+
+    @demands.setter
+    def demands(self, demands: List[Demand]):
+        """Replace the itinerary's demands with an explicit list"""
+        self._demands = demands
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Itinerary):
+            return NotImplemented
+        return (
+            self.user_id == other.user_id
+            and self.trip_id == other.trip_id
+            and self.demands == other.demands
+            and self.is_booked == other.is_booked
+            and self.booked_price_per_night == other.booked_price_per_night
+            and self.booked_supplier_id == other.booked_supplier_id
+            and self.booked_supplier_type == other.booked_supplier_type
+            and self.booked_hotel_id == other.booked_hotel_id
+        )
+
+    def __repr__(self) -> str:
+        if self._demands is None:
+            shape = (f"stay={self.stay_start_date}-{self.stay_end_date}, "
+                     f"shopping={self.shop_start}-{self.shop_end}, "
+                     f"price={self.min_price:.2f}-{self.max_price:.2f}")
+        else:
+            shape = f"demands={len(self._demands)}"
+        return (f"Itinerary(user_id={self.user_id!r}, trip_id={self.trip_id}, {shape}, "
+                f"is_booked={self.is_booked})")
+
+
 @dataclass
 class Booking:
     """Represents a completed booking"""
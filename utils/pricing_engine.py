@@ -4,23 +4,55 @@ Handles dynamic pricing for hotels and fixed pricing for travel agents.
 """
 
 import logging
-from typing import Dict, List
-from .models import Hotel, TravelAgent, SimulationConfig, PricingStrategy, SupplierType
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .models import (
+    Hotel, TravelAgent, SimulationConfig, PricingStrategy, SupplierType, RejectionReason, StayAvailability
+)
+from .range_index import PrefixSumIndex
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class OfferSearch:
+    """Outcome of shopping every supplier for one stay"""
+    best_offer: Optional[Dict] = None
+    # (supplier_id, hotel_id, reason) for every supplier that could not offer the stay
+    rejections: List[Tuple[str, str, RejectionReason]] = field(default_factory=list)
+
+    @property
+    def rejection_reason(self) -> Optional[RejectionReason]:
+        """
+        Why the shopper got no offer: over budget if any supplier had rooms
+        for the whole stay, otherwise no capacity; None if there is an offer
+        """
+        if self.best_offer is not None:
+            return None
+        if any(reason is RejectionReason.OVER_BUDGET for _, _, reason in self.rejections):
+            return RejectionReason.OVER_BUDGET
+        return RejectionReason.NO_CAPACITY
+
+
 class PricingEngine:
     """Handles pricing calculations for hotels and travel agents"""
     
-    def __init__(self, config: SimulationConfig):
+    def __init__(self, config: SimulationConfig, lazy_pricing: bool = False):
         """
         Initialize pricing engine
         
         Args:
             config: Simulation configuration
+            lazy_pricing: Derive hotel prices from the lead-time table when they are
+                needed instead of rewriting every future day's stored price each day
         """
         self.config = config
+        self.lazy_pricing = lazy_pricing
+        
+        # (hotel_id, current_day) -> prefix sums of that day's prices over the
+        # operational days; only the latest shopping day is kept
+        self._price_sums: Dict[Tuple[str, int], PrefixSumIndex] = {}
     
     def calculate_hotel_price(self, hotel: Hotel, current_day: int, stay_day: int) -> float:
         """
@@ -93,63 +125,158 @@ class PricingEngine:
         Returns:
             Dict with best offer details, or None if no suitable offer found
         """
-        best_offer = None
+        return self.evaluate_offers(
+            simulation_id, current_day, stay_dates, max_price_per_night, supply_manager
+        ).best_offer
+    
+    def evaluate_offers(self, simulation_id: str, current_day: int,
+                        stay_dates: List[int], max_price_per_night: float,
+                        supply_manager) -> OfferSearch:
+        """
+        Find the best available offer for a given stay, recording why every
+        other supplier could not offer it
+        
+        Args:
+            simulation_id: Simulation identifier
+            current_day: Current day (when shopping)
+            stay_dates: Consecutive days of the stay
+            max_price_per_night: Maximum price user is willing to pay per night
+            supply_manager: SupplyManager instance
+            
+        Returns:
+            OfferSearch with the cheapest acceptable offer (if any) and the
+            rejection reason of each supplier without one
+        """
+        search = OfferSearch()
         best_avg_price = float('inf')
         
+        ledger = supply_manager.get_ledger(simulation_id)
+        stays = {}
+        if ledger is None:
+            # One range read for every hotel instead of a lookup per night and supplier
+            stays = supply_manager.get_stay_availability(
+                simulation_id, [hotel.hotel_id for hotel in self.config.hotels],
+                stay_dates[0], stay_dates[-1]
+            )
+        
         # Check each hotel
         for hotel in self.config.hotels:
+            stay = stays.get(hotel.hotel_id)
+            
             # Check direct hotel booking
-            offer = self._evaluate_hotel_offer(
+            offer, reason = self._evaluate_hotel_offer(
                 simulation_id, hotel, current_day, stay_dates, 
-                max_price_per_night, supply_manager
+                max_price_per_night, supply_manager, stay
             )
             
-            if offer and offer['avg_price'] < best_avg_price:
-                best_offer = offer
+            if reason is not None:
+                search.rejections.append((hotel.hotel_id, hotel.hotel_id, reason))
+            elif offer['avg_price'] < best_avg_price:
+                search.best_offer = offer
                 best_avg_price = offer['avg_price']
             
             # Check travel agent offers for this hotel
             for agent in self.config.travel_agents:
-                offer = self._evaluate_travel_agent_offer(
+                offer, reason = self._evaluate_travel_agent_offer(
                     simulation_id, agent, hotel, current_day, stay_dates,
-                    max_price_per_night, supply_manager
+                    max_price_per_night, supply_manager, stay
                 )
                 
-                if offer and offer['avg_price'] < best_avg_price:
-                    best_offer = offer
+                if reason is not None:
+                    search.rejections.append((agent.agent_id, hotel.hotel_id, reason))
+                elif offer['avg_price'] < best_avg_price:
+                    search.best_offer = offer
                     best_avg_price = offer['avg_price']
         
-        return best_offer
+        if ledger is not None and search.best_offer is not None:
+            self._reprice_offer(search.best_offer, ledger, current_day, stay_dates)
+        
+        return search
+    
+    def _reprice_offer(self, offer: Dict, ledger, current_day: int, stay_dates: List[int]):
+        """
+        Sum the winning offer's price night by night
+        
+        Offers are ranked on prefix-sum totals, which can differ from the
+        nightly sum in the last bits; the quoted total must match what
+        booking at the stored prices charges.
+        """
+        first_day, last_day = stay_dates[0], stay_dates[-1]
+        
+        if offer['supplier_type'] == SupplierType.HOTEL:
+            hotel = self.config.get_hotel_by_id(offer['hotel_id'])
+            prices = self._hotel_price_row(hotel, current_day, first_day, last_day)
+        else:  # TRAVEL_AGENT
+            agent = self.config.get_travel_agent_by_id(offer['supplier_id'])
+            cost_basis = ledger.agent_cost_basis_for(agent.agent_id, offer['hotel_id'], stay_dates)
+            prices = (cost_basis + agent.operating_cost_per_room) * (1 + agent.profit_margin)
+        
+        offer['total_price'] = sum(prices.tolist())
+        offer['avg_price'] = offer['total_price'] / len(stay_dates)
+    
+    def _hotel_price_total(self, hotel: Hotel, current_day: int, first_day: int, last_day: int) -> float:
+        """
+        Hotel price as of current_day summed over the stay, in O(1) from the
+        day's prefix sums
+        
+        Args:
+            hotel: Hotel to price
+            current_day: Current day (when shopping)
+            first_day: First night, within the operational days
+            last_day: Last night, within the operational days
+        """
+        key = (hotel.hotel_id, current_day)
+        sums = self._price_sums.get(key)
+        if sums is None:
+            if any(day != current_day for _, day in self._price_sums):
+                self._price_sums.clear()
+            row = self._hotel_price_row(hotel, current_day,
+                                        self.config.operational_start_day, self.config.operational_end_day)
+            sums = PrefixSumIndex(row[None, :])
+            self._price_sums[key] = sums
+        
+        start = self.config.operational_start_day
+        return sums.sum(0, first_day - start, last_day - start)
     
     def _evaluate_hotel_offer(self, simulation_id: str, hotel: Hotel,
                               current_day: int, stay_dates: List[int],
-                              max_price_per_night: float, supply_manager) -> Dict:
+                              max_price_per_night: float, supply_manager,
+                              stay: Optional[StayAvailability] = None
+                              ) -> Tuple[Optional[Dict], Optional[RejectionReason]]:
         """
         Evaluate a direct hotel booking offer
         
+        Args:
+            stay: The hotel's availability over the stay, read from storage
+                when the supply manager has no ledger
+        
         Returns:
-            Offer dict if valid, None otherwise
+            Tuple of (offer dict, None) if valid, otherwise (None, rejection reason)
         """
         total_price = 0.0
+        ledger = supply_manager.get_ledger(simulation_id)
         
-        # Check availability and calculate price for all days
-        for stay_day in stay_dates:
-            daily_supply = supply_manager.get_daily_supply(
-                simulation_id, hotel.hotel_id, stay_day
-            )
+        if ledger is not None:
+            # O(1) range minimum and prefix-sum price over the stay
+            first_day, last_day = stay_dates[0], stay_dates[-1]
+            if ledger.min_hotel_rooms_between(hotel.hotel_id, first_day, last_day) <= 0:
+                return None, RejectionReason.NO_CAPACITY
             
-            if not daily_supply or daily_supply.hotel_rooms_remaining <= 0:
-                return None  # Not available
+            total_price = self._hotel_price_total(hotel, current_day, first_day, last_day)
+        else:
+            if stay is None or stay.hotel_rooms_remaining <= 0:
+                return None, RejectionReason.NO_CAPACITY
             
-            # Calculate dynamic price
-            price = self.calculate_hotel_price(hotel, current_day, stay_day)
-            total_price += price
+            # Calculate dynamic price for all days
+            for stay_day in stay_dates:
+                price = self.calculate_hotel_price(hotel, current_day, stay_day)
+                total_price += price
         
         avg_price = total_price / len(stay_dates)
         
         # Check if price is acceptable
         if avg_price > max_price_per_night:
-            return None
+            return None, RejectionReason.OVER_BUDGET
         
         return {
             'supplier_id': hotel.hotel_id,
@@ -158,48 +285,49 @@ class PricingEngine:
             'avg_price': avg_price,
             'total_price': total_price,
             'available': True
-        }
+        }, None
     
     def _evaluate_travel_agent_offer(self, simulation_id: str, agent: TravelAgent,
                                      hotel: Hotel, current_day: int, 
                                      stay_dates: List[int], max_price_per_night: float,
-                                     supply_manager) -> Dict:
+                                     supply_manager, stay: Optional[StayAvailability] = None
+                                     ) -> Tuple[Optional[Dict], Optional[RejectionReason]]:
         """
         Evaluate a travel agent booking offer
         
+        Args:
+            stay: The hotel's availability over the stay, read from storage
+                when the supply manager has no ledger
+        
         Returns:
-            Offer dict if valid, None otherwise
+            Tuple of (offer dict, None) if valid, otherwise (None, rejection reason)
         """
         total_price = 0.0
+        ledger = supply_manager.get_ledger(simulation_id)
         
-        # Check availability for all days
-        for stay_day in stay_dates:
-            daily_supply = supply_manager.get_daily_supply(
-                simulation_id, hotel.hotel_id, stay_day
-            )
-            
-            if not daily_supply:
-                return None
-            
-            # Find this agent's allocation
-            agent_allocation = None
-            for allocation in daily_supply.travel_agent_allocations:
-                if allocation.supplier_id == agent.agent_id:
-                    agent_allocation = allocation
-                    break
+        if ledger is not None:
+            first_day, last_day = stay_dates[0], stay_dates[-1]
+            if ledger.min_agent_rooms_between(agent.agent_id, hotel.hotel_id, first_day, last_day) <= 0:
+                return None, RejectionReason.NO_CAPACITY
             
-            if not agent_allocation or agent_allocation.rooms_remaining <= 0:
-                return None  # Not available
+            # Fixed price is linear in the cost basis, so price the summed cost basis once
+            cost_basis = ledger.agent_cost_basis_total(agent.agent_id, hotel.hotel_id, first_day, last_day)
+            total_price = ((cost_basis + len(stay_dates) * agent.operating_cost_per_room)
+                           * (1 + agent.profit_margin))
+        else:
+            if stay is None or stay.agent_rooms_remaining.get(agent.agent_id, 0) <= 0:
+                return None, RejectionReason.NO_CAPACITY
             
-            # Calculate fixed price based on cost basis
-            price = self.calculate_travel_agent_price(agent, agent_allocation.cost_basis)
-            total_price += price
+            # Calculate fixed price based on each night's cost basis
+            for cost_basis in stay.agent_cost_basis[agent.agent_id]:
+                price = self.calculate_travel_agent_price(agent, cost_basis)
+                total_price += price
         
         avg_price = total_price / len(stay_dates)
         
         # Check if price is acceptable
         if avg_price > max_price_per_night:
-            return None
+            return None, RejectionReason.OVER_BUDGET
         
         return {
             'supplier_id': agent.agent_id,
@@ -208,35 +336,155 @@ class PricingEngine:
             'avg_price': avg_price,
             'total_price': total_price,
             'available': True
-        }
+        }, None
     
     def update_hotel_prices(self, simulation_id: str, current_day: int, 
                            supply_manager):
         """
         Update all hotel prices based on current day (dynamic pricing)
         
+        Nothing is written in lazy pricing mode; use snapshot_hotel_prices or
+        materialize_hotel_prices when stored prices are actually needed.
+        
+        Args:
+            simulation_id: Simulation identifier
+            current_day: Current day
+            supply_manager: SupplyManager instance
+        """
+        if self.lazy_pricing:
+            return
+        
+        self.materialize_hotel_prices(simulation_id, current_day, supply_manager)
+    
+    def materialize_hotel_prices(self, simulation_id: str, current_day: int,
+                                 supply_manager):
+        """
+        Write the hotel prices as of current_day into supply storage
+        
         Args:
             simulation_id: Simulation identifier
             current_day: Current day
             supply_manager: SupplyManager instance
         """
+        ledger = supply_manager.get_ledger(simulation_id)
+        
         for hotel in self.config.hotels:
-            for day in range(current_day, self.config.operational_end_day + 1):
-                daily_supply = supply_manager.get_daily_supply(
-                    simulation_id, hotel.hotel_id, day
-                )
-                
-                if daily_supply:
-                    # Calculate new price
-                    new_price = self.calculate_hotel_price(hotel, current_day, day)
-                    daily_supply.hotel_price = new_price
-                    
-                    # Update in database
-                    supply_manager._save_daily_supply(daily_supply)
+            if ledger is not None:
+                self._update_ledger_prices(ledger, hotel, current_day)
+                continue
+            
+            first_day = max(current_day, self.config.operational_start_day)
+            prices = {
+                day: self.calculate_hotel_price(hotel, current_day, day)
+                for day in range(first_day, self.config.operational_end_day + 1)
+            }
+            
+            # Update in database
+            supply_manager.set_hotel_prices(simulation_id, hotel.hotel_id, prices)
         
         logger.debug(f"Updated hotel prices for day {current_day}")
     
-    def get_pricing_summary(self, simulation_id: str, day: int, supply_manager) -> Dict:
+    def _update_ledger_prices(self, ledger, hotel: Hotel, current_day: int):
+        """
+        Reprice a hotel's row of the ledger from current_day onwards in one vectorized write
+        
+        Args:
+            ledger: InventoryLedger for the simulation
+            hotel: Hotel to reprice
+            current_day: Current day
+        """
+        h = ledger.hotel_index.get(hotel.hotel_id)
+        if h is None:
+            return
+        
+        first_day = max(current_day, ledger.start_day)
+        last_day = min(self.config.operational_end_day, ledger.start_day + ledger.num_days - 1)
+        if first_day > last_day:
+            return
+        
+        ledger.writable("hotel_price")[h, first_day - ledger.start_day:last_day - ledger.start_day + 1] = \
+            self._hotel_price_row(hotel, current_day, first_day, last_day)
+    
+    def _hotel_price_row(self, hotel: Hotel, current_day: int,
+                         first_day: int, last_day: int) -> np.ndarray:
+        """
+        Vectorized calculate_hotel_price for stay days first_day..last_day
+        
+        Returns:
+            Array of prices, one per stay day
+        """
+        lead_time = np.arange(first_day, last_day + 1) - current_day
+        pricing = hotel.dynamic_pricing_config
+        multiplier = np.select(
+            [lead_time <= 7, lead_time <= 14, lead_time <= 30],
+            [pricing.get("lead_time_0_7", 1.5),
+             pricing.get("lead_time_8_14", 1.3),
+             pricing.get("lead_time_15_30", 1.1)],
+            default=pricing.get("lead_time_31_plus", 1.0)
+        )
+        return hotel.base_price * multiplier
+    
+    def snapshot_hotel_prices(self, current_day: int, first_day: Optional[int] = None,
+                              last_day: Optional[int] = None) -> Dict[str, Dict[int, float]]:
+        """
+        Materialise the hotel prices quoted on current_day without persisting them
+        
+        Args:
+            current_day: Day the prices are quoted on
+            first_day: First stay day (defaults to current_day, or the operational start)
+            last_day: Last stay day (defaults to the operational end)
+            
+        Returns:
+            hotel_id -> {stay_day: price}
+        """
+        if first_day is None:
+            first_day = max(current_day, self.config.operational_start_day)
+        if last_day is None:
+            last_day = self.config.operational_end_day
+        
+        snapshot = {}
+        for hotel in self.config.hotels:
+            if first_day > last_day:
+                snapshot[hotel.hotel_id] = {}
+                continue
+            prices = self._hotel_price_row(hotel, current_day, first_day, last_day)
+            snapshot[hotel.hotel_id] = {
+                first_day + i: price for i, price in enumerate(prices.tolist())
+            }
+        
+        return snapshot
+    
+    def get_price_history(self, hotel_id: str, stay_day: int,
+                          first_day: Optional[int] = None,
+                          last_day: Optional[int] = None) -> List[Dict]:
+        """
+        Get the price a hotel quoted for one stay day on each shopping day
+        
+        Args:
+            hotel_id: Hotel identifier
+            stay_day: Day of the stay
+            first_day: First shopping day (defaults to the simulation start)
+            last_day: Last shopping day (defaults to the stay day)
+            
+        Returns:
+            List of {'day': shopping day, 'price': price} entries
+        """
+        hotel = self.config.get_hotel_by_id(hotel_id)
+        if not hotel:
+            return []
+        
+        if first_day is None:
+            first_day = self.config.simulation_start_day
+        if last_day is None:
+            last_day = stay_day
+        
+        return [
+            {'day': day, 'price': self.calculate_hotel_price(hotel, day, stay_day)}
+            for day in range(first_day, last_day + 1)
+        ]
+    
+    def get_pricing_summary(self, simulation_id: str, day: int, supply_manager,
+                            current_day: Optional[int] = None) -> Dict:
         """
         Get a summary of all prices for a given day
         
@@ -244,6 +492,8 @@ class PricingEngine:
             simulation_id: Simulation identifier
             day: Day to get prices for
             supply_manager: SupplyManager instance
+            current_day: Day the prices are quoted on; in lazy pricing mode hotel
+                prices are derived for it rather than read from storage
             
         Returns:
             Dictionary with pricing summary
@@ -260,7 +510,9 @@ class PricingEngine:
                 summary['hotels'].append({
                     'hotel_id': hotel.hotel_id,
                     'name': hotel.name,
-                    'price': daily_supply.hotel_price,
+                    'price': (self.calculate_hotel_price(hotel, current_day, day)
+                              if self.lazy_pricing and current_day is not None
+                              else daily_supply.hotel_price),
                     'rooms_available': daily_supply.hotel_rooms_remaining
                 })
                 
@@ -0,0 +1,146 @@
+"""
+Range Indexes
+Lazy segment trees for range minimums and prefix sums for range sums over the day axis of ledger arrays.
+"""
+
+from typing import List, Tuple, Union
+import numpy as np
+
+Cells = Union[slice, np.ndarray]
+
+# Value of the padding leaves past the last day, above any room count
+_PADDING = np.iinfo(np.int64).max // 2
+
+
+def _runs(cells: Cells) -> List[Tuple[int, int]]:
+    """Contiguous (first, last) day offset runs of a slice or index array"""
+    if isinstance(cells, slice):
+        return [(cells.start, cells.stop - 1)]
+    days = np.unique(cells)
+    breaks = np.flatnonzero(np.diff(days) != 1)
+    firsts = np.concatenate(([days[0]], days[breaks + 1])).tolist()
+    lasts = np.concatenate((days[breaks], [days[-1]])).tolist()
+    return list(zip(firsts, lasts))
+
+
+class RangeMinIndex:
+    """
+    Minimum of any day range of each row, with range additions, in O(log D).
+
+    Each row is a segment tree over the day axis, padded to a power of two:
+    node p covers a run of days, with its children at 2p and 2p + 1 and the
+    days themselves at the leaves. tree[p] is the minimum of the run
+    including pending[p], an addition made to the whole run that is kept at
+    the node rather than passed down to its children. Adding to a range updates the
+    O(log D) nodes covering it and their ancestors; a query reads the
+    covering nodes and adds the pending additions above its two ends.
+    """
+
+    def __init__(self, values: np.ndarray):
+        """
+        Args:
+            values: [row, day] integer array to index (copied)
+        """
+        self.num_days = values.shape[1]
+        self.size = 1 << max(self.num_days - 1, 0).bit_length()
+        self.height = self.size.bit_length() - 1
+
+        # Build every row's tree level by level, then keep plain lists,
+        # which are faster than NumPy for the scalar walks below
+        tree = np.full((values.shape[0], 2 * self.size), _PADDING, dtype=np.int64)
+        tree[:, self.size:self.size + self.num_days] = values
+        width = self.size // 2
+        while width:
+            tree[:, width:2 * width] = np.minimum(tree[:, 2 * width:4 * width:2], tree[:, 2 * width + 1:4 * width:2])
+            width //= 2
+
+        self.tree = tree.tolist()
+        self.pending = [[0] * self.size for _ in range(values.shape[0])]
+
+    def min(self, row: int, first: int, last: int) -> int:
+        """Minimum of row over day offsets first..last inclusive"""
+        tree, pending = self.tree[row], self.pending[row]
+        lo = first + self.size
+        hi = last + self.size + 1
+        first_leaf, last_leaf = lo, hi - 1
+
+        # Nodes read on each side so far all lie under that end's ancestor
+        # at the current level, so its pending addition applies to all of them
+        left = right = _PADDING
+        shift = 0
+        while lo < hi:
+            if lo & 1:
+                if tree[lo] < left:
+                    left = tree[lo]
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                if tree[hi] < right:
+                    right = tree[hi]
+            lo >>= 1
+            hi >>= 1
+            shift += 1
+            left += pending[first_leaf >> shift]
+            right += pending[last_leaf >> shift]
+
+        while shift < self.height:
+            shift += 1
+            left += pending[first_leaf >> shift]
+            right += pending[last_leaf >> shift]
+        return left if left < right else right
+
+    def add(self, row: int, cells: Cells, delta: int):
+        """
+        Add delta to the cells of one row
+
+        Args:
+            row: Row to update
+            cells: Day offsets, as a slice or index array
+            delta: Amount to add to each cell
+        """
+        tree, pending = self.tree[row], self.pending[row]
+        for first, last in _runs(cells):
+            lo = first + self.size
+            hi = last + self.size + 1
+            leaf_lo, leaf_hi = lo, hi - 1
+            while lo < hi:
+                if lo & 1:
+                    self._apply(tree, pending, lo, delta)
+                    lo += 1
+                if hi & 1:
+                    hi -= 1
+                    self._apply(tree, pending, hi, delta)
+                lo >>= 1
+                hi >>= 1
+            self._pull(tree, pending, leaf_lo)
+            self._pull(tree, pending, leaf_hi)
+
+    def _apply(self, tree: List[int], pending: List[int], node: int, delta: int):
+        """Add delta to every day under a node"""
+        tree[node] += delta
+        if node < self.size:
+            pending[node] += delta
+
+    def _pull(self, tree: List[int], pending: List[int], leaf: int):
+        """Recompute the minimums on the path from a leaf to the root"""
+        node = leaf >> 1
+        while node:
+            left, right = tree[2 * node], tree[2 * node + 1]
+            tree[node] = (left if left < right else right) + pending[node]
+            node >>= 1
+
+
+class PrefixSumIndex:
+    """Sum of any day range of each row in O(1) from per-row prefix sums"""
+
+    def __init__(self, values: np.ndarray):
+        """
+        Args:
+            values: [row, day] array to index
+        """
+        self.prefix = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.float64)
+        np.cumsum(values, axis=1, out=self.prefix[:, 1:])
+
+    def sum(self, row: int, first: int, last: int) -> float:
+        """Sum of row over day offsets first..last inclusive"""
+        return float(self.prefix[row, last + 1] - self.prefix[row, first])
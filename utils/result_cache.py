@@ -0,0 +1,195 @@
+"""
+Result Cache
+Content-addressed LRU cache of simulation statistics keyed by demand file and configuration.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Dict, Optional, Tuple
+
+from .models import SimulationConfig
+
+logger = logging.getLogger(__name__)
+
+# Bump when a change to the simulation alters the results of an unchanged input
+CACHE_VERSION = 2
+
+DIGEST_CHUNK_SIZE = 1 << 20
+
+
+def _canonical(value: Any) -> Any:
+    """Normalise a JSON-like value so equal configurations serialise identically"""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        # 120 and 120.0 are the same price
+        return float(value)
+    return str(value)
+
+
+def config_hash(config: SimulationConfig) -> str:
+    """
+    Hash every field of a configuration that affects the simulation
+
+    Args:
+        config: Applied configuration
+
+    Returns:
+        Hex SHA-256 of the canonical configuration
+    """
+    canonical = _canonical({
+        "hotels": [asdict(h) for h in config.hotels],
+        "travel_agents": [asdict(a) for a in config.travel_agents],
+        "allocation_rules": config.allocation_rules,
+        "simulation_start_day": config.simulation_start_day,
+        "simulation_end_day": config.simulation_end_day,
+        "operational_start_day": config.operational_start_day,
+        "operational_end_day": config.operational_end_day,
+    })
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultCache:
+    """
+    Simulation results keyed by (demand file digest, configuration hash).
+
+    Keeps up to max_entries results in memory, evicting the least recently
+    used. With a cache_dir, results are also written there as JSON and read
+    back on a memory miss, so they survive restarts; the directory is
+    capped at max_entries files the same way, by modification time.
+    """
+
+    def __init__(self, max_entries: int = 256, cache_dir: Optional[str] = None):
+        """
+        Args:
+            max_entries: Results kept in memory
+            cache_dir: Directory to persist results in (memory only if not provided)
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # Demand file path -> ((mtime_ns, size), digest), so unchanged files are hashed once
+        self._digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._lock = threading.Lock()
+
+    def file_digest(self, filepath: str) -> str:
+        """
+        SHA-256 of a demand file's contents, recomputed only when it changes
+
+        Args:
+            filepath: Demand file
+
+        Returns:
+            Hex digest
+        """
+        stat = os.stat(filepath)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._digests.get(filepath)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        sha = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for chunk in iter(lambda: f.read(DIGEST_CHUNK_SIZE), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self._lock:
+            self._digests[filepath] = (signature, digest)
+        return digest
+
+    def make_key(self, filepath: str, config: SimulationConfig) -> str:
+        """
+        Cache key of running a configuration against a demand file
+
+        Args:
+            filepath: Demand file
+            config: Applied configuration
+
+        Returns:
+            Hex key
+        """
+        parts = f"{CACHE_VERSION}:{self.file_digest(filepath)}:{config_hash(config)}"
+        return hashlib.sha256(parts.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Get a cached result, or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                return dict(result)
+
+        if not self.cache_dir:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                result = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, result)
+        return dict(result)
+
+    def put(self, key: str, result: Dict):
+        """Cache a result"""
+        self._remember(key, dict(result))
+
+        if self.cache_dir:
+            path = self._path(key)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(result, f)
+            os.replace(temp_path, path)
+            self._prune_disk()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, result: Dict):
+        """Add a result to memory, evicting the least recently used"""
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.debug(f"Result cache evicted {evicted}")
+
+    def _prune_disk(self):
+        """Remove the least recently used files beyond max_entries"""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    files.append((os.stat(path).st_mtime_ns, path))
+                except OSError:
+                    continue
+
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _path(self, key: str) -> str:
+        """File a result is persisted in"""
+        return os.path.join(self.cache_dir, f"{key}.json")
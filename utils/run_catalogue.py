@@ -0,0 +1,268 @@
+"""
+Run Catalogue
+Summary sidecars for saved simulation files and a cached listing of the simulations folder.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .demand_table import DemandTable
+from .json_stream import iter_run
+from .models import Itinerary
+
+logger = logging.getLogger(__name__)
+
+# Sidecar written beside each saved run, e.g. run.json -> run.json.meta.json
+META_SUFFIX = ".meta.json"
+META_VERSION = 1
+RUN_EXTENSIONS = (".json", DemandTable.FILE_EXTENSION)
+
+HASH_CHUNK_SIZE = 1 << 20
+
+# A listing scanned this soon after the folder changed is not trusted, since
+# a save in the same timestamp tick would leave the folder mtime unchanged
+RACY_WINDOW_NS = 1_000_000_000
+
+
+def sidecar_path(filepath: str) -> str:
+    """Path of a run file's summary sidecar"""
+    return f"{filepath}{META_SUFFIX}"
+
+
+def is_run_file(filename: str) -> bool:
+    """Whether a file in the simulations folder is a saved run"""
+    return filename.endswith(RUN_EXTENSIONS) and not filename.endswith(META_SUFFIX)
+
+
+def file_sha256(filepath: str) -> str:
+    """Hex SHA-256 of a file's contents"""
+    sha = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _user_counts(user_ids) -> Dict[str, int]:
+    """Count casual and business users by user ID prefix"""
+    casual = sum(1 for user_id in user_ids if user_id.startswith("casual"))
+    business = sum(1 for user_id in user_ids if user_id.startswith("business"))
+    return {"total_users": casual + business, "casual_users": casual, "business_users": business}
+
+
+def summarize_users(users: Dict[str, List[Itinerary]]) -> Dict[str, int]:
+    """
+    Summary counts of the simulator's object view
+
+    Returns:
+        Dictionary of user, itinerary, demand and booking counts
+    """
+    itineraries = [itinerary for user_itineraries in users.values() for itinerary in user_itineraries]
+    return {
+        **_user_counts(users),
+        "total_itineraries": len(itineraries),
+        "total_demands": sum(itinerary.num_demands for itinerary in itineraries),
+        "booked_itineraries": sum(itinerary.is_booked for itinerary in itineraries)
+    }
+
+
+def summarize_table(table: DemandTable) -> Dict[str, int]:
+    """
+    Summary counts of a demand table
+
+    Returns:
+        Dictionary of user, itinerary, demand and booking counts
+    """
+    return {
+        **_user_counts(table.user_ids),
+        "total_itineraries": table.num_itineraries,
+        "total_demands": table.num_rows,
+        "booked_itineraries": len(table.bookings)
+    }
+
+
+def summarize_file(filepath: str) -> Tuple[Dict, Dict[str, int]]:
+    """
+    Read through a saved run to summarise it, for files saved without a sidecar
+
+    Returns:
+        Tuple of (simulation_parameters, summary counts)
+    """
+    if filepath.endswith(DemandTable.FILE_EXTENSION):
+        table, simulation_parameters = DemandTable.load(filepath, mmap=True)
+        return simulation_parameters, summarize_table(table)
+
+    simulation_parameters = None
+    casual = business = itineraries = demands = booked = 0
+    for kind, key, value in iter_run(filepath):
+        if kind == "member":
+            if key == "simulation_parameters":
+                simulation_parameters = value
+            continue
+
+        casual += key.startswith("casual")
+        business += key.startswith("business")
+        for itinerary in value:
+            itineraries += 1
+            demands += (len(itinerary["demands"]) if "demands" in itinerary
+                        else itinerary["window"]["shop_end"] - itinerary["window"]["shop_start"] + 1)
+            booked += bool(itinerary.get("is_booked"))
+
+    summary = {
+        "total_users": casual + business,
+        "casual_users": casual,
+        "business_users": business,
+        "total_itineraries": itineraries,
+        "total_demands": demands,
+        "booked_itineraries": booked
+    }
+    return simulation_parameters, summary
+
+
+def write_sidecar(filepath: str, simulation_parameters: Dict, summary: Dict[str, int]) -> Dict:
+    """
+    Write the summary sidecar of a saved run
+
+    Args:
+        filepath: Saved run
+        simulation_parameters: Parameters saved in the run
+        summary: Counts from summarize_users/summarize_table
+
+    Returns:
+        Sidecar contents
+    """
+    stat = os.stat(filepath)
+    meta = {
+        "version": META_VERSION,
+        "file": {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(filepath)
+        },
+        "simulation_parameters": simulation_parameters,
+        "stats": summary
+    }
+
+    path = sidecar_path(filepath)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(temp_path, path)
+    return meta
+
+
+def read_sidecar(filepath: str) -> Optional[Dict]:
+    """
+    Read a run's sidecar if it still describes the file
+
+    Returns:
+        Sidecar contents, or None if it is missing, from another format
+        version, or older than the file
+    """
+    try:
+        with open(sidecar_path(filepath), "r") as f:
+            meta = json.load(f)
+        stat = os.stat(filepath)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("version") != META_VERSION:
+        return None
+    recorded = meta.get("file", {})
+    if recorded.get("size") != stat.st_size or recorded.get("mtime_ns") != stat.st_mtime_ns:
+        return None
+    return meta
+
+
+class RunCatalogue:
+    """
+    Cached listing of the saved runs in a folder.
+
+    The listing is rebuilt only when the folder's modification time changes,
+    which saving, replacing or deleting a run (and its sidecar) always does,
+    or is too recent to rule out a change within the same timestamp tick.
+    Details come from each run's sidecar; runs saved without one are parsed
+    once and given one.
+    """
+
+    def __init__(self, folder: str):
+        """
+        Args:
+            folder: Folder of saved runs
+        """
+        self.folder = folder
+        self._listing: List[Dict] = []
+        self._listing_mtime_ns: Optional[int] = None
+        self._scanned_at_ns = 0
+        self._lock = threading.Lock()
+
+    def list(self) -> List[Dict]:
+        """
+        List the saved runs, newest first
+
+        Returns:
+            One entry per run with its name, path, size, modified time and,
+            if it has a current sidecar, its summary stats
+        """
+        try:
+            folder_mtime_ns = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return []
+
+        with self._lock:
+            if (folder_mtime_ns != self._listing_mtime_ns
+                    or self._scanned_at_ns - folder_mtime_ns < RACY_WINDOW_NS):
+                self._scanned_at_ns = time.time_ns()
+                self._listing = self._scan()
+                self._listing_mtime_ns = folder_mtime_ns
+                logger.debug(f"Run catalogue rebuilt: {len(self._listing)} runs in {self.folder}")
+            return [dict(entry) for entry in self._listing]
+
+    def details(self, filename: str) -> Dict:
+        """
+        Summary of one saved run
+
+        Args:
+            filename: Run file name within the folder
+
+        Returns:
+            Sidecar contents: simulation_parameters, stats and file details
+        """
+        filepath = os.path.join(self.folder, filename)
+        meta = read_sidecar(filepath)
+        if meta is None:
+            logger.info(f"Writing missing or stale sidecar for {filename}")
+            simulation_parameters, summary = summarize_file(filepath)
+            meta = write_sidecar(filepath, simulation_parameters, summary)
+        return meta
+
+    def _scan(self) -> List[Dict]:
+        """Read the folder's runs and their sidecars"""
+        entries = []
+        for filename in os.listdir(self.folder):
+            if not is_run_file(filename):
+                continue
+
+            filepath = os.path.join(self.folder, filename)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+
+            meta = read_sidecar(filepath)
+            entries.append({
+                "name": filename,
+                "path": filepath,
+                "size": stat.st_size,
+                "modified": datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+                "stats": meta["stats"] if meta is not None else None
+            })
+
+        entries.sort(key=lambda entry: entry["modified"], reverse=True)
+        return entries
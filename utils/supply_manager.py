@@ -6,51 +6,24 @@ Handles supply allocation, tracking, and MongoDB operations.
 import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from .instrumentation import RoundTripListener
 from .models import (
     Hotel, TravelAgent, DailySupply, SupplyAllocation,
-    Booking, SupplierType, SimulationConfig
+    Booking, SupplierType, SimulationConfig, StayAvailability
 )
 
 logger = logging.getLogger(__name__)
 
 
-class SupplyManager:
-    """Manages hotel and travel agent supply, with MongoDB persistence"""
+class BaseSupplyManager:
+    """
+    Supply allocation and booking logic shared by all storage backends.
+
+    Subclasses provide persistence through get_daily_supply, _save_daily_supply,
+    _save_simulation_config, _save_booking, _get_booking_docs and cleanup_simulation.
+    """
     
-    def __init__(self, mongodb_uri: str = "mongodb://localhost:27017/", 
-                 db_name: str = "hotel_simulation"):
-        """
-        Initialize the supply manager
-        
-        Args:
-            mongodb_uri: MongoDB connection string
-            db_name: Database name
-        """
-        self.client = MongoClient(mongodb_uri)
-        self.db = self.client[db_name]
-        
-        # Collections
-        self.daily_supply_collection = self.db['daily_supply']
-        self.bookings_collection = self.db['bookings']
-        self.simulations_collection = self.db['simulations']
-        
-        # Create indexes for performance
-        self._create_indexes()
-        
-    def _create_indexes(self):
-        """Create database indexes for better query performance"""
-        self.daily_supply_collection.create_index([
-            ("simulation_id", 1),
-            ("hotel_id", 1),
-            ("day", 1)
-        ], unique=True)
-        
-        self.bookings_collection.create_index([
-            ("simulation_id", 1),
-            ("user_id", 1)
-        ])
-        
     def initialize_simulation(self, simulation_id: str, config: SimulationConfig):
         """
         Initialize supply for a new simulation
@@ -62,18 +35,7 @@ class SupplyManager:
         logger.info(f"Initializing simulation {simulation_id}")
         
         # Store simulation config
-        self.simulations_collection.update_one(
-            {"simulation_id": simulation_id},
-            {
-                "$set": {
-                    "simulation_id": simulation_id,
-                    "config": self._config_to_dict(config),
-                    "created_at": datetime.now(),
-                    "status": "initialized"
-                }
-            },
-            upsert=True
-        )
+        self._save_simulation_config(simulation_id, config)
         
         # Initialize daily supply for each hotel for each operational day
         for day in range(config.operational_start_day, config.operational_end_day + 1):
@@ -93,6 +55,9 @@ class SupplyManager:
         # Allocate rooms to travel agents based on schedule
         self._allocate_travel_agent_inventory(simulation_id, config)
         
+        # Persist the initial supply in one go when writes are buffered
+        self.flush()
+        
         logger.info(f"Simulation {simulation_id} initialized successfully")
     
     def _allocate_travel_agent_inventory(self, simulation_id: str, config: SimulationConfig):
@@ -159,16 +124,40 @@ class SupplyManager:
         Returns:
             DailySupply object or None if not found
         """
-        doc = self.daily_supply_collection.find_one({
-            "simulation_id": simulation_id,
-            "hotel_id": hotel_id,
-            "day": day
-        })
+        raise NotImplementedError
+    
+    def get_stay_availability(self, simulation_id: str, hotel_ids: List[str],
+                              start_day: int, end_day: int) -> Dict[str, StayAvailability]:
+        """
+        Get rooms remaining and prices of every supplier at the given hotels
+        over the nights start_day to end_day
         
-        if not doc:
-            return None
+        This default reads each night with get_daily_supply; backends override
+        it with a single range read.
         
-        return self._doc_to_daily_supply(doc)
+        Args:
+            simulation_id: Simulation identifier
+            hotel_ids: Hotels to look up
+            start_day: First night of the stay
+            end_day: Last night of the stay
+            
+        Returns:
+            hotel_id -> StayAvailability, for hotels with supply on at least one night
+        """
+        availability = {}
+        for hotel_id in hotel_ids:
+            supplies = [
+                daily_supply for daily_supply in (
+                    self.get_daily_supply(simulation_id, hotel_id, day)
+                    for day in range(start_day, end_day + 1)
+                )
+                if daily_supply is not None
+            ]
+            if supplies:
+                availability[hotel_id] = StayAvailability.from_daily_supplies(
+                    hotel_id, start_day, end_day, supplies
+                )
+        return availability
     
     def get_available_suppliers(self, simulation_id: str, day: int, 
                                config: SimulationConfig) -> List[Dict]:
@@ -219,7 +208,8 @@ class SupplyManager:
     
     def book_room(self, simulation_id: str, supplier_id: str, supplier_type: SupplierType,
                   hotel_id: str, booking_day: int, stay_dates: List[int],
-                  user_id: str, trip_id: int, config: SimulationConfig) -> Optional[Booking]:
+                  user_id: str, trip_id: int, config: SimulationConfig,
+                  quoted_total_price: Optional[float] = None) -> Optional[Booking]:
         """
         Book a room from a supplier for given stay dates
         
@@ -233,6 +223,8 @@ class SupplyManager:
             user_id: User making the booking
             trip_id: Trip identifier
             config: Simulation configuration
+            quoted_total_price: Total price quoted by the PricingEngine; used instead
+                of the stored prices, which are not kept current in lazy pricing mode
             
         Returns:
             Booking object if successful, None otherwise
@@ -263,20 +255,23 @@ class SupplyManager:
         total_price = 0.0
         price_per_night = 0.0
         
-        for day in stay_dates:
-            daily_supply = self.get_daily_supply(simulation_id, hotel_id, day)
-            
-            if supplier_type == SupplierType.HOTEL:
-                price = daily_supply.hotel_price
-            else:  # TRAVEL_AGENT
-                agent = config.get_travel_agent_by_id(supplier_id)
-                for allocation in daily_supply.travel_agent_allocations:
-                    if allocation.supplier_id == supplier_id:
-                        price = allocation.cost_basis + agent.operating_cost_per_room
-                        price = price * (1 + agent.profit_margin)
-                        break
-            
-            total_price += price
+        if quoted_total_price is not None:
+            total_price = quoted_total_price
+        else:
+            for day in stay_dates:
+                daily_supply = self.get_daily_supply(simulation_id, hotel_id, day)
+                
+                if supplier_type == SupplierType.HOTEL:
+                    price = daily_supply.hotel_price
+                else:  # TRAVEL_AGENT
+                    agent = config.get_travel_agent_by_id(supplier_id)
+                    for allocation in daily_supply.travel_agent_allocations:
+                        if allocation.supplier_id == supplier_id:
+                            price = allocation.cost_basis + agent.operating_cost_per_room
+                            price = price * (1 + agent.profit_margin)
+                            break
+                
+                total_price += price
         
         price_per_night = total_price / len(stay_dates)
         
@@ -320,6 +315,21 @@ class SupplyManager:
         
         return booking
     
+    def set_hotel_prices(self, simulation_id: str, hotel_id: str, prices: Dict[int, float]):
+        """
+        Store new hotel prices without touching the rest of the supply state
+        
+        Args:
+            simulation_id: Simulation identifier
+            hotel_id: Hotel identifier
+            prices: day -> price
+        """
+        for day, price in prices.items():
+            daily_supply = self.get_daily_supply(simulation_id, hotel_id, day)
+            if daily_supply:
+                daily_supply.hotel_price = price
+                self._save_daily_supply(daily_supply)
+    
     def get_simulation_statistics(self, simulation_id: str, config: SimulationConfig) -> Dict:
         """
         Get comprehensive statistics for a simulation
@@ -331,21 +341,13 @@ class SupplyManager:
         Returns:
             Dictionary with statistics
         """
-        bookings = list(self.bookings_collection.find({"simulation_id": simulation_id}))
+        bookings = self._get_booking_docs(simulation_id)
         
         total_bookings = len(bookings)
         total_revenue = sum(b["total_price"] for b in bookings)
         
         # Calculate occupancy
-        total_room_days = 0
-        booked_room_days = 0
-        
-        for day in range(config.operational_start_day, config.operational_end_day + 1):
-            for hotel in config.hotels:
-                daily_supply = self.get_daily_supply(simulation_id, hotel.hotel_id, day)
-                if daily_supply:
-                    total_room_days += hotel.total_rooms
-                    booked_room_days += (hotel.total_rooms - daily_supply.hotel_rooms_remaining)
+        total_room_days, booked_room_days = self._count_room_days(simulation_id, config)
                     
         occupancy_rate = (booked_room_days / total_room_days * 100) if total_room_days > 0 else 0
         
@@ -364,24 +366,73 @@ class SupplyManager:
             "avg_price_per_night": total_revenue / booked_room_days if booked_room_days > 0 else 0
         }
     
-    def _save_daily_supply(self, daily_supply: DailySupply):
-        """Save or update daily supply in MongoDB"""
-        doc = self._daily_supply_to_doc(daily_supply)
+    def _count_room_days(self, simulation_id: str, config: SimulationConfig) -> Tuple[int, int]:
+        """
+        Count available and booked room-days across all hotels
         
-        self.daily_supply_collection.update_one(
-            {
-                "simulation_id": daily_supply.simulation_id,
-                "hotel_id": daily_supply.hotel_id,
-                "day": daily_supply.day
-            },
-            {"$set": doc},
-            upsert=True
-        )
+        Returns:
+            Tuple of (total_room_days, booked_room_days)
+        """
+        total_room_days = 0
+        booked_room_days = 0
+        
+        for day in range(config.operational_start_day, config.operational_end_day + 1):
+            for hotel in config.hotels:
+                daily_supply = self.get_daily_supply(simulation_id, hotel.hotel_id, day)
+                if daily_supply:
+                    total_room_days += hotel.total_rooms
+                    booked_room_days += (hotel.total_rooms - daily_supply.hotel_rooms_remaining)
+        
+        return total_room_days, booked_room_days
+    
+    def flush(self):
+        """Write out any buffered changes (no-op for backends that do not buffer)"""
+        pass
+    
+    def checkpoint(self, event: str):
+        """
+        Signal a point in the run where buffered changes may be flushed
+        
+        Args:
+            event: "day" at the end of each simulated day, "run" at the end of a run
+        """
+        pass
+    
+    def get_ledger(self, simulation_id: str):
+        """
+        Get the dense InventoryLedger backing a simulation, if the backend keeps one
+        
+        Returns:
+            InventoryLedger, or None when supply is only reachable through DailySupply documents
+        """
+        return None
+    
+    def fork_simulation(self, source_simulation_id: str, simulation_id: str):
+        """
+        Branch a simulation's supply, bookings and config into a new simulation
+        that can continue independently from the source's current state
+        
+        Args:
+            source_simulation_id: Simulation to branch from
+            simulation_id: Identifier of the new simulation
+        """
+        raise NotImplementedError
+    
+    def _save_daily_supply(self, daily_supply: DailySupply):
+        """Save or update daily supply"""
+        raise NotImplementedError
+    
+    def _save_simulation_config(self, simulation_id: str, config: SimulationConfig):
+        """Record the configuration a simulation was initialized with"""
+        raise NotImplementedError
     
     def _save_booking(self, booking: Booking):
-        """Save a booking to MongoDB"""
-        doc = self._booking_to_doc(booking)
-        self.bookings_collection.insert_one(doc)
+        """Save a booking"""
+        raise NotImplementedError
+    
+    def _get_booking_docs(self, simulation_id: str) -> List[Dict]:
+        """Get all bookings for a simulation in document form"""
+        raise NotImplementedError
     
     def _config_to_dict(self, config: SimulationConfig) -> Dict:
         """Convert SimulationConfig to dictionary for MongoDB"""
@@ -409,6 +460,414 @@ class SupplyManager:
             "allocation_rules": config.allocation_rules
         }
     
+    def _booking_to_doc(self, booking: Booking) -> Dict:
+        """Convert Booking to MongoDB document"""
+        return {
+            "simulation_id": booking.simulation_id,
+            "user_id": booking.user_id,
+            "trip_id": booking.trip_id,
+            "supplier_id": booking.supplier_id,
+            "supplier_type": booking.supplier_type.value,
+            "booking_day": booking.booking_day,
+            "stay_dates": booking.stay_dates,
+            "price_per_night": booking.price_per_night,
+            "total_price": booking.total_price,
+            "hotel_id": booking.hotel_id,
+            "created_at": booking.created_at
+        }
+    
+    def cleanup_simulation(self, simulation_id: str):
+        """Remove all data for a simulation"""
+        raise NotImplementedError
+
+
+class SupplyManager(BaseSupplyManager):
+    """Manages hotel and travel agent supply, with MongoDB persistence"""
+    
+    FLUSH_POLICIES = ("immediate", "ops", "day", "run")
+    
+    def __init__(self, mongodb_uri: str = "mongodb://localhost:27017/", 
+                 db_name: str = "hotel_simulation", flush_policy: str = "immediate",
+                 flush_every: int = 1000):
+        """
+        Initialize the supply manager
+        
+        Args:
+            mongodb_uri: MongoDB connection string
+            db_name: Database name
+            flush_policy: When buffered writes reach MongoDB - "immediate" (one write
+                per change), "ops" (every flush_every changes), "day" (end of each
+                simulated day) or "run" (end of the run)
+            flush_every: Number of buffered changes that triggers a flush under "ops"
+        """
+        if flush_policy not in self.FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy '{flush_policy}', "
+                             f"expected one of {self.FLUSH_POLICIES}")
+        
+        self.flush_policy = flush_policy
+        self.flush_every = flush_every
+        
+        # Dirty records waiting for the next flush; reads check these first
+        self._pending_supply: Dict[Tuple[str, str, int], Dict] = {}
+        self._pending_bookings: List[Dict] = []
+        self._pending_ops = 0
+        
+        # Counts commands for the Instrumentation active on the issuing thread
+        self.client = MongoClient(mongodb_uri, event_listeners=[RoundTripListener()])
+        self.db = self.client[db_name]
+        
+        # Collections
+        self.daily_supply_collection = self.db['daily_supply']
+        self.bookings_collection = self.db['bookings']
+        self.simulations_collection = self.db['simulations']
+        
+        # Create indexes for performance
+        self._create_indexes()
+        
+    def _create_indexes(self):
+        """Create database indexes for better query performance"""
+        self.daily_supply_collection.create_index([
+            ("simulation_id", 1),
+            ("hotel_id", 1),
+            ("day", 1)
+        ], unique=True)
+        
+        self.bookings_collection.create_index([
+            ("simulation_id", 1),
+            ("user_id", 1)
+        ])
+    
+    def get_daily_supply(self, simulation_id: str, hotel_id: str, day: int) -> Optional[DailySupply]:
+        """
+        Get supply information for a specific day and hotel
+        
+        Args:
+            simulation_id: Simulation identifier
+            hotel_id: Hotel identifier
+            day: Day number
+            
+        Returns:
+            DailySupply object or None if not found
+        """
+        doc = self._pending_supply.get((simulation_id, hotel_id, day))
+        
+        if doc is None:
+            doc = self.daily_supply_collection.find_one({
+                "simulation_id": simulation_id,
+                "hotel_id": hotel_id,
+                "day": day
+            })
+        
+        if not doc:
+            return None
+        
+        return self._doc_to_daily_supply(doc)
+    
+    def get_stay_availability(self, simulation_id: str, hotel_ids: List[str],
+                              start_day: int, end_day: int) -> Dict[str, StayAvailability]:
+        """
+        Get rooms remaining and prices of every supplier at the given hotels
+        over the nights start_day to end_day, with a single find
+        
+        Args:
+            simulation_id: Simulation identifier
+            hotel_ids: Hotels to look up
+            start_day: First night of the stay
+            end_day: Last night of the stay
+            
+        Returns:
+            hotel_id -> StayAvailability, for hotels with supply on at least one night
+        """
+        docs = {
+            (doc["hotel_id"], doc["day"]): doc
+            for doc in self.daily_supply_collection.find({
+                "simulation_id": simulation_id,
+                "hotel_id": {"$in": list(hotel_ids)},
+                "day": {"$gte": start_day, "$lte": end_day}
+            })
+        }
+        
+        # Buffered changes are newer than what MongoDB holds
+        if self._pending_supply:
+            for hotel_id in hotel_ids:
+                for day in range(start_day, end_day + 1):
+                    doc = self._pending_supply.get((simulation_id, hotel_id, day))
+                    if doc is not None:
+                        docs[(hotel_id, day)] = doc
+        
+        availability = {}
+        for hotel_id in hotel_ids:
+            supplies = [
+                self._doc_to_daily_supply(docs[(hotel_id, day)])
+                for day in range(start_day, end_day + 1)
+                if (hotel_id, day) in docs
+            ]
+            if supplies:
+                availability[hotel_id] = StayAvailability.from_daily_supplies(
+                    hotel_id, start_day, end_day, supplies
+                )
+        return availability
+    
+    def book_room(self, simulation_id: str, supplier_id: str, supplier_type: SupplierType,
+                  hotel_id: str, booking_day: int, stay_dates: List[int],
+                  user_id: str, trip_id: int, config: SimulationConfig,
+                  quoted_total_price: Optional[float] = None) -> Optional[Booking]:
+        """
+        Book a room from a supplier for given stay dates with atomic updates
+        
+        Each night is checked and decremented by one conditional
+        find_one_and_update, so concurrent runs cannot oversell or lose updates.
+        If any night is sold out, the nights already taken are given back.
+        
+        Args:
+            simulation_id: Simulation identifier
+            supplier_id: ID of the supplier (hotel or travel agent)
+            supplier_type: Type of supplier
+            hotel_id: Hotel where booking is made
+            booking_day: Day when booking is made
+            stay_dates: List of days for the stay
+            user_id: User making the booking
+            trip_id: Trip identifier
+            config: Simulation configuration
+            quoted_total_price: Total price quoted by the PricingEngine; used instead
+                of the stored prices, which are not kept current in lazy pricing mode
+            
+        Returns:
+            Booking object if successful, None otherwise
+        """
+        # Buffered whole-document writes of these nights would overwrite the
+        # $inc updates below; everything else stays buffered for the policy flush
+        self._flush_supply(simulation_id, hotel_id, stay_dates)
+        
+        agent = None
+        if supplier_type == SupplierType.TRAVEL_AGENT:
+            agent = config.get_travel_agent_by_id(supplier_id)
+            if agent is None:
+                logger.warning(f"Unknown travel agent {supplier_id}")
+                return None
+        
+        # day -> update that gives the room back
+        taken = {}
+        total_price = 0.0
+        
+        for day in stay_dates:
+            query = {"simulation_id": simulation_id, "hotel_id": hotel_id, "day": day}
+            
+            if supplier_type == SupplierType.HOTEL:
+                query["hotel_rooms_remaining"] = {"$gt": 0}
+                update = {"$inc": {"hotel_rooms_remaining": -1}}
+            else:  # TRAVEL_AGENT
+                query["travel_agent_allocations"] = {
+                    "$elemMatch": {"supplier_id": supplier_id, "rooms_remaining": {"$gt": 0}}
+                }
+                update = {"$inc": {"travel_agent_allocations.$.rooms_remaining": -1}}
+            
+            doc = self.daily_supply_collection.find_one_and_update(
+                query, update,
+                projection={"hotel_price": 1, "travel_agent_allocations": 1},
+                return_document=ReturnDocument.BEFORE
+            )
+            
+            if doc is None:
+                logger.warning(f"Supplier {supplier_id} has no rooms for day {day}")
+                self._release_rooms(simulation_id, hotel_id, taken)
+                return None
+            
+            if supplier_type == SupplierType.HOTEL:
+                taken[day] = {"$inc": {"hotel_rooms_remaining": 1}}
+                price = doc["hotel_price"]
+            else:  # TRAVEL_AGENT
+                # The positional update hit the first allocation with rooms left
+                position, allocation = next(
+                    (i, a) for i, a in enumerate(doc["travel_agent_allocations"])
+                    if a["supplier_id"] == supplier_id and a["rooms_remaining"] > 0
+                )
+                taken[day] = {"$inc": {f"travel_agent_allocations.{position}.rooms_remaining": 1}}
+                price = allocation["cost_basis"] + agent.operating_cost_per_room
+                price = price * (1 + agent.profit_margin)
+            
+            total_price += price
+        
+        if quoted_total_price is not None:
+            total_price = quoted_total_price
+        
+        price_per_night = total_price / len(stay_dates)
+        
+        # Update revenue for all nights in one round trip
+        self.daily_supply_collection.update_many(
+            {"simulation_id": simulation_id, "hotel_id": hotel_id, "day": {"$in": list(stay_dates)}},
+            {"$inc": {"bookings_count": 1, "total_revenue": price_per_night}}
+        )
+        
+        booking = Booking(
+            simulation_id=simulation_id,
+            user_id=user_id,
+            trip_id=trip_id,
+            supplier_id=supplier_id,
+            supplier_type=supplier_type,
+            booking_day=booking_day,
+            stay_dates=stay_dates,
+            price_per_night=price_per_night,
+            total_price=total_price,
+            hotel_id=hotel_id
+        )
+        
+        self._save_booking(booking)
+        
+        logger.info(f"Booking created: {user_id} booked {hotel_id} via {supplier_id} "
+                   f"for days {stay_dates[0]}-{stay_dates[-1]} at ${price_per_night:.2f}/night")
+        
+        return booking
+    
+    def _release_rooms(self, simulation_id: str, hotel_id: str, taken: Dict[int, Dict]):
+        """Give back rooms taken by a booking that could not be completed"""
+        for day, update in taken.items():
+            self.daily_supply_collection.update_one(
+                {"simulation_id": simulation_id, "hotel_id": hotel_id, "day": day},
+                update
+            )
+        
+        if taken:
+            logger.debug(f"Rolled back {len(taken)} nights at {hotel_id}")
+    
+    def set_hotel_prices(self, simulation_id: str, hotel_id: str, prices: Dict[int, float]):
+        """
+        Store new hotel prices with a single bulk $set of hotel_price
+        
+        Args:
+            simulation_id: Simulation identifier
+            hotel_id: Hotel identifier
+            prices: day -> price
+        """
+        if not prices:
+            return
+        
+        self._flush_supply(simulation_id, hotel_id, prices)
+        self.daily_supply_collection.bulk_write([
+            UpdateOne(
+                {"simulation_id": simulation_id, "hotel_id": hotel_id, "day": day},
+                {"$set": {"hotel_price": price, "updated_at": datetime.now()}}
+            )
+            for day, price in prices.items()
+        ], ordered=False)
+    
+    def _save_daily_supply(self, daily_supply: DailySupply):
+        """Save or update daily supply in MongoDB"""
+        doc = self._daily_supply_to_doc(daily_supply)
+        
+        if self.flush_policy != "immediate":
+            key = (daily_supply.simulation_id, daily_supply.hotel_id, daily_supply.day)
+            self._pending_supply[key] = doc
+            self._record_pending_op()
+            return
+        
+        self.daily_supply_collection.update_one(
+            {
+                "simulation_id": daily_supply.simulation_id,
+                "hotel_id": daily_supply.hotel_id,
+                "day": daily_supply.day
+            },
+            {"$set": doc},
+            upsert=True
+        )
+    
+    def _save_simulation_config(self, simulation_id: str, config: SimulationConfig):
+        """Store the simulation config in MongoDB"""
+        self.simulations_collection.update_one(
+            {"simulation_id": simulation_id},
+            {
+                "$set": {
+                    "simulation_id": simulation_id,
+                    "config": self._config_to_dict(config),
+                    "created_at": datetime.now(),
+                    "status": "initialized"
+                }
+            },
+            upsert=True
+        )
+    
+    def _save_booking(self, booking: Booking):
+        """Save a booking to MongoDB"""
+        doc = self._booking_to_doc(booking)
+        
+        if self.flush_policy != "immediate":
+            self._pending_bookings.append(doc)
+            self._record_pending_op()
+            return
+        
+        self.bookings_collection.insert_one(doc)
+    
+    def _record_pending_op(self):
+        """Count a buffered change and flush if the "ops" threshold is reached"""
+        self._pending_ops += 1
+        if self.flush_policy == "ops" and self._pending_ops >= self.flush_every:
+            self.flush()
+    
+    def _write_supply_docs(self, docs: Dict[Tuple[str, str, int], Dict]):
+        """Upsert supply documents with one bulk write"""
+        self.daily_supply_collection.bulk_write([
+            UpdateOne(
+                {"simulation_id": key[0], "hotel_id": key[1], "day": key[2]},
+                {"$set": doc},
+                upsert=True
+            )
+            for key, doc in docs.items()
+        ], ordered=False)
+    
+    def _flush_supply(self, simulation_id: str, hotel_id: str, days):
+        """
+        Write the buffered supply documents of one hotel's nights, if any
+        
+        Args:
+            simulation_id: Simulation identifier
+            hotel_id: Hotel identifier
+            days: Nights about to be updated in place
+        """
+        if not self._pending_supply:
+            return
+        
+        docs = {}
+        for day in days:
+            key = (simulation_id, hotel_id, day)
+            doc = self._pending_supply.pop(key, None)
+            if doc is not None:
+                docs[key] = doc
+        
+        if docs:
+            self._write_supply_docs(docs)
+            self._pending_ops -= len(docs)
+    
+    def flush(self):
+        """Write all buffered supply documents and bookings with bulk operations"""
+        if self._pending_supply:
+            self._write_supply_docs(self._pending_supply)
+        
+        if self._pending_bookings:
+            self.bookings_collection.insert_many(self._pending_bookings, ordered=True)
+        
+        if self._pending_ops:
+            logger.debug(f"Flushed {len(self._pending_supply)} supply documents and "
+                         f"{len(self._pending_bookings)} bookings")
+        
+        self._pending_supply = {}
+        self._pending_bookings = []
+        self._pending_ops = 0
+    
+    def checkpoint(self, event: str):
+        """
+        Flush buffered writes if the flush policy includes this event
+        
+        Args:
+            event: "day" at the end of each simulated day, "run" at the end of a run
+        """
+        if event == "run" or (event == "day" and self.flush_policy == "day"):
+            self.flush()
+    
+    def _get_booking_docs(self, simulation_id: str) -> List[Dict]:
+        """Get all bookings for a simulation from MongoDB"""
+        self.flush()
+        return list(self.bookings_collection.find({"simulation_id": simulation_id}))
+    
     def _daily_supply_to_doc(self, daily_supply: DailySupply) -> Dict:
         """Convert DailySupply to MongoDB document"""
         return {
@@ -463,24 +922,40 @@ class SupplyManager:
             updated_at=doc.get("updated_at", datetime.now())
         )
     
-    def _booking_to_doc(self, booking: Booking) -> Dict:
-        """Convert Booking to MongoDB document"""
-        return {
-            "simulation_id": booking.simulation_id,
-            "user_id": booking.user_id,
-            "trip_id": booking.trip_id,
-            "supplier_id": booking.supplier_id,
-            "supplier_type": booking.supplier_type.value,
-            "booking_day": booking.booking_day,
-            "stay_dates": booking.stay_dates,
-            "price_per_night": booking.price_per_night,
-            "total_price": booking.total_price,
-            "hotel_id": booking.hotel_id,
-            "created_at": booking.created_at
-        }
+    def fork_simulation(self, source_simulation_id: str, simulation_id: str):
+        """
+        Branch a simulation by copying its documents server-side
+        
+        Each collection is copied with a single $merge aggregation, so no
+        documents travel through the client; the copy is still proportional
+        to the source's size, as MongoDB has no copy-on-write documents.
+        
+        Args:
+            source_simulation_id: Simulation to branch from
+            simulation_id: Identifier of the new simulation
+        """
+        self.flush()
+        
+        for collection in (self.daily_supply_collection, self.bookings_collection,
+                           self.simulations_collection):
+            collection.aggregate([
+                {"$match": {"simulation_id": source_simulation_id}},
+                {"$set": {"simulation_id": simulation_id}},
+                {"$unset": "_id"},
+                {"$merge": {"into": collection.name, "whenMatched": "fail", "whenNotMatched": "insert"}}
+            ])
+        
+        logger.info(f"Forked simulation {source_simulation_id} into {simulation_id}")
     
     def cleanup_simulation(self, simulation_id: str):
         """Remove all data for a simulation"""
+        self._pending_supply = {
+            key: doc for key, doc in self._pending_supply.items() if key[0] != simulation_id
+        }
+        self._pending_bookings = [
+            doc for doc in self._pending_bookings if doc["simulation_id"] != simulation_id
+        ]
+        
         self.daily_supply_collection.delete_many({"simulation_id": simulation_id})
         self.bookings_collection.delete_many({"simulation_id": simulation_id})
         self.simulations_collection.delete_one({"simulation_id": simulation_id})